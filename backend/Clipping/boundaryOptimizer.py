@@ -0,0 +1,227 @@
+import json
+
+import numpy as np
+
+SENTENCE_END = (".", "?", "!", "…")
+
+
+class WordTimeline:
+    """
+    Word-level boundary features of one episode, computed once as arrays.
+
+    Built from merged WhisperX segments (absolute timestamps); words without timings
+    (WhisperX sometimes leaves numbers unaligned) are skipped.
+    """
+
+    def __init__(self, segments, pause_cap=1.5):
+        words = [w for seg in segments for w in seg.get("words", []) if "start" in w and "end" in w]
+        words.sort(key=lambda w: w["start"])
+        self.words = [w["word"] for w in words]
+        self.starts = np.array([w["start"] for w in words], dtype=np.float64)
+        self.ends = np.array([w["end"] for w in words], dtype=np.float64)
+        speakers = [w.get("speaker") for w in words]
+        n = len(words)
+
+        self.gap_before = np.full(n, np.inf)
+        self.gap_after = np.full(n, np.inf)
+        if n > 1:
+            gaps = np.maximum(self.starts[1:] - self.ends[:-1], 0.0)
+            self.gap_before[1:] = gaps
+            self.gap_after[:-1] = gaps
+
+        self.sentence_end = np.array([w.rstrip().endswith(SENTENCE_END) for w in self.words], dtype=bool)
+        self.sentence_start = np.ones(n, dtype=bool)
+        self.sentence_start[1:] = self.sentence_end[:-1]
+
+        self.speaker_change_before = np.ones(n, dtype=bool)
+        self.speaker_change_before[1:] = [a != b for a, b in zip(speakers[:-1], speakers[1:])]
+        self.speaker_change_after = np.ones(n, dtype=bool)
+        self.speaker_change_after[:-1] = self.speaker_change_before[1:]
+
+        # Normalised pause lengths: anything above pause_cap counts as a full pause
+        self.pause_before = np.minimum(self.gap_before, pause_cap) / pause_cap
+        self.pause_after = np.minimum(self.gap_after, pause_cap) / pause_cap
+
+    def __len__(self):
+        return len(self.words)
+
+    @classmethod
+    def from_json(cls, json_path, **kwargs):
+        with open(json_path, "r", encoding="utf-8") as f:
+            return cls(json.load(f)["segments"], **kwargs)
+
+
+def _windows(times, lo_times, hi_times):
+    """
+    Padded (n_clips, width) matrix of word indices whose time lies in [lo, hi] for each
+    clip, plus the mask of which entries are real.
+    """
+    lo = np.searchsorted(times, lo_times, side="left")
+    hi = np.searchsorted(times, hi_times, side="right")
+    width = int(max((hi - lo).max(initial=0), 1))
+    idx = lo[:, None] + np.arange(width)[None, :]
+    valid = idx < hi[:, None]
+    return np.minimum(idx, max(len(times) - 1, 0)), valid
+
+
+def _reason(pause, sentence, speaker_change):
+    parts = []
+    if sentence:
+        parts.append("sentence boundary")
+    if speaker_change:
+        parts.append("speaker change")
+    if np.isfinite(pause) and pause > 0:
+        parts.append(f"{pause:.2f}s pause")
+    return ", ".join(parts) if parts else "nearest word boundary"
+
+
+class BoundaryOptimizer:
+    def __init__(self, timeline, tolerance=3.0, max_duration=60.0, min_duration=5.0, pad=0.15,
+                 pause_weight=1.0, sentence_weight=1.0, speaker_weight=0.5, distance_weight=0.5):
+        """
+        Args:
+            timeline (WordTimeline): Word features for the episode.
+            tolerance (float): How far (seconds) a boundary may move from the requested time.
+            max_duration (float): Longest allowed clip (YouTube Shorts: 60 s).
+            min_duration (float): Shortest allowed clip.
+            pad (float): Silence kept before the first and after the last word, capped at
+                         half of the surrounding pause so neighbouring words stay out.
+            *_weight (float): Scoring weights for pause length, sentence punctuation,
+                              speaker change and (as a penalty) distance from the request.
+        """
+        self.timeline = timeline
+        self.tolerance = tolerance
+        self.max_duration = max_duration
+        self.min_duration = min_duration
+        self.pad = pad
+        self.pause_weight = pause_weight
+        self.sentence_weight = sentence_weight
+        self.speaker_weight = speaker_weight
+        self.distance_weight = distance_weight
+
+    def _start_scores(self):
+        t = self.timeline
+        return (self.pause_weight * t.pause_before + self.sentence_weight * t.sentence_start
+                + self.speaker_weight * t.speaker_change_before)
+
+    def _end_scores(self):
+        t = self.timeline
+        return (self.pause_weight * t.pause_after + self.sentence_weight * t.sentence_end
+                + self.speaker_weight * t.speaker_change_after)
+
+    def optimize(self, clips):
+        """
+        Snaps a batch of requested clips to natural boundaries.
+
+        Args:
+            clips (list): Dicts with 'start'/'end' or 'start_time'/'end_time' (seconds).
+        Returns:
+            list: One dict per clip with the adjusted 'start'/'end', the
+                  'requested_start'/'requested_end', 'start_reason'/'end_reason' and the
+                  chosen word indices (None and reason 'unchanged' if no word fits). A
+                  request longer than max_duration (or shorter than min_duration) with no
+                  boundary near its end is cut to (or extended to) the nearest limit.
+        """
+        t = self.timeline
+        requested_start = np.array([float(c.get("start", c.get("start_time"))) for c in clips])
+        requested_end = np.array([float(c.get("end", c.get("end_time"))) for c in clips])
+        if len(t) == 0 or len(clips) == 0:
+            return [self._unchanged(s, e) for s, e in zip(requested_start, requested_end)]
+
+        # Best start word per clip within the tolerance window
+        idx, valid = _windows(t.starts, requested_start - self.tolerance, requested_start + self.tolerance)
+        score = self._start_scores()[idx] - self.distance_weight * np.abs(t.starts[idx] - requested_start[:, None]) / self.tolerance
+        score = np.where(valid, score, -np.inf)
+        start_choice = idx[np.arange(len(clips)), np.argmax(score, axis=1)]
+        has_start = valid.any(axis=1)
+        start_time = np.where(has_start, t.starts[start_choice], requested_start)
+
+        # Best end word per clip, constrained by the chosen start and duration limits
+        idx, valid = _windows(t.ends, requested_end - self.tolerance, requested_end + self.tolerance)
+        duration = t.ends[idx] - start_time[:, None]
+        valid &= (duration <= self.max_duration - 2 * self.pad) & (duration >= self.min_duration)
+        valid &= idx >= start_choice[:, None]
+        score = self._end_scores()[idx] - self.distance_weight * np.abs(t.ends[idx] - requested_end[:, None]) / self.tolerance
+        score = np.where(valid, score, -np.inf)
+        end_choice = idx[np.arange(len(clips)), np.argmax(score, axis=1)]
+        has_end = valid.any(axis=1)
+
+        # No boundary near the requested end: only requests that break the duration
+        # limits get one at the nearest limit, anything else is left unchanged
+        requested_duration = requested_end - start_time
+        longest = self.max_duration - 2 * self.pad
+        too_long = has_start & ~has_end & (requested_duration > longest)
+        too_short = has_start & ~has_end & (requested_duration < self.min_duration)
+        # (clips, end window as offsets from the start, offset the distance penalty counts from)
+        for fix, lo, hi, anchor in (
+            (too_long, longest - self.tolerance, longest, longest),
+            (too_short, self.min_duration, min(self.min_duration + self.tolerance, longest), self.min_duration)
+        ):
+            if not fix.any():
+                continue
+            base = start_time[fix]
+            idx, valid = _windows(t.ends, base + lo, base + hi)
+            valid &= idx >= start_choice[fix][:, None]
+            distance = np.abs(t.ends[idx] - (base + anchor)[:, None]) / self.tolerance
+            score = np.where(valid, self._end_scores()[idx] - self.distance_weight * distance, -np.inf)
+            end_choice[fix] = idx[np.arange(len(idx)), np.argmax(score, axis=1)]
+            has_end[fix] = valid.any(axis=1)
+
+        start_choice = np.where(has_start & has_end, start_choice, 0)
+        end_choice = np.where(has_start & has_end, end_choice, 0)
+        starts = np.round(np.maximum(t.starts[start_choice] - np.minimum(self.pad, t.gap_before[start_choice] / 2), 0.0), 3)
+        ends = np.round(t.ends[end_choice] + np.minimum(self.pad, t.gap_after[end_choice] / 2), 3)
+
+        reasons = {}
+        results = []
+        for k, (i, j, start, end, ok) in enumerate(zip(start_choice.tolist(), end_choice.tolist(), starts.tolist(),
+                                                        ends.tolist(), (has_start & has_end).tolist())):
+            if not ok:
+                results.append(self._unchanged(requested_start[k], requested_end[k]))
+                continue
+            if ("start", i) not in reasons:
+                reasons[("start", i)] = _reason(t.gap_before[i], t.sentence_start[i], t.speaker_change_before[i])
+            if ("end", j) not in reasons:
+                reasons[("end", j)] = _reason(t.gap_after[j], t.sentence_end[j], t.speaker_change_after[j])
+            results.append({
+                "start": start,
+                "end": end,
+                "requested_start": float(requested_start[k]),
+                "requested_end": float(requested_end[k]),
+                "start_word_index": i,
+                "end_word_index": j,
+                "start_reason": reasons[("start", i)],
+                "end_reason": reasons[("end", j)]
+            })
+        return results
+
+    @staticmethod
+    def _unchanged(start, end):
+        return {
+            "start": float(start), "end": float(end),
+            "requested_start": float(start), "requested_end": float(end),
+            "start_word_index": None, "end_word_index": None,
+            "start_reason": "unchanged", "end_reason": "unchanged"
+        }
+
+
+if __name__ == "__main__":
+    import time
+
+    timeline = WordTimeline.from_json(
+        "backend/WhisperXModel/output/merged_raw/full_audio_raw_transcription_with_absolute_timestamps.json"
+    )
+    optimizer = BoundaryOptimizer(timeline)
+
+    rng = np.random.default_rng(0)
+    starts = rng.uniform(0, timeline.ends[-1] - 70, size=5000)
+    requests = [{"start_time": s, "end_time": s + rng.uniform(20, 65)} for s in starts]
+
+    started = time.perf_counter()
+    adjusted = optimizer.optimize(requests)
+    elapsed = time.perf_counter() - started
+    print(f"✅ Adjusted {len(adjusted)} clips over {len(timeline)} words in {elapsed * 1000:.1f} ms")
+    for clip in adjusted[:3]:
+        words = " ".join(timeline.words[clip["start_word_index"]:clip["end_word_index"] + 1])
+        print(f"{clip['requested_start']:.2f}-{clip['requested_end']:.2f} -> {clip['start']:.2f}-{clip['end']:.2f} "
+              f"[{clip['start_reason']} | {clip['end_reason']}]: {words[:80]}...{words[-60:]}")
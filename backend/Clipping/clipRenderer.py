@@ -0,0 +1,236 @@
+import json
+import os
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def run_command(cmd):
+    """Default command runner: runs the command and returns the CompletedProcess."""
+    return subprocess.run(cmd, capture_output=True, text=True)
+
+
+def normalize_clips(clips):
+    """
+    Turns clip specs into {'name', 'start', 'end', ...} dicts sorted by start time.
+
+    Accepts either 'start'/'end' or the LLM's 'start_time'/'end_time' keys; clips
+    without a name are called clip_000, clip_001, ... in their original order. An
+    optional 'video_filter' (e.g. CropPlan.ffmpeg_filter) is applied when re-encoding.
+    """
+    normalized = []
+    for i, clip in enumerate(clips):
+        start = float(clip.get("start", clip.get("start_time")))
+        end = float(clip.get("end", clip.get("end_time")))
+        if end <= start:
+            raise ValueError(f"Clip {i} ends before it starts ({start} - {end})")
+        normalized.append(dict(clip, name=clip.get("name", f"clip_{i:03d}"), start=start, end=end))
+    # Rendering in source order keeps reads sequential and the page cache warm
+    return sorted(normalized, key=lambda c: c["start"])
+
+
+def probe_keyframes(source_path, runner=run_command):
+    """Returns the sorted presentation times (seconds) of the video keyframes in source_path."""
+    cmd = [
+        "ffprobe", "-v", "error", "-select_streams", "v:0", "-skip_frame", "nokey",
+        "-show_entries", "frame=pts_time", "-of", "csv=p=0", source_path
+    ]
+    result = runner(cmd)
+    if result.returncode != 0:
+        return []
+    times = []
+    for line in result.stdout.splitlines():
+        line = line.strip().rstrip(",")
+        if line:
+            times.append(float(line))
+    return sorted(times)
+
+
+def snap_to_keyframe(start, keyframes):
+    """Latest keyframe at or before start (start itself if there are none)."""
+    previous = [k for k in keyframes if k <= start + 1e-6]
+    return previous[-1] if previous else start
+
+
+def clip_command(source_path, clip, output_path, threads=1, copy=False, encode_args=None):
+    """
+    ffmpeg command for one clip. -ss is placed before -i so ffmpeg seeks the demuxer
+    straight to the keyframe before the cut instead of decoding from the start of the
+    file; when re-encoding, it then drops frames up to the exact start.
+    """
+    cmd = [
+        "ffmpeg", "-y", "-v", "error",
+        "-ss", f"{clip['start']:.3f}", "-i", source_path,
+        "-t", f"{clip['end'] - clip['start']:.3f}",
+        "-threads", str(threads)
+    ]
+    if copy:
+        cmd += ["-c", "copy", "-avoid_negative_ts", "make_zero"]
+    else:
+        if clip.get("video_filter"):
+            cmd += ["-vf", clip["video_filter"]]
+        cmd += encode_args or ["-c:v", "libx264", "-preset", "veryfast", "-c:a", "aac"]
+    return cmd + [output_path]
+
+
+def multi_output_command(source_path, clips, output_paths, threads=1, copy=False, encode_args=None):
+    """
+    Single ffmpeg invocation rendering every clip: the source is opened once per clip
+    with its own input-side seek, and each input is mapped to its own output.
+    -threads is an output option, so each output gets its own threads value.
+    """
+    cmd = ["ffmpeg", "-y", "-v", "error"]
+    for clip in clips:
+        cmd += ["-ss", f"{clip['start']:.3f}", "-t", f"{clip['end'] - clip['start']:.3f}", "-i", source_path]
+    for i, (clip, output_path) in enumerate(zip(clips, output_paths)):
+        cmd += ["-map", f"{i}:v?", "-map", f"{i}:a?", "-threads", str(threads)]
+        if copy:
+            cmd += ["-c", "copy", "-avoid_negative_ts", "make_zero"]
+        else:
+            if clip.get("video_filter"):
+                cmd += ["-vf", clip["video_filter"]]
+            cmd += encode_args or ["-c:v", "libx264", "-preset", "veryfast", "-c:a", "aac"]
+        cmd.append(output_path)
+    return cmd
+
+
+class ClipRenderer:
+    def __init__(self, source_path, output_dir, cpu_budget=None, threads_per_clip=2, copy=False,
+                 encode_args=None, extension=".mp4", runner=run_command):
+        """
+        Args:
+            source_path (str): Episode video/audio to cut from.
+            output_dir (str): Where clips and manifest.json are written.
+            cpu_budget (int): Total ffmpeg threads allowed at once (default: all cores).
+            threads_per_clip (int): Threads given to each ffmpeg process.
+            copy (bool): Stream-copy instead of re-encoding. Much faster, but cuts can
+                         only start on a keyframe, so starts are snapped back to one.
+            encode_args (list): ffmpeg codec arguments used when re-encoding.
+            extension (str): Output file extension.
+            runner (callable): Runs a command list and returns an object with
+                               returncode/stdout/stderr; swap in a stand-in when
+                               ffmpeg is not installed.
+        """
+        self.source_path = source_path
+        self.output_dir = output_dir
+        self.cpu_budget = cpu_budget or os.cpu_count() or 1
+        self.threads_per_clip = max(1, min(threads_per_clip, self.cpu_budget))
+        self.copy = copy
+        self.encode_args = encode_args
+        self.extension = extension
+        self.runner = runner
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    @property
+    def max_workers(self):
+        return max(1, self.cpu_budget // self.threads_per_clip)
+
+    def _output_path(self, clip):
+        return os.path.join(self.output_dir, f"{clip['name']}{self.extension}")
+
+    def _render_one(self, clip):
+        output_path = self._output_path(clip)
+        cmd = clip_command(self.source_path, clip, output_path, self.threads_per_clip, self.copy, self.encode_args)
+        started = time.perf_counter()
+        result = self.runner(cmd)
+        return {
+            "name": clip["name"],
+            "start": clip["start"],
+            "end": clip["end"],
+            "duration": clip["end"] - clip["start"],
+            "output": output_path,
+            "status": "ok" if result.returncode == 0 else "failed",
+            "error": (result.stderr or "").strip()[-500:] if result.returncode != 0 else None,
+            "render_seconds": time.perf_counter() - started,
+            "command": cmd
+        }
+
+    def render(self, clips, mode="parallel"):
+        """
+        Renders every clip and writes output_dir/manifest.json.
+
+        Args:
+            clips (list): Clip specs (see normalize_clips); extra keys such as
+                          'hook_line' are carried into the manifest.
+            mode (str): "parallel" runs one ffmpeg per clip, up to max_workers at a
+                        time; "single" renders all clips from one ffmpeg process.
+        Returns:
+            dict: The manifest ('clips', 'mode', 'workers', 'wall_seconds', ...).
+        """
+        clips = normalize_clips(clips)
+        if self.copy:
+            keyframes = probe_keyframes(self.source_path, self.runner)
+            for clip in clips:
+                clip["requested_start"] = clip["start"]
+                clip["start"] = snap_to_keyframe(clip["start"], keyframes)
+
+        started = time.perf_counter()
+        if mode == "parallel":
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                entries = list(pool.map(self._render_one, clips))
+        elif mode == "single":
+            entries = self._render_single(clips)
+        else:
+            raise ValueError(f"Unknown render mode '{mode}', expected 'parallel' or 'single'")
+        wall_seconds = time.perf_counter() - started
+
+        for clip, entry in zip(clips, entries):
+            extras = {k: v for k, v in clip.items() if k not in entry and k not in ("start_time", "end_time")}
+            entry.update(extras)
+
+        manifest = {
+            "source": self.source_path,
+            "mode": mode,
+            "workers": self.max_workers if mode == "parallel" else 1,
+            "threads_per_clip": self.threads_per_clip,
+            "copy": self.copy,
+            "wall_seconds": wall_seconds,
+            "clip_seconds": sum(e["duration"] for e in entries),
+            "clips": entries
+        }
+        manifest_path = os.path.join(self.output_dir, "manifest.json")
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+        failed = sum(e["status"] != "ok" for e in entries)
+        print(f"✅ Rendered {len(entries) - failed}/{len(entries)} clips in {wall_seconds:.2f}s ({mode}), "
+              f"manifest saved to {manifest_path}")
+        return manifest
+
+    def _render_single(self, clips):
+        output_paths = [self._output_path(clip) for clip in clips]
+        # All outputs encode at once, so the budget is split between them
+        threads = max(1, self.cpu_budget // max(len(clips), 1))
+        cmd = multi_output_command(
+            self.source_path, clips, output_paths, threads, self.copy, self.encode_args
+        )
+        started = time.perf_counter()
+        result = self.runner(cmd)
+        elapsed = time.perf_counter() - started
+        ok = result.returncode == 0
+        return [
+            {
+                "name": clip["name"],
+                "start": clip["start"],
+                "end": clip["end"],
+                "duration": clip["end"] - clip["start"],
+                "output": output_path,
+                "status": "ok" if ok else "failed",
+                "error": None if ok else (result.stderr or "").strip()[-500:],
+                "render_seconds": elapsed,
+                "command": cmd
+            }
+            for clip, output_path in zip(clips, output_paths)
+        ]
+
+
+if __name__ == "__main__":
+    # Renders the highlight picked by Preprocessing/responseFilter.py
+    with open("output.json", "r", encoding="utf-8") as f:
+        highlight = json.load(f)
+
+    renderer = ClipRenderer(
+        source_path="backend/WhisperXModel/video/video.mp4",
+        output_dir="backend/Clipping/output"
+    )
+    renderer.render([highlight])
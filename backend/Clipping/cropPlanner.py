@@ -0,0 +1,361 @@
+import subprocess
+
+import numpy as np
+
+
+def speaker_timeline(segments):
+    """
+    Flattens WhisperX segments into a speaker timeline, using per-word speaker
+    labels where present (finer than segment level).
+
+    Returns:
+        tuple: (starts, ends, codes, speakers) where starts/ends/codes are arrays sorted
+               by start time, codes index into the speakers list.
+    """
+    spans = []
+    for seg in segments:
+        words = [w for w in seg.get("words", []) if "speaker" in w and "start" in w and "end" in w]
+        if words:
+            spans.extend((w["start"], w["end"], w["speaker"]) for w in words)
+        elif "speaker" in seg:
+            spans.append((seg["start"], seg["end"], seg["speaker"]))
+    spans.sort(key=lambda span: span[0])
+
+    speakers = sorted({span[2] for span in spans})
+    codes = {s: i for i, s in enumerate(speakers)}
+    starts = np.array([span[0] for span in spans], dtype=np.float64)
+    ends = np.array([span[1] for span in spans], dtype=np.float64)
+    return starts, ends, np.array([codes[span[2]] for span in spans], dtype=np.int64), speakers
+
+
+def active_speaker_at(times, starts, ends, codes, gap_fill=0.0):
+    """
+    Speaker code at each time (-1 when nobody is speaking). Times up to gap_fill seconds
+    after a span's end still count as that span, which bridges pauses between words.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    if len(starts) == 0:
+        return np.full(len(times), -1, dtype=np.int64)
+    idx = np.searchsorted(starts, times, side="right") - 1
+    valid = idx >= 0
+    inside = np.zeros(len(times), dtype=bool)
+    inside[valid] = times[valid] < ends[idx[valid]] + gap_fill
+    return np.where(inside, codes[np.maximum(idx, 0)], -1)
+
+
+def forward_fill(codes, default=-1):
+    """Replaces -1 entries with the last non-negative value before them (default at the start)."""
+    positions = np.where(codes >= 0, np.arange(len(codes)), -1)
+    positions = np.maximum.accumulate(positions) if len(positions) else positions
+    return np.where(positions >= 0, codes[np.maximum(positions, 0)], default)
+
+
+def apply_hysteresis(codes, min_hold_frames):
+    """Suppresses switches to a value that does not hold for at least min_hold_frames."""
+    codes = codes.copy()
+    if len(codes) == 0:
+        return codes
+    change = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+    starts = np.concatenate(([0], change))
+    ends = np.concatenate((change, [len(codes)]))
+    previous = codes[0]
+    for start, end in zip(starts, ends):
+        if end - start < min_hold_frames and start > 0:
+            codes[start:end] = previous
+        else:
+            previous = codes[start]
+    return codes
+
+
+def cluster_centers_1d(values, k, iterations=20):
+    """Small 1-D k-means, initialised at quantiles; returns sorted centers."""
+    values = np.asarray(values, dtype=np.float64)
+    centers = np.quantile(values, (np.arange(k) + 0.5) / k)
+    for _ in range(iterations):
+        labels = np.argmin(np.abs(values[:, None] - centers[None, :]), axis=1)
+        updated = np.array([values[labels == j].mean() if np.any(labels == j) else centers[j] for j in range(k)])
+        if np.allclose(updated, centers):
+            break
+        centers = updated
+    return np.sort(centers)
+
+
+class OpenCvFaceDetector:
+    """Haar-cascade frontal face detector (needs opencv-python). Returns (x, y, w, h) boxes."""
+
+    def __init__(self, scale_factor=1.1, min_neighbors=5):
+        import cv2
+
+        self.cv2 = cv2
+        self.cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+
+    def __call__(self, frame):
+        boxes = self.cascade.detectMultiScale(frame, self.scale_factor, self.min_neighbors)
+        return [tuple(int(v) for v in box) for box in boxes]
+
+
+class FfmpegFrameSource:
+    """Decodes grayscale frames at given timestamps, downscaled to analysis_width, via ffmpeg."""
+
+    def __init__(self, video_path, frame_size, analysis_width=320):
+        self.video_path = video_path
+        width, height = frame_size
+        self.scale = analysis_width / width
+        self.size = (analysis_width, int(round(height * self.scale / 2)) * 2)
+
+    def __call__(self, times):
+        width, height = self.size
+        frames = []
+        for t in times:
+            cmd = [
+                "ffmpeg", "-v", "error", "-ss", f"{t:.3f}", "-i", self.video_path, "-frames:v", "1",
+                "-vf", f"scale={width}:{height}", "-f", "rawvideo", "-pix_fmt", "gray", "-"
+            ]
+            data = subprocess.run(cmd, capture_output=True).stdout
+            if len(data) < width * height:
+                frames.append(None)
+            else:
+                frames.append(np.frombuffer(data[:width * height], dtype=np.uint8).reshape(height, width))
+        return frames
+
+
+class CropPlan:
+    """Per-frame crop window for a clip, with times relative to the clip start."""
+
+    def __init__(self, times, x, crop_width, crop_height, speakers, track_of_speaker):
+        self.times = times
+        self.x = x
+        self.crop_width = crop_width
+        self.crop_height = crop_height
+        self.speakers = speakers
+        self.track_of_speaker = track_of_speaker
+
+    def keypoints(self):
+        """(time, x) pairs where the crop moves, starting with the initial position."""
+        if len(self.x) == 0:
+            return []
+        idx = np.concatenate(([0], np.flatnonzero(np.diff(self.x)) + 1))
+        return [(float(self.times[i]), int(self.x[i])) for i in idx]
+
+    def write_sendcmd(self, path):
+        """Writes an ffmpeg sendcmd file moving the crop filter's x at each keypoint."""
+        with open(path, "w", encoding="utf-8") as f:
+            for t, x in self.keypoints():
+                f.write(f"{t:.3f} crop x {x};\n")
+        return path
+
+    def ffmpeg_filter(self, sendcmd_path):
+        """Video filter for ClipRenderer ('video_filter' clip key) applying this plan."""
+        first_x = int(self.x[0]) if len(self.x) else 0
+        return f"sendcmd=f='{sendcmd_path}',crop={self.crop_width}:{self.crop_height}:{first_x}:0"
+
+
+class CropPlanner:
+    def __init__(self, frame_size, detector, frame_source, sample_fps=0.5, output_fps=25.0,
+                 min_hold=1.0, pan_seconds=0.0, gap_fill=0.5, motion_dt=0.2, aspect=9 / 16):
+        """
+        Args:
+            frame_size (tuple): Source (width, height) in pixels.
+            detector (callable): frame -> list of (x, y, w, h) face/person boxes in the
+                                 frame's own pixel coordinates.
+            frame_source (callable): list of times -> list of frames (None if unreadable),
+                                     e.g. FfmpegFrameSource.
+            sample_fps (float): Detection samples per second. Lower is faster; tracks are
+                                interpolated between samples.
+            output_fps (float): Frame rate of the crop trajectory.
+            min_hold (float): A speaker must talk this many seconds before the crop switches.
+            pan_seconds (float): 0 for hard cuts between speakers, otherwise the width of
+                                 the moving-average window that turns cuts into pans.
+            gap_fill (float): Pauses shorter than this keep the previous speaker.
+            motion_dt (float): Offset of the second frame used to measure mouth motion.
+            aspect (float): Output width / height (9:16 by default).
+        """
+        self.frame_width, self.frame_height = frame_size
+        self.detector = detector
+        self.frame_source = frame_source
+        self.sample_fps = sample_fps
+        self.output_fps = output_fps
+        self.min_hold = min_hold
+        self.pan_seconds = pan_seconds
+        self.gap_fill = gap_fill
+        self.motion_dt = motion_dt
+        self.crop_height = self.frame_height
+        self.crop_width = min(self.frame_width, int(round(self.frame_height * aspect / 2)) * 2)
+
+    def detect_tracks(self, start, end):
+        """
+        Samples frames in [start, end), detects boxes and groups them into left-to-right
+        tracks (one per on-screen person).
+
+        Returns:
+            tuple: (sample_times, centers, activity) where centers and activity are
+                   (n_tracks, n_samples) arrays in source pixels; activity is the mean
+                   frame difference in the lower half of each box (mouth motion).
+        """
+        sample_times = np.arange(start, end, 1.0 / self.sample_fps)
+        frames = self.frame_source(list(sample_times))
+        next_frames = self.frame_source(list(sample_times + self.motion_dt))
+
+        detections = []
+        scale = 1.0
+        for frame in frames:
+            if frame is None:
+                detections.append([])
+                continue
+            scale = self.frame_width / frame.shape[1]
+            detections.append(self.detector(frame))
+
+        per_sample = [len(boxes) for boxes in detections]
+        if not any(per_sample):
+            return sample_times, np.empty((0, len(sample_times))), np.empty((0, len(sample_times)))
+        n_tracks = int(np.median([n for n in per_sample if n]))
+        all_centers = [x + w / 2 for boxes in detections for (x, y, w, h) in boxes]
+        track_centers = cluster_centers_1d(all_centers, max(n_tracks, 1))
+
+        centers = np.full((len(track_centers), len(sample_times)), np.nan)
+        activity = np.full((len(track_centers), len(sample_times)), np.nan)
+        for i, boxes in enumerate(detections):
+            for (x, y, w, h) in boxes:
+                track = int(np.argmin(np.abs(track_centers - (x + w / 2))))
+                centers[track, i] = (x + w / 2) * scale
+                if next_frames[i] is not None:
+                    mouth = (slice(y + h // 2, y + h), slice(x, x + w))
+                    diff = np.abs(next_frames[i][mouth].astype(np.float32) - frames[i][mouth].astype(np.float32))
+                    activity[track, i] = diff.mean() if diff.size else np.nan
+
+        for track in range(len(track_centers)):
+            known = ~np.isnan(centers[track])
+            if known.any():
+                centers[track] = np.interp(sample_times, sample_times[known], centers[track][known])
+            else:
+                centers[track] = track_centers[track] * scale
+        return sample_times, centers, activity
+
+    def assign_speakers(self, speaking, activity):
+        """
+        Maps speaker codes to tracks by how much each track's mouth motion rises while
+        that speaker is talking, weighted by the speaker's share of the talking time, so
+        with more speakers than tracks the ones heard most get a track.
+
+        Args:
+            speaking (np.ndarray): (n_samples,) active speaker code per sample (-1 = none).
+            activity (np.ndarray): (n_tracks, n_samples) motion per track.
+        Returns:
+            dict: speaker code -> track index.
+        """
+        codes = sorted(int(c) for c in np.unique(speaking) if c >= 0)
+        n_tracks = activity.shape[0]
+        if not codes or n_tracks == 0:
+            return {}
+        filled = np.where(np.isnan(activity), np.nanmean(activity) if np.any(~np.isnan(activity)) else 0.0, activity)
+        score = np.zeros((len(codes), n_tracks))
+        for row, code in enumerate(codes):
+            on = speaking == code
+            off = ~on
+            score[row] = filled[:, on].mean(axis=1) - (filled[:, off].mean(axis=1) if off.any() else 0.0)
+
+        share = np.array([np.mean(speaking == code) for code in codes])
+        score *= share[:, None]
+        if n_tracks <= 10:
+            return self._best_assignment(codes, score)
+
+        assignment, used = {}, set()
+        for row, track in sorted(np.ndindex(score.shape), key=lambda rc: -score[rc]):
+            if codes[row] not in assignment and track not in used:
+                assignment[codes[row]] = track
+                used.add(track)
+        return assignment
+
+    @staticmethod
+    def _best_assignment(codes, score):
+        """
+        Exact speaker -> track matching maximising the total score over every choice of
+        which speakers get a track (DP over the set of used tracks). Scores are shifted
+        to be positive so as many speakers as possible are assigned.
+        """
+        n_tracks = score.shape[1]
+        gain = score - score.min() + 1.0
+        best = {0: (0.0, [])}  # used-track mask -> (total, track per speaker so far, -1 = none)
+        for row in range(len(codes)):
+            step = {}
+            for mask, (total, picks) in best.items():
+                options = [(total, mask, -1)]
+                options += [(total + gain[row, t], mask | (1 << t), t) for t in range(n_tracks) if not mask & (1 << t)]
+                for new_total, new_mask, track in options:
+                    if new_mask not in step or new_total > step[new_mask][0]:
+                        step[new_mask] = (new_total, picks + [track])
+            best = step
+        _, picks = max(best.values(), key=lambda item: item[0])
+        return {code: track for code, track in zip(codes, picks) if track >= 0}
+
+    def plan(self, segments, start, end, speaker_regions=None):
+        """
+        Crop trajectory for the clip [start, end).
+
+        Args:
+            segments (list): WhisperX segments (word-level 'speaker' labels are used if present).
+            start, end (float): Clip bounds in episode seconds.
+            speaker_regions (dict, optional): speaker label -> x center in source pixels,
+                                              to skip detection when the layout is known.
+        Returns:
+            CropPlan: Trajectory with times relative to start.
+        """
+        starts, ends, codes, speakers = speaker_timeline(segments)
+        times = start + np.arange(int(np.ceil((end - start) * self.output_fps))) / self.output_fps
+
+        if speaker_regions is not None:
+            track_centers = np.array([speaker_regions.get(s, self.frame_width / 2) for s in speakers], dtype=np.float64)
+            centers_over_time = np.repeat(track_centers[:, None], len(times), axis=1)
+            track_of_speaker = {code: code for code in range(len(speakers))}
+        else:
+            sample_times, centers, activity = self.detect_tracks(start, end)
+            speaking = active_speaker_at(sample_times, starts, ends, codes, self.gap_fill)
+            track_of_speaker = self.assign_speakers(speaking, activity)
+            centers_over_time = np.array([np.interp(times, sample_times, c) for c in centers]).reshape(-1, len(times))
+
+        active = forward_fill(active_speaker_at(times, starts, ends, codes, self.gap_fill))
+        active = apply_hysteresis(active, int(round(self.min_hold * self.output_fps)))
+
+        lookup = np.full(len(speakers) + 1, -1, dtype=np.int64)
+        for code, track in track_of_speaker.items():
+            lookup[code] = track
+        tracks = lookup[active]  # active == -1 picks the trailing -1 entry
+        center = np.full(len(times), self.frame_width / 2)
+        has_track = tracks >= 0
+        if has_track.any():
+            center[has_track] = centers_over_time[tracks[has_track], np.flatnonzero(has_track)]
+
+        window = int(round(self.pan_seconds * self.output_fps))
+        if window > 1:
+            padded = np.pad(center, (window // 2, window - 1 - window // 2), mode="edge")
+            center = np.convolve(padded, np.ones(window) / window, mode="valid")
+
+        x = np.clip(np.round(center - self.crop_width / 2), 0, self.frame_width - self.crop_width).astype(np.int64)
+        x -= x % 2  # keep chroma-aligned for yuv420p
+        named = {speakers[code]: int(track) for code, track in track_of_speaker.items()}
+        return CropPlan(times - start, x, self.crop_width, self.crop_height, speakers, named)
+
+
+if __name__ == "__main__":
+    import json
+    import os
+
+    with open("output.json", "r", encoding="utf-8") as f:
+        highlight = json.load(f)
+    with open("backend/WhisperXModel/output/merged_raw/full_audio_raw_transcription_with_absolute_timestamps.json",
+              "r", encoding="utf-8") as f:
+        episode_segments = json.load(f)["segments"]
+
+    video_path = "backend/WhisperXModel/video/video.mp4"
+    planner = CropPlanner(
+        frame_size=(1920, 1080),
+        detector=OpenCvFaceDetector(),
+        frame_source=FfmpegFrameSource(video_path, (1920, 1080))
+    )
+    crop_plan = planner.plan(episode_segments, highlight["start_time"], highlight["end_time"])
+    os.makedirs("backend/Clipping/output", exist_ok=True)
+    schedule = crop_plan.write_sendcmd("backend/Clipping/output/crop.cmd")
+    print(f"✅ {len(crop_plan.keypoints())} crop keypoints saved to {schedule}")
+    print(f"Video filter: {crop_plan.ffmpeg_filter(schedule)}")
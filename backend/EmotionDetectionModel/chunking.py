@@ -2,39 +2,60 @@ import json
 import os
 import subprocess
 
-# === Configs ===
-json_path = "backend/WhisperXModel/output/raw/output001/output001.json"          # Path to your JSON file
-source_audio = "backend/WhisperXModel/audio/chunks/output001.wav"       # Your original audio file
-output_dir = "backend/EmotionDetectionModel/audio/chunks"            # Directory to save audio clips
-num_chunks = 10                                                    # Total combined chunks
-segments_per_chunk = 4                                            # Number of segments combined
-
-# Ensure output folder exists
-os.makedirs(output_dir, exist_ok=True)
-
-# Load JSON
-with open(json_path, "r") as f:
-    data = json.load(f)
-
-segments = data["segments"][:num_chunks * segments_per_chunk]  # 40 segments total
-
-# Create combined chunks of 4 segments each
-for i in range(0, len(segments), segments_per_chunk):
-    start = segments[i]["start"]
-    end = segments[i + segments_per_chunk - 1]["end"]
-    duration = end - start
-    output_path = os.path.join(output_dir, f"chunk_{i // segments_per_chunk:02d}.wav")
-
-    command = [
-        "ffmpeg",
-        "-y",
-        "-i", source_audio,
-        "-ss", str(start),
-        "-t", str(duration),
-        "-acodec", "copy",  # Change to "pcm_s16le" if needed for compatibility
-        output_path
-    ]
-
-    subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
-
-print(f"✅ Extracted {num_chunks} combined chunks of {segments_per_chunk} segments each into '{output_dir}'.")
+
+def extract_combined_chunks(json_path, source_audio, output_dir, num_chunks=10, segments_per_chunk=4):
+    """
+    Cuts the first num_chunks groups of segments_per_chunk consecutive segments
+    out of source_audio as separate .wav files.
+
+    Args:
+        json_path (str): Path to the raw WhisperX JSON file.
+        source_audio (str): The original audio file.
+        output_dir (str): Directory to save audio clips.
+        num_chunks (int): Total combined chunks.
+        segments_per_chunk (int): Number of segments combined.
+    Returns:
+        list: Paths of the chunk files that were written.
+    """
+    # Ensure output folder exists
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Load JSON
+    with open(json_path, "r") as f:
+        data = json.load(f)
+
+    segments = data["segments"][:num_chunks * segments_per_chunk]
+
+    output_paths = []
+
+    # Create combined chunks of segments_per_chunk segments each
+    for i in range(0, len(segments), segments_per_chunk):
+        group = segments[i:i + segments_per_chunk]
+        start = group[0]["start"]
+        end = group[-1]["end"]
+        duration = end - start
+        output_path = os.path.join(output_dir, f"chunk_{i // segments_per_chunk:02d}.wav")
+
+        command = [
+            "ffmpeg",
+            "-y",
+            "-ss", str(start),  # seek before -i so ffmpeg jumps there instead of decoding from 0
+            "-i", source_audio,
+            "-t", str(duration),
+            "-acodec", "copy",  # Change to "pcm_s16le" if needed for compatibility
+            output_path
+        ]
+
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+        output_paths.append(output_path)
+
+    print(f"✅ Extracted {len(output_paths)} combined chunks of {segments_per_chunk} segments each into '{output_dir}'.")
+    return output_paths
+
+
+if __name__ == "__main__":
+    extract_combined_chunks(
+        json_path="backend/WhisperXModel/output/raw/output001/output001.json",          # Path to your JSON file
+        source_audio="backend/WhisperXModel/audio/chunks/output001.wav",       # Your original audio file
+        output_dir="backend/EmotionDetectionModel/audio/chunks"            # Directory to save audio clips
+    )
@@ -1,43 +1,163 @@
+import hashlib
 import json
 import os
 import subprocess
-from transformers import pipeline
+import textwrap
+
+import numpy as np
+
+EMOTION_MODEL = "firdhokk/speech-emotion-recognition-with-openai-whisper-large-v3"
+
+# Whisper encoders see at most 30 seconds of audio; anything longer is truncated
+WHISPER_WINDOW_SECONDS = 30.0
+SAMPLE_RATE = 16000
+
+
+def window_offsets(duration, window_seconds, hop_seconds):
+    """
+    Start offsets (relative to the group start) of the overlapping windows that
+    cover a group of the given duration. The last window is aligned to the end
+    of the group so no audio is dropped.
+    """
+    if duration <= window_seconds:
+        return [0.0]
+    offsets = np.arange(0.0, duration - window_seconds, hop_seconds)
+    return [float(o) for o in offsets] + [float(duration - window_seconds)]
+
+
+def aggregate_window_scores(window_scores, window_lengths):
+    """
+    Combines per-window label distributions into one distribution for the group,
+    weighting each window by the seconds of audio it covers.
+
+    Args:
+        window_scores (list): One {label: score} dict per window.
+        window_lengths (list): Duration in seconds of each window.
+    Returns:
+        dict: {label: score} with scores summing to 1 (empty if there are no windows).
+    """
+    if not window_scores:
+        return {}
+    labels = sorted({label for scores in window_scores for label in scores})
+    matrix = np.array([[scores.get(label, 0.0) for label in labels] for scores in window_scores])
+    weights = np.asarray(window_lengths, dtype=float)
+    combined = weights @ matrix
+    total = combined.sum()
+    if total > 0:
+        combined = combined / total
+    return {label: float(score) for label, score in zip(labels, combined)}
+
 
 class EmotionProcessor:
-    def __init__(self, json_path, audio_path, output_dir, max_segments=4):
+    def __init__(self, json_path, audio_path, output_dir, max_segments=None, model_name=EMOTION_MODEL,
+                 max_group_duration=60.0, window_seconds=WHISPER_WINDOW_SECONDS, window_hop=15.0, batch_size=8,
+                 speech_mask=None, backend="fp32", results_path=None, checkpoint_every=10):
         self.json_path = json_path
         self.audio_path = audio_path
         self.output_dir = output_dir
         self.max_segments = max_segments
-        self.merged_results = []
+        self.max_group_duration = max_group_duration
+        self.window_seconds = window_seconds
+        self.window_hop = window_hop
+        self.batch_size = batch_size
+        self.speech_mask = speech_mask  # optional Preprocessing.voiceActivity.SpeechMask
+        self.seconds_total = 0.0
+        self.seconds_skipped = 0.0
         self.chunk_id = 0
-        self.pipe = pipeline("audio-classification", model="firdhokk/speech-emotion-recognition-with-openai-whisper-large-v3")
+        self.segment_cursor = 0  # index of the first segment not yet classified
+        # Classified groups are appended here as JSON Lines; the checkpoint records how far
+        # the file is valid so a restarted run picks up where the last one stopped
+        self.results_path = results_path or os.path.join(output_dir, "emotion_results.jsonl")
+        self.checkpoint_path = self.results_path + ".checkpoint.json"
+        self.checkpoint_every = checkpoint_every
+        self.model_name = model_name
+        self.backend = backend  # "fp32", "int8" or "onnx", see Optimization.quantizedInference
+        self._pipe = None
         os.makedirs(self.output_dir, exist_ok=True)
 
+    @property
+    def pipe(self):
+        # The classifier is several GB, so it is only loaded on the first detection
+        if self._pipe is None:
+            if self.backend == "fp32":
+                from transformers import pipeline
+                self._pipe = pipeline("audio-classification", model=self.model_name)
+            else:
+                from backend.Optimization.quantizedInference import load_audio_classifier
+                self._pipe = load_audio_classifier(self.model_name, self.backend)
+        return self._pipe
+
     def load_segments(self):
         with open(self.json_path, "r") as f:
             self.segments = json.load(f)["segments"]
 
-    def create_audio_chunk(self, start, duration, chunk_filename):
-        chunk_path = os.path.join(self.output_dir, chunk_filename)
+    def load_audio(self, start, duration):
+        """Decodes [start, start + duration) of the source audio to 16 kHz mono float32, or None on failure."""
         cmd = [
-            "ffmpeg", "-y", "-i", self.audio_path,
-            "-ss", str(start), "-t", str(duration),
-            "-acodec", "copy", chunk_path
+            "ffmpeg", "-v", "error", "-ss", str(start), "-t", str(duration),
+            "-i", self.audio_path,
+            "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-"
         ]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        return chunk_path if result.returncode == 0 else None
+        result = subprocess.run(cmd, capture_output=True)
+        if result.returncode != 0:
+            return None
+        return np.frombuffer(result.stdout, dtype=np.int16).astype(np.float32) / 32768.0
 
-    def detect_emotion(self, chunk_path):
+    def detect_emotion_windows(self, audio, group_start):
+        """
+        Classifies a group's audio as overlapping fixed-length windows in batches.
+
+        Args:
+            audio (np.ndarray): 16 kHz mono samples of the whole group.
+            group_start (float): Absolute start time of the group in seconds.
+        Returns:
+            tuple: (distribution, timeline) where distribution is the duration-weighted
+                   {label: score} for the group and timeline holds one entry per window
+                   with absolute 'start'/'end', the top 'label'/'score' and all 'scores'.
+        """
+        duration = len(audio) / SAMPLE_RATE
+        offsets = window_offsets(duration, self.window_seconds, self.window_hop)
+        window_len = int(self.window_seconds * SAMPLE_RATE)
+        windows = []
+        for offset in offsets:
+            first = int(offset * SAMPLE_RATE)
+            windows.append(audio[first:first + window_len])
+
+        inputs = [{"raw": w, "sampling_rate": SAMPLE_RATE} for w in windows]
+        top_k = self.pipe.model.config.num_labels
         try:
-            result = self.pipe(chunk_path)[0]
-            return result['label'], result['score']
+            predictions = self.pipe(inputs, top_k=top_k, batch_size=self.batch_size)
         except Exception as e:
-            print(f"Emotion detection failed on {chunk_path}: {e}")
-            return "error", 0.0
+            print(f"Emotion detection failed for group at {group_start:.3f}s: {e}")
+            return {}, []
+
+        timeline = []
+        window_scores = []
+        window_lengths = []
+        for offset, window, prediction in zip(offsets, windows, predictions):
+            scores = {p["label"]: float(p["score"]) for p in prediction}
+            best = max(prediction, key=lambda p: p["score"])
+            length = len(window) / SAMPLE_RATE
+            window_scores.append(scores)
+            window_lengths.append(length)
+            timeline.append({
+                "start": group_start + offset,
+                "end": group_start + offset + length,
+                "label": best["label"],
+                "score": float(best["score"]),
+                "scores": scores
+            })
+
+        return aggregate_window_scores(window_scores, window_lengths), timeline
 
-    def process(self):
-        i = 0
+    def build_groups(self, start_index=0):
+        """
+        Yields (group, next_index) for runs of consecutive same-speaker segments whose
+        span fits in max_group_duration (and max_segments, if set), starting at
+        start_index. A single segment longer than the budget forms its own group and
+        is covered by several windows.
+        """
+        i = start_index
         while i < len(self.segments):
             if "speaker" not in self.segments[i]:
                 i += 1
@@ -47,66 +167,238 @@ class EmotionProcessor:
             speaker = self.segments[i]["speaker"]
             i += 1
 
-            while i < len(self.segments) and len(group) < self.max_segments:
-                if "speaker" in self.segments[i] and self.segments[i]["speaker"] == speaker:
-                    group.append(self.segments[i])
-                    i += 1
-                else:
+            while i < len(self.segments):
+                seg = self.segments[i]
+                if seg.get("speaker") != speaker:
                     break
+                if seg["end"] - group[0]["start"] > self.max_group_duration:
+                    break
+                if self.max_segments is not None and len(group) >= self.max_segments:
+                    break
+                group.append(seg)
+                i += 1
 
-            start = group[0]["start"]
-            end = group[-1]["end"]
-            duration = end - start
-            chunk_filename = f"chunk_{self.chunk_id:03d}.wav"
+            yield group, i
 
-            chunk_path = self.create_audio_chunk(start, duration, chunk_filename)
-            if not chunk_path:
-                print(f"FFmpeg failed for chunk {chunk_filename}")
-                continue
+    def input_fingerprint(self, upto):
+        """
+        Identifies what a checkpoint was computed from: the segments file, a hash of the
+        first `upto` segments (the ones already classified, so live mode can keep
+        appending) and every parameter that changes the groups or their labels.
+        """
+        digest = hashlib.sha1()
+        for seg in self.segments[:upto]:
+            digest.update(json.dumps([seg["start"], seg["end"], seg.get("speaker"), seg.get("text"),
+                                      seg.get("in_silence")]).encode("utf-8"))
+        mask_sha1 = None
+        if self.speech_mask is not None:
+            mask_sha1 = hashlib.sha1(np.packbits(self.speech_mask.mask).tobytes()
+                                     + str(len(self.speech_mask.mask)).encode("utf-8")).hexdigest()
+        return {
+            "json_path": os.path.abspath(self.json_path) if self.json_path else None,
+            "segments": upto,
+            "segments_sha1": digest.hexdigest(),
+            "max_group_duration": self.max_group_duration,
+            "max_segments": self.max_segments,
+            "window_seconds": self.window_seconds,
+            "window_hop": self.window_hop,
+            "model_name": self.model_name,
+            "backend": self.backend,
+            "speech_mask_sha1": mask_sha1,
+            "speech_mask_frame_seconds": self.speech_mask.frame_seconds if self.speech_mask is not None else None
+        }
 
-            emotion_label, emotion_score = self.detect_emotion(chunk_path)
-
-            merged_text = " ".join([seg["text"] for seg in group])
-            merged_words = []
-            for seg in group:
-                for w in seg.get("words", []):
-                    merged_words.append({
-                        "start": w["start"] + seg["start"],
-                        "end": w["end"] + seg["start"],
-                        "word": w["word"]
-                    })
-
-            self.merged_results.append({
-                "start": start,
-                "end": end,
-                "text": merged_text,
-                "words": merged_words,
-                "speaker": speaker,
-                "emotion": {
-                    "label": emotion_label,
-                    "score": emotion_score
-                }
-            })
+    def load_checkpoint(self):
+        """
+        Restores the cursor, chunk_id and gating counters from the last checkpoint and
+        cuts the JSONL file back to the length it had then, dropping groups written
+        after it (they are classified again). A checkpoint written for other segments
+        or grouping parameters is discarded. Returns True if a checkpoint was used.
+        """
+        if not os.path.exists(self.checkpoint_path):
+            if os.path.exists(self.results_path):
+                os.remove(self.results_path)
+            return False
+
+        with open(self.checkpoint_path, "r") as f:
+            checkpoint = json.load(f)
+        cursor = checkpoint["segment_cursor"]
+        if cursor > len(self.segments) or checkpoint.get("input") != self.input_fingerprint(cursor):
+            print(f"Checkpoint {self.checkpoint_path} does not match the current input, starting over")
+            self.reset()
+            return False
+        self.segment_cursor = cursor
+        self.chunk_id = checkpoint["chunk_id"]
+        self.seconds_total = checkpoint.get("seconds_total", 0.0)
+        self.seconds_skipped = checkpoint.get("seconds_skipped", 0.0)
+        with open(self.results_path, "a+b") as f:
+            f.truncate(checkpoint["results_bytes"])
+        return True
+
+    def save_checkpoint(self, results_file):
+        results_file.flush()
+        os.fsync(results_file.fileno())
+        checkpoint = {
+            "segment_cursor": self.segment_cursor,
+            "chunk_id": self.chunk_id,
+            "results_bytes": results_file.tell(),
+            "seconds_total": self.seconds_total,
+            "seconds_skipped": self.seconds_skipped,
+            "input": self.input_fingerprint(self.segment_cursor)
+        }
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)  # atomic, so a crash never leaves half a checkpoint
+
+    def reset(self):
+        """Discards previous results and checkpoint so the next process() starts over."""
+        for path in (self.results_path, self.checkpoint_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self.segment_cursor = 0
+        self.chunk_id = 0
+        self.seconds_total = 0.0
+        self.seconds_skipped = 0.0
+
+    def process(self, final=True):
+        """
+        Classifies every group from the checkpointed cursor onwards, appending each
+        result to results_path and checkpointing every checkpoint_every groups.
+
+        With final=False (live mode, more segments still to come) the group reaching the
+        end of self.segments is left unclassified, since the next segments may extend it;
+        a later call picks it up from the cursor.
+        """
+        resumed = self.load_checkpoint()
+        if resumed:
+            print(f"Resuming at segment {self.segment_cursor} (chunk {self.chunk_id})")
+
+        with open(self.results_path, "a", encoding="utf-8") as results_file:
+            since_checkpoint = 0
+            for group, next_index in self.build_groups(self.segment_cursor):
+                if not final and next_index >= len(self.segments):
+                    break
+                result = self.classify_group(group)
+                if result is not None:
+                    results_file.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    self.chunk_id += 1
+                self.segment_cursor = next_index
+                since_checkpoint += 1
+                if since_checkpoint >= self.checkpoint_every:
+                    self.save_checkpoint(results_file)
+                    since_checkpoint = 0
+            if final:
+                self.segment_cursor = max(self.segment_cursor, len(self.segments))
+            self.save_checkpoint(results_file)
 
-            os.remove(chunk_path)
-            self.chunk_id += 1
+    def iter_results(self):
+        """Streams the classified groups back from the JSONL file."""
+        if not os.path.exists(self.results_path):
+            return
+        with open(self.results_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def classify_group(self, group):
+        """Classifies one group; returns its result dict, or None if the audio could not be read."""
+        speaker = group[0]["speaker"]
+        start = group[0]["start"]
+        end = group[-1]["end"]
+        duration = end - start
+        self.seconds_total += duration
+
+        # Only send the speech part of the group to the classifier
+        audio_start, audio_end = start, end
+        if self.speech_mask is not None:
+            trimmed = self.speech_mask.trim(start, end)
+            audio_start, audio_end = trimmed if trimmed else (end, end)
+            self.seconds_skipped += duration - (audio_end - audio_start)
+
+        if audio_end > audio_start:
+            audio = self.load_audio(audio_start, audio_end - audio_start)
+            if audio is None or len(audio) == 0:
+                print(f"FFmpeg failed for chunk {self.chunk_id:03d} ({start:.3f}-{end:.3f}s)")
+                return None
+            distribution, timeline = self.detect_emotion_windows(audio, audio_start)
+        else:
+            distribution, timeline = {}, []
+
+        if audio_end <= audio_start:
+            emotion_label, emotion_score = "no_speech", 0.0
+        elif distribution:
+            emotion_label = max(distribution, key=distribution.get)
+            emotion_score = distribution[emotion_label]
+        else:
+            emotion_label, emotion_score = "error", 0.0
+
+        merged_text = " ".join([seg["text"] for seg in group])
+        merged_words = []
+        for seg in group:
+            for w in seg.get("words", []):
+                merged_words.append({
+                    "start": w["start"] + seg["start"],
+                    "end": w["end"] + seg["start"],
+                    "word": w["word"]
+                })
+
+        result = {
+            "start": start,
+            "end": end,
+            "text": merged_text,
+            "words": merged_words,
+            "speaker": speaker,
+            "emotion": {
+                "label": emotion_label,
+                "score": emotion_score,
+                "distribution": distribution
+            },
+            "emotion_timeline": timeline
+        }
+        # Carry the merge step's silence flag over so embeddingString can skip the group
+        if any("in_silence" in seg for seg in group):
+            result["in_silence"] = all(seg.get("in_silence", False) for seg in group)
+        return result
+
+    def gating_stats(self):
+        """Seconds of group audio seen, skipped as non-speech, and the resulting speedup."""
+        classified = self.seconds_total - self.seconds_skipped
+        return {
+            "seconds_total": self.seconds_total,
+            "seconds_skipped": self.seconds_skipped,
+            "speedup": self.seconds_total / classified if classified > 0 else float("inf")
+        }
 
     def save_results(self, output_json):
+        """Converts the JSONL results to the {"segments": [...]} layout, one group in memory at a time."""
         with open(output_json, "w") as f:
-            json.dump({"segments": self.merged_results}, f, indent=2)
+            f.write('{\n  "segments": [')
+            for i, result in enumerate(self.iter_results()):
+                f.write(",\n" if i else "\n")
+                f.write(textwrap.indent(json.dumps(result, indent=2), "    "))
+            f.write("\n  ]\n}\n")
         print(f"✅ Done! Speaker-aware emotion-rich chunks saved to {output_json}")
+        if self.speech_mask is not None:
+            stats = self.gating_stats()
+            print(f"Skipped {stats['seconds_skipped']:.1f}s of {stats['seconds_total']:.1f}s as non-speech "
+                  f"(~{stats['speedup']:.2f}x less audio through the classifier)")
 
 
 
 
 if __name__ == "__main__":
+    from backend.Preprocessing.voiceActivity import SpeechMask
+
+    mask_path = "backend/WhisperXModel/output/speech_mask.npz"
     processor = EmotionProcessor(
         json_path="backend/WhisperXModel/output/merged_raw/full_audio_raw_transcription_with_absolute_timestamps.json",
         audio_path="backend/WhisperXModel/audio/audio.wav",
-        output_dir="backend/EmotionDetectionModel/audio/chunks"
+        output_dir="backend/EmotionDetectionModel/audio/chunks",
+        speech_mask=SpeechMask.load(mask_path) if os.path.exists(mask_path) else None,
+        results_path="backend/WhisperXModel/output/EmotionProcessed/complete.jsonl"
     )
 
     processor.load_segments()
     processor.process()
     processor.save_results("backend/WhisperXModel/output/EmotionProcessed/complete.json")
-
@@ -1,32 +1,54 @@
 import os
-from transformers import pipeline
-
-# Load the pipeline
-pipe = pipeline("audio-classification", model="firdhokk/speech-emotion-recognition-with-openai-whisper-large-v3")
-
-# Folder containing your audio files
-audio_folder = "backend/EmotionDetectionModel/audio/chunks"
-output_file = "emotion_outputs/results.txt"
-
-# Create output folder if not exists
-os.makedirs(os.path.dirname(output_file), exist_ok=True)
-
-# Clear previous results
-with open(output_file, "w") as f:
-    f.write("")
-
-# Iterate over all wav files and run inference
-with open(output_file, "a") as f:
-    for filename in sorted(os.listdir(audio_folder)):
-        if filename.endswith(".wav"):
-            file_path = os.path.join(audio_folder, filename)
-            try:
-                result = pipe(file_path)[0]  # Get top emotion prediction
-                label = result['label']
-                score = result['score']
-                line = f"{filename}: {label} ({score:.2f})"
-                print(line)
-                f.write(line + "\n")
-            except Exception as e:
-                print(f"Error processing {filename}: {e}")
-                f.write(f"Error processing {filename}: {e}\n")
+
+from backend.EmotionDetectionModel.combining import EMOTION_MODEL
+
+
+def detect_emotions_in_folder(audio_folder, output_file, model_name=EMOTION_MODEL):
+    """
+    Runs the emotion classifier over every .wav file in a folder and writes one
+    result line per file.
+
+    Args:
+        audio_folder (str): Folder containing the audio chunks.
+        output_file (str): Text file the results are written to (overwritten).
+        model_name (str): Hugging Face model used for audio classification.
+    Returns:
+        list: (filename, label, score) tuples for every file processed successfully.
+    """
+    from transformers import pipeline  # heavy, only needed when actually running inference
+
+    # Load the pipeline
+    pipe = pipeline("audio-classification", model=model_name)
+
+    # Create output folder if not exists
+    output_dir = os.path.dirname(output_file)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    results = []
+
+    # Iterate over all wav files and run inference (clears previous results)
+    with open(output_file, "w") as f:
+        for filename in sorted(os.listdir(audio_folder)):
+            if filename.endswith(".wav"):
+                file_path = os.path.join(audio_folder, filename)
+                try:
+                    result = pipe(file_path)[0]  # Get top emotion prediction
+                    label = result['label']
+                    score = result['score']
+                    line = f"{filename}: {label} ({score:.2f})"
+                    print(line)
+                    f.write(line + "\n")
+                    results.append((filename, label, score))
+                except Exception as e:
+                    print(f"Error processing {filename}: {e}")
+                    f.write(f"Error processing {filename}: {e}\n")
+
+    return results
+
+
+if __name__ == "__main__":
+    detect_emotions_in_folder(
+        audio_folder="backend/EmotionDetectionModel/audio/chunks",
+        output_file="emotion_outputs/results.txt"
+    )
@@ -0,0 +1,194 @@
+import tempfile
+import time
+
+import numpy as np
+
+# "fp32" is the stock Hugging Face model, "int8" swaps every nn.Linear for a dynamically
+# quantized one (weights int8, activations quantized on the fly) and "onnx" exports the
+# model to ONNX Runtime. Both optimised backends only pay off on CPU.
+BACKENDS = ("fp32", "int8", "onnx")
+
+
+def _check_backend(backend):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {BACKENDS}")
+
+
+def quantize_dynamic_int8(model):
+    """Returns a copy of a torch model with its Linear layers dynamically quantized to int8."""
+    import torch
+    from torch.ao.quantization import quantize_dynamic
+
+    model.eval()
+    return quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _saved_model_dir(model, *extras):
+    """Saves an in-memory model (plus tokenizer/feature extractor) so it can be exported."""
+    path = tempfile.mkdtemp(prefix="podclip_export_")
+    model.save_pretrained(path)
+    for extra in extras:
+        if extra is not None:
+            extra.save_pretrained(path)
+    return path
+
+
+def load_audio_classifier(model, backend="fp32", feature_extractor=None):
+    """
+    Builds an audio-classification pipeline on the requested backend.
+
+    Args:
+        model (str or PreTrainedModel): Hugging Face model id/path, or an already
+                                        loaded model (e.g. a tiny random one for checks).
+        backend (str): One of BACKENDS.
+        feature_extractor: Feature extractor to use; loaded from the model id if omitted.
+    Returns:
+        transformers.Pipeline: Callable exactly like the fp32 pipeline.
+    """
+    from transformers import AutoFeatureExtractor, AutoModelForAudioClassification, pipeline
+
+    _check_backend(backend)
+    if feature_extractor is None:
+        feature_extractor = AutoFeatureExtractor.from_pretrained(model)
+
+    if backend == "onnx":
+        from optimum.onnxruntime import ORTModelForAudioClassification
+
+        path = model if isinstance(model, str) else _saved_model_dir(model, feature_extractor)
+        ort_model = ORTModelForAudioClassification.from_pretrained(path, export=True)
+        return pipeline("audio-classification", model=ort_model, feature_extractor=feature_extractor)
+
+    if isinstance(model, str):
+        model = AutoModelForAudioClassification.from_pretrained(model)
+    if backend == "int8":
+        model = quantize_dynamic_int8(model)
+    return pipeline("audio-classification", model=model, feature_extractor=feature_extractor)
+
+
+def load_sentence_embedder(model, backend="fp32"):
+    """
+    Loads a SentenceTransformer on the requested backend.
+
+    Args:
+        model (str or SentenceTransformer): Model id/path or an already loaded model.
+        backend (str): One of BACKENDS.
+    Returns:
+        SentenceTransformer: Model whose encode() behaves like the fp32 one.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    _check_backend(backend)
+    if backend == "onnx":
+        path = model if isinstance(model, str) else _saved_model_dir(model)
+        return SentenceTransformer(path, backend="onnx", device="cpu")
+
+    if isinstance(model, str):
+        model = SentenceTransformer(model, device="cpu")
+    if backend == "int8":
+        model = quantize_dynamic_int8(model)
+    return model
+
+
+def label_agreement(labels_a, labels_b):
+    """Fraction of positions where two label lists agree."""
+    if not labels_a:
+        return 1.0
+    return float(np.mean([a == b for a, b in zip(labels_a, labels_b)]))
+
+
+def rowwise_cosine(a, b):
+    """Cosine similarity between matching rows of two (n, d) arrays."""
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    norms = np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1)
+    return np.sum(a * b, axis=1) / np.maximum(norms, 1e-12)
+
+
+def _timed(fn, n_items, repeats):
+    fn()  # warm-up (ONNX session init, first-call allocations)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return result, {"latency_ms": best * 1000.0 / n_items, "throughput_per_s": n_items / best}
+
+
+def compare_classifier_backends(model, feature_extractor, inputs, backends=BACKENDS, repeats=3):
+    """
+    Runs the same audio inputs through each backend and reports latency, throughput
+    and top-label agreement with fp32.
+
+    Args:
+        model: Model id/path or loaded model (see load_audio_classifier).
+        feature_extractor: Matching feature extractor.
+        inputs (list): Pipeline inputs, e.g. {"raw": np.ndarray, "sampling_rate": 16000}.
+        backends (iterable): Backends to compare; fp32 is always the reference.
+        repeats (int): Timed runs per backend (best one is reported).
+    Returns:
+        dict: backend -> {'latency_ms', 'throughput_per_s', 'label_agreement'}.
+    """
+    report = {}
+    reference = None
+    for backend in ["fp32"] + [b for b in backends if b != "fp32"]:
+        pipe = load_audio_classifier(model, backend, feature_extractor)
+        predictions, stats = _timed(lambda: pipe(list(inputs), top_k=1), len(inputs), repeats)
+        labels = [p[0]["label"] for p in predictions]
+        if reference is None:
+            reference = labels
+        stats["label_agreement"] = label_agreement(reference, labels)
+        report[backend] = stats
+    return report
+
+
+def compare_embedder_backends(model, texts, backends=BACKENDS, repeats=3):
+    """
+    Encodes the same texts with each backend and reports latency, throughput and
+    the mean/min cosine similarity of each embedding to its fp32 counterpart.
+
+    Returns:
+        dict: backend -> {'latency_ms', 'throughput_per_s', 'mean_cosine', 'min_cosine'}.
+    """
+    report = {}
+    reference = None
+    for backend in ["fp32"] + [b for b in backends if b != "fp32"]:
+        embedder = load_sentence_embedder(model, backend)
+        embeddings, stats = _timed(lambda: embedder.encode(texts, convert_to_numpy=True), len(texts), repeats)
+        if reference is None:
+            reference = embeddings
+        cosines = rowwise_cosine(reference, embeddings)
+        stats["mean_cosine"] = float(cosines.mean())
+        stats["min_cosine"] = float(cosines.min())
+        report[backend] = stats
+    return report
+
+
+def print_report(title, report):
+    print(f"\n--- {title} ---")
+    for backend, stats in report.items():
+        details = ", ".join(
+            f"{key}={value:.3f}" for key, value in stats.items() if key not in ("latency_ms", "throughput_per_s")
+        )
+        print(f"{backend:>5}: {stats['latency_ms']:8.2f} ms/item, {stats['throughput_per_s']:8.1f} items/s, {details}")
+
+
+if __name__ == "__main__":
+    # Accuracy/latency check against the real models (downloads them on first run)
+    from backend.EmotionDetectionModel.combining import EMOTION_MODEL, SAMPLE_RATE
+
+    rng = np.random.default_rng(0)
+    audio_inputs = [
+        {"raw": rng.standard_normal(SAMPLE_RATE * 10).astype(np.float32) * 0.1, "sampling_rate": SAMPLE_RATE}
+        for _ in range(4)
+    ]
+    texts_path = "backend/RagPipeline/outputs/embedding_input.txt"
+    with open(texts_path, "r", encoding="utf-8") as f:
+        sample_texts = [f"passage: {line.strip()}" for line in f if line.strip()][:64]
+
+    from transformers import AutoFeatureExtractor
+
+    print_report("Emotion classifier", compare_classifier_backends(
+        EMOTION_MODEL, AutoFeatureExtractor.from_pretrained(EMOTION_MODEL), audio_inputs
+    ))
+    print_report("e5-large embedder", compare_embedder_backends("intfloat/e5-large", sample_texts))
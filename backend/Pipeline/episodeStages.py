@@ -0,0 +1,114 @@
+import json
+import os
+import subprocess
+
+from backend.Pipeline.jobQueue import Stage
+
+# Per-episode layout inside the working directory, mirroring the single-episode paths
+# under backend/WhisperXModel and backend/RagPipeline
+AUDIO_PATH = ("audio", "audio.wav")
+CHUNKS_DIR = ("audio", "chunks")
+SPEECH_MASK_PATH = ("output", "speech_mask.npz")
+RAW_DIR = ("output", "raw")
+MERGED_PATH = ("output", "merged_raw", "full_audio_raw_transcription_with_absolute_timestamps.json")
+TURNS_PATH = ("output", "processed", "outputFinal.json")
+EMOTION_JSONL = ("output", "EmotionProcessed", "complete.jsonl")
+EMOTION_PATH = ("output", "EmotionProcessed", "complete.json")
+EMOTION_CHUNKS_DIR = ("output", "EmotionProcessed", "chunks")
+EMBEDDING_INPUT = ("outputs", "embedding_input.txt")
+EMBEDDINGS_PATH = ("outputs", "local_text_embeddings.csv")
+CHUNK_DURATION_SECONDS = 20 * 60
+
+
+def extract_audio(episode):
+    """Decodes the episode media to 16 kHz mono audio.wav."""
+    subprocess.run([
+        "ffmpeg", "-y", "-v", "error", "-i", episode.source_path,
+        "-vn", "-ac", "1", "-ar", "16000", episode.path(*AUDIO_PATH)
+    ], check=True)
+
+
+def detect_speech(episode):
+    """Computes the speech mask that merge (silence flags) and emotion (gating) use."""
+    from backend.Preprocessing.voiceActivity import detect_speech as compute_mask
+
+    compute_mask(episode.path(*AUDIO_PATH)).save(episode.path(*SPEECH_MASK_PATH))
+
+
+def load_speech_mask(episode):
+    from backend.Preprocessing.voiceActivity import SpeechMask
+
+    return SpeechMask.load(episode.path(*SPEECH_MASK_PATH))
+
+
+def split_chunks(episode):
+    """Cuts audio.wav into outputXXX.wav chunks, the names the merge step expects."""
+    pattern = episode.path(*CHUNKS_DIR, "output%03d.wav")
+    subprocess.run([
+        "ffmpeg", "-y", "-v", "error", "-i", episode.path(*AUDIO_PATH),
+        "-f", "segment", "-segment_time", str(CHUNK_DURATION_SECONDS), "-c", "copy", pattern
+    ], check=True)
+
+
+def transcribe(episode):
+    from backend.WhisperXModel.diarization import run_diarization
+
+    run_diarization(episode.directory(*CHUNKS_DIR), episode.directory(*RAW_DIR))
+
+
+def merge(episode):
+    from backend.WhisperXModel.processingMergedRaw import merge_and_retimestamp_raw_jsons
+
+    if not merge_and_retimestamp_raw_jsons(episode.directory(*RAW_DIR), episode.path(*MERGED_PATH),
+                                           CHUNK_DURATION_SECONDS, speech_mask=load_speech_mask(episode)):
+        raise RuntimeError("merging the raw WhisperX outputs produced no segments")
+
+
+def aggregate(episode):
+    from backend.WhisperXModel.processingMergedRaw import aggregate_speaker_turns
+
+    with open(episode.path(*MERGED_PATH), "r", encoding="utf-8") as f:
+        turns = aggregate_speaker_turns(json.load(f))
+    with open(episode.path(*TURNS_PATH), "w", encoding="utf-8") as f:
+        json.dump(turns, f, indent=4, ensure_ascii=False)
+
+
+def detect_emotions(episode):
+    from backend.EmotionDetectionModel.combining import EmotionProcessor
+
+    # Resumes from its own checkpoint when a retry lands here again
+    processor = EmotionProcessor(
+        json_path=episode.path(*MERGED_PATH),
+        audio_path=episode.path(*AUDIO_PATH),
+        output_dir=episode.directory(*EMOTION_CHUNKS_DIR),
+        results_path=episode.path(*EMOTION_JSONL),
+        speech_mask=load_speech_mask(episode)
+    )
+    processor.load_segments()
+    processor.process()
+    processor.save_results(episode.path(*EMOTION_PATH))
+
+
+def embed(episode):
+    from backend.RagPipeline.embeddingString import (
+        generate_embedding_strings_from_segments, save_embedding_strings_to_txt
+    )
+    from backend.RagPipeline.generateTextEmbeddings import embed_texts, save_embeddings
+
+    strings = generate_embedding_strings_from_segments(episode.path(*EMOTION_PATH))
+    save_embedding_strings_to_txt(strings, episode.path(*EMBEDDING_INPUT))
+    save_embeddings(embed_texts(strings), episode.path(*EMBEDDINGS_PATH))
+
+
+# Model-heavy stages share the "gpu" resource so a machine never runs more of them at
+# once than JobQueue's resource_limits allow
+EPISODE_STAGES = [
+    Stage("extract_audio", extract_audio),
+    Stage("detect_speech", detect_speech),
+    Stage("split_chunks", split_chunks),
+    Stage("transcribe", transcribe, resource="gpu"),
+    Stage("merge", merge),
+    Stage("aggregate", aggregate),
+    Stage("emotion", detect_emotions, resource="gpu"),
+    Stage("embed", embed, resource="gpu"),
+]
@@ -0,0 +1,480 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    episode_id TEXT UNIQUE NOT NULL,
+    source_path TEXT NOT NULL,
+    workdir TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',  -- queued, running, done, failed
+    stages_done INTEGER NOT NULL DEFAULT 0,
+    current_stage TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_until REAL,
+    next_run_at REAL NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS stage_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id INTEGER NOT NULL,
+    stage TEXT NOT NULL,
+    worker TEXT,
+    attempt INTEGER NOT NULL,
+    status TEXT NOT NULL,  -- running, ok, failed
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS leases (
+    resource TEXT NOT NULL,
+    job_id INTEGER NOT NULL,
+    worker TEXT NOT NULL,
+    acquired_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, next_run_at);
+"""
+
+
+class Stage:
+    def __init__(self, name, func, resource=None):
+        """
+        Args:
+            name (str): Stage name, recorded in the queue.
+            func (callable): Takes an Episode and raises on failure. Must be a module-level
+                             function so worker processes can pickle it, and should be safe
+                             to re-run after a crash (stages overwrite their own outputs).
+            resource (str): Name of a globally limited resource (e.g. "gpu") the stage
+                            holds while it runs; None for cheap stages.
+        """
+        self.name = name
+        self.func = func
+        self.resource = resource
+
+
+class Episode:
+    """One queued episode: its id, source media and isolated working directory."""
+
+    def __init__(self, episode_id, source_path, workdir):
+        self.episode_id = episode_id
+        self.source_path = source_path
+        self.workdir = workdir
+
+    def path(self, *parts):
+        """Path inside the working directory; parent folders are created."""
+        full_path = os.path.join(self.workdir, *parts)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        return full_path
+
+    def directory(self, *parts):
+        """Directory inside the working directory, created if missing."""
+        full_path = os.path.join(self.workdir, *parts)
+        os.makedirs(full_path, exist_ok=True)
+        return full_path
+
+
+class JobQueue:
+    def __init__(self, db_path, max_attempts=3, backoff_base=30.0, backoff_max=1800.0):
+        """
+        SQLite-backed episode queue shared by every worker process on the machine.
+
+        Args:
+            db_path (str): SQLite database file (created if missing).
+            max_attempts (int): Attempts before a job is marked failed for good.
+            backoff_base (float): Delay before the first retry; doubles per attempt.
+            backoff_max (float): Upper bound for the retry delay.
+        """
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        # Autocommit; writes that must be atomic across processes use BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _transaction(self, func, *args):
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = func(*args)
+            self.conn.execute("COMMIT")
+            return result
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def enqueue(self, episode_id, source_path, workdir_root):
+        """
+        Adds an episode with its own working directory workdir_root/episode_id.
+        Re-enqueueing an existing episode is a no-op.
+
+        Returns:
+            int: The job id.
+        """
+        workdir = os.path.join(workdir_root, episode_id)
+        os.makedirs(workdir, exist_ok=True)
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR IGNORE INTO jobs (episode_id, source_path, workdir, next_run_at, created_at) VALUES (?, ?, ?, ?, ?)",
+            (episode_id, source_path, workdir, now, now)
+        )
+        return self.conn.execute("SELECT id FROM jobs WHERE episode_id = ?", (episode_id,)).fetchone()["id"]
+
+    def _claim(self, worker, lease_seconds):
+        now = time.time()
+        # A job whose worker died (lease ran out) used up its attempt like any other
+        # failure, so an episode that keeps killing its worker ends up failed
+        expired = self.conn.execute(
+            "SELECT id, worker, current_stage FROM jobs WHERE status = 'running' AND lease_until < ?", (now,)
+        ).fetchall()
+        for job in expired:
+            error = f"{job['current_stage']}: lease expired, worker {job['worker']} stopped heartbeating"
+            self.conn.execute(
+                "UPDATE stage_runs SET status = 'failed', finished_at = ?, error = ? WHERE job_id = ? AND status = 'running'",
+                (now, error, job["id"])
+            )
+            self._fail(job["id"], error, job["worker"])
+        row = self.conn.execute(
+            "SELECT * FROM jobs WHERE status = 'queued' AND next_run_at <= ? ORDER BY next_run_at, id LIMIT 1", (now,)
+        ).fetchone()
+        if row is None:
+            return None
+        self.conn.execute(
+            "UPDATE jobs SET status = 'running', worker = ?, lease_until = ?, attempts = attempts + 1, "
+            "started_at = COALESCE(started_at, ?) WHERE id = ?",
+            (worker, now + lease_seconds, now, row["id"])
+        )
+        return dict(row, status="running", worker=worker, attempts=row["attempts"] + 1)
+
+    def claim(self, worker, lease_seconds=3600.0):
+        """Atomically takes the next due job, or returns None if nothing is ready."""
+        return self._transaction(self._claim, worker, lease_seconds)
+
+    def heartbeat(self, job_id, worker, lease_seconds=3600.0):
+        """Extends the lease; False if the job is no longer running on this worker."""
+        cursor = self.conn.execute(
+            "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND status = 'running'",
+            (time.time() + lease_seconds, job_id, worker)
+        )
+        return cursor.rowcount > 0
+
+    def stage_started(self, job, stage_name):
+        self.conn.execute("UPDATE jobs SET current_stage = ? WHERE id = ? AND worker = ?",
+                          (stage_name, job["id"], job["worker"]))
+        cursor = self.conn.execute(
+            "INSERT INTO stage_runs (job_id, stage, worker, attempt, status, started_at) VALUES (?, ?, ?, ?, 'running', ?)",
+            (job["id"], stage_name, job["worker"], job["attempts"], time.time())
+        )
+        return cursor.lastrowid
+
+    def stage_finished(self, run_id, job_id, worker, stages_done=None, error=None):
+        """
+        Closes a stage run; on success stages_done records progress so a retry resumes
+        after it. Returns False if the job was meanwhile handed to another worker.
+        """
+        self.conn.execute(
+            "UPDATE stage_runs SET status = ?, finished_at = ?, error = ? WHERE id = ? AND status = 'running'",
+            ("failed" if error else "ok", time.time(), error, run_id)
+        )
+        if error is None and stages_done is not None:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET stages_done = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (stages_done, job_id, worker)
+            )
+            return cursor.rowcount > 0
+        return True
+
+    def _complete(self, job_id, worker):
+        cursor = self.conn.execute(
+            "UPDATE jobs SET status = 'done', current_stage = NULL, lease_until = NULL, finished_at = ? "
+            "WHERE id = ? AND worker = ? AND status = 'running'",
+            (time.time(), job_id, worker)
+        )
+        if cursor.rowcount == 0:
+            return False
+        self.conn.execute("DELETE FROM leases WHERE job_id = ?", (job_id,))
+        return True
+
+    def complete(self, job_id, worker):
+        """Marks the job done; False if it is no longer running on this worker."""
+        return self._transaction(self._complete, job_id, worker)
+
+    def _fail(self, job_id, error, worker):
+        row = self.conn.execute(
+            "SELECT attempts FROM jobs WHERE id = ? AND worker = ? AND status = 'running'", (job_id, worker)
+        ).fetchone()
+        if row is None:
+            return "lost"
+        self.conn.execute("DELETE FROM leases WHERE job_id = ?", (job_id,))
+        if row["attempts"] >= self.max_attempts:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'failed', last_error = ?, lease_until = NULL, finished_at = ? WHERE id = ?",
+                (error, time.time(), job_id)
+            )
+            return "failed"
+        delay = min(self.backoff_base * 2 ** (row["attempts"] - 1), self.backoff_max)
+        self.conn.execute(
+            "UPDATE jobs SET status = 'queued', worker = NULL, last_error = ?, lease_until = NULL, next_run_at = ? WHERE id = ?",
+            (error, time.time() + delay, job_id)
+        )
+        return "retry"
+
+    def fail(self, job_id, error, worker):
+        """
+        Records a failed attempt: the job is re-queued with exponential backoff, or marked
+        failed once max_attempts is reached.
+
+        Returns:
+            str: "retry", "failed", or "lost" if the job is no longer running on this worker.
+        """
+        return self._transaction(self._fail, job_id, error, worker)
+
+    def _acquire(self, resource, limit, job_id, worker):
+        # Drop leases held by jobs that are no longer running (crashed workers)
+        self.conn.execute(
+            "DELETE FROM leases WHERE job_id NOT IN (SELECT id FROM jobs WHERE status = 'running' AND lease_until >= ?)",
+            (time.time(),)
+        )
+        held = self.conn.execute("SELECT COUNT(*) FROM leases WHERE resource = ?", (resource,)).fetchone()[0]
+        if held >= limit:
+            return False
+        self.conn.execute(
+            "INSERT INTO leases (resource, job_id, worker, acquired_at) VALUES (?, ?, ?, ?)",
+            (resource, job_id, worker, time.time())
+        )
+        return True
+
+    def acquire(self, resource, limit, job_id, worker):
+        """Takes one of `limit` machine-wide slots for resource; False if all are held."""
+        return self._transaction(self._acquire, resource, limit, job_id, worker)
+
+    def release(self, resource, job_id):
+        self.conn.execute(
+            "DELETE FROM leases WHERE rowid = (SELECT rowid FROM leases WHERE resource = ? AND job_id = ? LIMIT 1)",
+            (resource, job_id)
+        )
+
+    def counts(self):
+        """Number of jobs per status."""
+        rows = self.conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    def jobs(self):
+        return [dict(row) for row in self.conn.execute("SELECT * FROM jobs ORDER BY id")]
+
+    def metrics(self):
+        """
+        Throughput and stage timings over everything in the queue.
+
+        Returns:
+            dict: 'done', 'failed', 'queued', 'running', 'retries', 'wall_seconds' (first
+                  job start to last job finish), 'episodes_per_hour' and 'stage_seconds'
+                  (mean seconds of successful runs per stage).
+        """
+        counts = self.counts()
+        span = self.conn.execute(
+            "SELECT MIN(started_at) AS first, MAX(finished_at) AS last FROM jobs WHERE status = 'done'"
+        ).fetchone()
+        wall_seconds = (span["last"] - span["first"]) if span["first"] is not None else 0.0
+        retries = self.conn.execute("SELECT COALESCE(SUM(attempts - 1), 0) FROM jobs WHERE attempts > 1").fetchone()[0]
+        stage_rows = self.conn.execute(
+            "SELECT stage, AVG(finished_at - started_at) AS seconds FROM stage_runs WHERE status = 'ok' GROUP BY stage"
+        ).fetchall()
+        done = counts.get("done", 0)
+        return {
+            "done": done,
+            "failed": counts.get("failed", 0),
+            "queued": counts.get("queued", 0),
+            "running": counts.get("running", 0),
+            "retries": retries,
+            "wall_seconds": wall_seconds,
+            "episodes_per_hour": done * 3600.0 / wall_seconds if wall_seconds > 0 else 0.0,
+            "stage_seconds": {row["stage"]: row["seconds"] for row in stage_rows}
+        }
+
+
+class LeaseKeeper:
+    """
+    Renews a job's lease from a background thread (with its own connection) every
+    lease_seconds / 3, so a stage running longer than the lease keeps its job. `lost`
+    becomes True once the job has been handed to another worker.
+    """
+
+    def __init__(self, db_path, job_id, worker, lease_seconds):
+        self.db_path = db_path
+        self.job_id = job_id
+        self.worker = worker
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        queue = JobQueue(self.db_path)
+        try:
+            while not self._stop.wait(self.lease_seconds / 3):
+                if not queue.heartbeat(self.job_id, self.worker, self.lease_seconds):
+                    self.lost = True
+                    break
+        finally:
+            queue.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+class Worker:
+    def __init__(self, queue, stages, worker_id=None, resource_limits=None, poll_interval=0.5, lease_seconds=3600.0):
+        """
+        Pulls jobs from the queue and runs the stages in order, resuming after the last
+        stage that succeeded.
+
+        Args:
+            queue (JobQueue): The shared queue.
+            stages (list): Stage objects.
+            worker_id (str): Name recorded on claimed jobs (default: host:pid).
+            resource_limits (dict): Machine-wide slots per resource, e.g. {"gpu": 1}.
+                                    Resources without a limit get one slot.
+            poll_interval (float): Seconds to sleep when no job or slot is free.
+            lease_seconds (float): A job whose worker stops heartbeating for this long
+                                   is handed to another worker (and the attempt counts
+                                   as failed). A LeaseKeeper renews it while a job runs.
+        """
+        self.queue = queue
+        self.stages = stages
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.resource_limits = resource_limits or {}
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+
+    def _wait_for(self, resource, job_id):
+        limit = self.resource_limits.get(resource, 1)
+        while not self.queue.acquire(resource, limit, job_id, self.worker_id):
+            time.sleep(self.poll_interval)
+
+    def run_job(self, job):
+        """Runs the remaining stages of a claimed job. Returns True if it completed."""
+        with LeaseKeeper(self.queue.db_path, job["id"], self.worker_id, self.lease_seconds) as lease:
+            return self._run_stages(job, lease)
+
+    def _run_stages(self, job, lease):
+        episode = Episode(job["episode_id"], job["source_path"], job["workdir"])
+        for index in range(job["stages_done"], len(self.stages)):
+            stage = self.stages[index]
+            if stage.resource:
+                self._wait_for(stage.resource, job["id"])
+            run_id = self.queue.stage_started(job, stage.name)
+            print(f"[{self.worker_id}] {job['episode_id']}: {stage.name} ({index + 1}/{len(self.stages)})")
+            try:
+                stage.func(episode)
+            except Exception as e:
+                error = f"{stage.name}: {e}\n{traceback.format_exc(limit=5)}"
+                self.queue.stage_finished(run_id, job["id"], self.worker_id, error=error)
+                outcome = self.queue.fail(job["id"], error, self.worker_id)
+                print(f"[{self.worker_id}] {job['episode_id']}: {stage.name} failed ({e}), {outcome}")
+                return False
+            finally:
+                if stage.resource:
+                    self.queue.release(stage.resource, job["id"])
+            if lease.lost or not self.queue.stage_finished(run_id, job["id"], self.worker_id, stages_done=index + 1):
+                print(f"[{self.worker_id}] {job['episode_id']}: lease lost during {stage.name}, leaving the job")
+                return False
+        if not self.queue.complete(job["id"], self.worker_id):
+            print(f"[{self.worker_id}] {job['episode_id']}: lease lost before completion, leaving the job")
+            return False
+        print(f"✅ [{self.worker_id}] {job['episode_id']} done")
+        return True
+
+    def run(self, max_jobs=None, stop_when_idle=True):
+        """
+        Processes jobs until max_jobs have been handled or, with stop_when_idle, no job
+        is queued or running anywhere (jobs waiting out a backoff keep the worker alive).
+
+        Returns:
+            int: Number of jobs this worker handled.
+        """
+        handled = 0
+        while max_jobs is None or handled < max_jobs:
+            job = self.queue.claim(self.worker_id, self.lease_seconds)
+            if job is None:
+                counts = self.queue.counts()
+                if stop_when_idle and not counts.get("queued") and not counts.get("running"):
+                    break
+                time.sleep(self.poll_interval)
+                continue
+            self.run_job(job)
+            handled += 1
+        return handled
+
+
+def _worker_main(db_path, stages, worker_id, resource_limits, queue_kwargs, worker_kwargs):
+    queue = JobQueue(db_path, **queue_kwargs)
+    try:
+        Worker(queue, stages, worker_id, resource_limits, **worker_kwargs).run()
+    finally:
+        queue.close()
+
+
+def run_workers(db_path, stages, n_workers=2, resource_limits=None, queue_kwargs=None, **worker_kwargs):
+    """
+    Starts n_workers worker processes on the queue and waits until it drains.
+
+    Returns:
+        dict: JobQueue.metrics() after the run.
+    """
+    import multiprocessing
+
+    processes = [
+        multiprocessing.Process(
+            target=_worker_main,
+            args=(db_path, stages, f"worker-{i}", resource_limits, queue_kwargs or {}, worker_kwargs)
+        )
+        for i in range(n_workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    queue = JobQueue(db_path, **(queue_kwargs or {}))
+    try:
+        return queue.metrics()
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    from backend.Pipeline.episodeStages import EPISODE_STAGES
+
+    # Usage: python -m backend.Pipeline.jobQueue <media files...>
+    job_queue = JobQueue("backend/Pipeline/output/jobs.sqlite3")
+    for media_path in sys.argv[1:]:
+        job_queue.enqueue(os.path.splitext(os.path.basename(media_path))[0], os.path.abspath(media_path),
+                          "backend/Pipeline/output/episodes")
+    job_queue.close()
+
+    stats = run_workers("backend/Pipeline/output/jobs.sqlite3", EPISODE_STAGES, n_workers=2,
+                        resource_limits={"gpu": 1})
+    print(f"✅ {stats['done']} episodes done, {stats['failed']} failed, {stats['retries']} retries, "
+          f"{stats['episodes_per_hour']:.2f} episodes/hour")
@@ -0,0 +1,396 @@
+import json
+import os
+import re
+import time
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+from backend.Clipping.boundaryOptimizer import BoundaryOptimizer, WordTimeline
+from backend.RagPipeline.embeddingString import (
+    embedding_string, save_embedding_strings_to_txt, select_embedding_segments
+)
+from backend.RagPipeline.generateTextEmbeddings import save_embeddings
+from backend.RagPipeline.hybridSearch import HybridSearchIndex, segment_record
+from backend.WhisperXModel.processingMergedRaw import SpeakerTurnAggregator, retimestamp_segments
+
+# Chunk files the recorder writes (same names as Pipeline.episodeStages.split_chunks)
+CHUNK_PATTERN = re.compile(r"^output(\d{3})\.wav$")
+# Touched by the recorder once the last chunk has been written
+DONE_MARKER = "recording.done"
+
+
+class ChunkWatcher:
+    def __init__(self, chunks_dir, settle_seconds=2.0, clock=time.time):
+        """
+        Polls a directory for new outputXXX.wav chunks.
+
+        Args:
+            chunks_dir (str): Directory the recorder writes chunks into.
+            settle_seconds (float): A chunk is complete once its file has not been
+                                    modified for this long.
+            clock (callable): Current time in seconds, comparable with file mtimes.
+        """
+        self.chunks_dir = chunks_dir
+        self.settle_seconds = settle_seconds
+        self.clock = clock
+        self.next_index = 0
+        self.waiting = False  # chunks seen at the last poll that are not complete yet
+
+    def poll(self):
+        """
+        Returns:
+            list: (index, path, arrived_at) for newly completed chunks, in order and
+                  without gaps (a chunk waits until every earlier one is complete);
+                  arrived_at is the chunk's last modification time.
+        """
+        try:
+            names = os.listdir(self.chunks_dir)
+        except FileNotFoundError:
+            return []
+        chunks = {}
+        for name in names:
+            match = CHUNK_PATTERN.match(name)
+            if match:
+                chunks[int(match.group(1))] = os.path.join(self.chunks_dir, name)
+
+        now = self.clock()
+        ready = []
+        while self.next_index in chunks:
+            path = chunks[self.next_index]
+            arrived_at = os.path.getmtime(path)
+            if now - arrived_at < self.settle_seconds:
+                break
+            ready.append((self.next_index, path, arrived_at))
+            self.next_index += 1
+        self.waiting = any(index >= self.next_index for index in chunks)
+        return ready
+
+    def finished(self):
+        return os.path.exists(os.path.join(self.chunks_dir, DONE_MARKER))
+
+
+class WhisperXChunkTranscriber:
+    """Transcribes one live chunk with the whisperx CLI into raw_dir/outputXXX/ and returns its JSON."""
+
+    def __init__(self, raw_dir, model="medium", chunk_size=4):
+        self.raw_dir = raw_dir
+        self.model = model
+        self.chunk_size = chunk_size
+
+    def __call__(self, index, chunk_path):
+        from backend.WhisperXModel.diarization import transcribe_chunk
+
+        json_path = transcribe_chunk(chunk_path, os.path.join(self.raw_dir, f"output{index:03d}"),
+                                     self.model, self.chunk_size)
+        with open(json_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+
+def emotion_intensity(result):
+    """Share of an emotion group's probability mass on non-neutral labels (0 for no_speech/errors)."""
+    emotion = result.get("emotion", {})
+    distribution = emotion.get("distribution") or {}
+    if emotion.get("label") in ("no_speech", "error") or not distribution:
+        return 0.0
+    return 1.0 - distribution.get("neutral", 0.0)
+
+
+class HighlightScorer:
+    def __init__(self, min_duration=20.0, max_duration=60.0, min_score=0.4, max_overlap=0.5):
+        """
+        Scores highlight candidates from emotion groups as they are classified.
+
+        Every group starts a window of the following groups up to max_duration; its score
+        is the duration-weighted emotion intensity. Of overlapping windows only the best
+        is kept, and it is emitted once no later window can overlap it, so the output is
+        append-only.
+
+        Args:
+            min_duration, max_duration (float): Candidate length limits in seconds.
+            min_score (float): Windows scoring lower are not candidates.
+            max_overlap (float): Windows overlapping more than this fraction of the
+                                 shorter one compete for the same candidate slot.
+        """
+        self.min_duration = min_duration
+        self.max_duration = max_duration
+        self.min_score = min_score
+        self.max_overlap = max_overlap
+        self.groups = []
+        self.next_window = 0  # first group whose window has not been scored yet
+        self.pending = None
+
+    def add(self, results):
+        self.groups.extend(results)
+
+    def _window(self, first):
+        start = self.groups[first]["start"]
+        last = first
+        while last + 1 < len(self.groups) and self.groups[last + 1]["end"] - start <= self.max_duration:
+            last += 1
+        return last
+
+    def _overlaps(self, a, b):
+        shared = min(a["end"], b["end"]) - max(a["start"], b["start"])
+        shorter = min(a["end"] - a["start"], b["end"] - b["start"])
+        return shared > self.max_overlap * shorter
+
+    def candidates(self, final=False):
+        """
+        Scores every window that can no longer grow (the group after it is known, or
+        final) and returns the candidates that are now settled.
+        """
+        emitted = []
+        while self.next_window < len(self.groups):
+            first = self.next_window
+            last = self._window(first)
+            if last + 1 >= len(self.groups) and not final:
+                break
+            self.next_window += 1
+
+            window = self.groups[first:last + 1]
+            if self.pending is not None and window[0]["start"] >= self.pending["end"]:
+                emitted.append(self.pending)
+                self.pending = None
+
+            duration = window[-1]["end"] - window[0]["start"]
+            if duration < self.min_duration:
+                continue
+            lengths = np.array([g["end"] - g["start"] for g in window])
+            intensity = np.array([emotion_intensity(g) for g in window])
+            score = float(np.dot(lengths, intensity) / max(lengths.sum(), 1e-9))
+            if score < self.min_score:
+                continue
+
+            labels = {}
+            for g, length in zip(window, lengths):
+                label = g.get("emotion", {}).get("label", "EMOTION_UNKNOWN")
+                labels[label] = labels.get(label, 0.0) + float(length)
+            candidate = {
+                "start": window[0]["start"],
+                "end": window[-1]["end"],
+                "score": score,
+                "emotion": max(labels, key=labels.get),
+                "speakers": sorted({g["speaker"] for g in window}),
+                "text": " ".join(g["text"].strip() for g in window)
+            }
+            if self.pending is None:
+                self.pending = candidate
+            elif self._overlaps(candidate, self.pending):
+                if candidate["score"] > self.pending["score"]:
+                    self.pending = candidate
+            else:
+                emitted.append(self.pending)
+                self.pending = candidate
+
+        if final and self.pending is not None:
+            emitted.append(self.pending)
+            self.pending = None
+        return emitted
+
+
+class LiveSession:
+    def __init__(self, episode_id, chunks_dir, output_dir, transcriber=None, emotion_processor=None, embedder=None,
+                 index=None, audio_path=None, chunk_duration_seconds=1200, settle_seconds=2.0, scorer=None,
+                 boundary_tolerance=3.0, clock=time.time):
+        """
+        Incremental pipeline for an episode that is still being recorded. Each new chunk
+        flows through merge, turn aggregation, emotion, embedding and candidate scoring,
+        and every output file is only ever appended to.
+
+        Args:
+            episode_id (str): Episode id used in the search index.
+            chunks_dir (str): Directory the recorder writes outputXXX.wav chunks into.
+            output_dir (str): Where the append-only outputs go (see the *_path attributes).
+            transcriber (callable): (index, chunk_path) -> raw WhisperX JSON of the chunk
+                                    (default: WhisperXChunkTranscriber into output_dir/raw).
+            emotion_processor (EmotionProcessor): Classifier run on closed groups
+                                                  (default: one reading audio_path).
+            embedder (callable): list of strings -> (n, d) array (default: the local E5
+                                 model, loaded once).
+            index (HybridSearchIndex): Search index extended with every chunk.
+            audio_path (str): The recording being written, for the default emotion processor.
+            chunk_duration_seconds (int): Length of every chunk but the last.
+            settle_seconds (float): See ChunkWatcher.
+            scorer (HighlightScorer): Candidate scorer.
+            boundary_tolerance (float): BoundaryOptimizer tolerance for candidate edges.
+            clock (callable): Time source for arrival/availability timestamps.
+        """
+        self.episode_id = episode_id
+        self.output_dir = output_dir
+        self.chunk_duration_seconds = chunk_duration_seconds
+        self.clock = clock
+        self.watcher = ChunkWatcher(chunks_dir, settle_seconds, clock)
+        self.transcriber = transcriber or WhisperXChunkTranscriber(os.path.join(output_dir, "raw"))
+        self.embedder = embedder
+        self.index = index if index is not None else HybridSearchIndex()
+        self.scorer = scorer or HighlightScorer()
+        self.boundary_tolerance = boundary_tolerance
+
+        self.merged_path = os.path.join(output_dir, "merged_raw", "segments.jsonl")
+        self.turns_path = os.path.join(output_dir, "processed", "turns.jsonl")
+        self.emotion_path = os.path.join(output_dir, "EmotionProcessed", "complete.jsonl")
+        self.embedding_input_path = os.path.join(output_dir, "outputs", "embedding_input.txt")
+        self.embeddings_path = os.path.join(output_dir, "outputs", "local_text_embeddings.csv")
+        self.candidates_path = os.path.join(output_dir, "candidates.jsonl")
+        for path in (self.merged_path, self.turns_path, self.emotion_path, self.embedding_input_path,
+                     self.candidates_path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # A live session always starts from scratch
+            open(path, "w").close()
+        open(self.embeddings_path, "w").close()
+
+        if emotion_processor is None:
+            from backend.EmotionDetectionModel.combining import EmotionProcessor
+            emotion_processor = EmotionProcessor(
+                json_path=None, audio_path=audio_path, output_dir=os.path.join(output_dir, "EmotionProcessed", "chunks"),
+                results_path=self.emotion_path
+            )
+        self.emotion = emotion_processor
+        self.emotion.reset()
+        self.segments = []
+        self.segment_starts = []
+        self.emotion.segments = self.segments  # grows as chunks are merged
+        self.emotion_offset = 0  # bytes of the emotion JSONL already read back
+        self.turns = SpeakerTurnAggregator()
+        self.chunk_stats = []
+        self.candidates = []
+        self.finished = False
+
+    def _embed(self, texts):
+        if self.embedder is None:
+            from backend.RagPipeline.generateTextEmbeddings import encode_passages, load_text_embedder
+            model = load_text_embedder()
+            self.embedder = lambda batch: encode_passages(model, batch)
+        return np.asarray(self.embedder(texts), dtype=np.float32)
+
+    @staticmethod
+    def _append_jsonl(path, items):
+        with open(path, "a", encoding="utf-8") as f:
+            for item in items:
+                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+
+    def _new_emotion_results(self):
+        with open(self.emotion_path, "r", encoding="utf-8") as f:
+            f.seek(self.emotion_offset)
+            lines = f.read()
+            self.emotion_offset = f.tell()
+        return [json.loads(line) for line in lines.splitlines() if line.strip()]
+
+    def _snap(self, candidate):
+        """Moves candidate edges onto natural boundaries using the words around them."""
+        # Segments are at most a few tens of seconds long, so starting a clip length
+        # earlier is enough to include every word near the candidate start
+        lo = bisect_left(self.segment_starts, candidate["start"] - self.scorer.max_duration - self.boundary_tolerance)
+        hi = bisect_right(self.segment_starts, candidate["end"] + 2 * self.boundary_tolerance)
+        timeline = WordTimeline(self.segments[lo:hi])
+        snapped = BoundaryOptimizer(timeline, tolerance=self.boundary_tolerance).optimize([candidate])[0]
+        return dict(candidate, start=snapped["start"], end=snapped["end"],
+                    start_reason=snapped["start_reason"], end_reason=snapped["end_reason"])
+
+    def _downstream(self, new_segments, final, stats):
+        """Turns, emotion, embeddings and candidates for newly merged segments."""
+        turns = self.turns.add(new_segments)
+        if final:
+            turns += self.turns.flush()
+        self._append_jsonl(self.turns_path, turns)
+
+        self.emotion.process(final=final)
+        results = self._new_emotion_results()
+
+        selected = select_embedding_segments(results)
+        if selected:
+            strings = [embedding_string(seg) for seg in selected]
+            vectors = self._embed(strings)
+            save_embedding_strings_to_txt(strings, self.embedding_input_path, append=True)
+            save_embeddings(vectors, self.embeddings_path, append=True)
+            self.index.extend_episode(self.episode_id, [segment_record(seg, self.episode_id) for seg in selected],
+                                      vectors)
+
+        self.scorer.add(results)
+        candidates = [self._snap(c) for c in self.scorer.candidates(final=final)]
+        available_at = self.clock()
+        for candidate in candidates:
+            candidate["episode"] = self.episode_id
+            candidate["chunk"] = stats["chunk"]
+            candidate["available_at"] = available_at
+            candidate["latency_seconds"] = available_at - stats["arrived_at"]
+        self._append_jsonl(self.candidates_path, candidates)
+        self.candidates.extend(candidates)
+
+        stats.update({
+            "turns": len(turns),
+            "emotion_groups": len(results),
+            "indexed": len(selected),
+            "candidates": len(candidates),
+            "processed_at": available_at,
+            "latency_seconds": available_at - stats["arrived_at"]
+        })
+        self.chunk_stats.append(stats)
+
+    def process_chunk(self, index, chunk_path, arrived_at):
+        raw = self.transcriber(index, chunk_path)
+        new_segments = retimestamp_segments(raw.get("segments", []), index * self.chunk_duration_seconds)
+        self.segments.extend(new_segments)
+        self.segment_starts.extend(seg["start"] for seg in new_segments)
+        self._append_jsonl(self.merged_path, new_segments)
+        self._downstream(new_segments, False, {"chunk": index, "arrived_at": arrived_at, "segments": len(new_segments)})
+
+    def finish(self):
+        """Closes the open turn, the last emotion group and the last candidates."""
+        if self.finished:
+            return
+        last_arrival = self.chunk_stats[-1]["arrived_at"] if self.chunk_stats else self.clock()
+        self._downstream([], True, {"chunk": None, "arrived_at": last_arrival, "segments": 0})
+        self.finished = True
+
+    def poll(self):
+        """
+        Processes every chunk that completed since the last poll, and finishes the
+        session once the recorder's done marker is there and all chunks are in.
+
+        Returns:
+            list: Candidates that became available during this poll.
+        """
+        before = len(self.candidates)
+        for index, chunk_path, arrived_at in self.watcher.poll():
+            self.process_chunk(index, chunk_path, arrived_at)
+        if not self.finished and self.watcher.finished() and not self.watcher.waiting:
+            self.finish()
+        return self.candidates[before:]
+
+    def run(self, poll_interval=5.0):
+        """Polls until the recording is finished. Returns latency_report()."""
+        while not self.finished:
+            for candidate in self.poll():
+                print(f"🎬 {candidate['start']:8.1f}-{candidate['end']:8.1f}s score {candidate['score']:.2f} "
+                      f"[{candidate['emotion']}] after {candidate['latency_seconds']:.1f}s")
+            if not self.finished:
+                time.sleep(poll_interval)
+        return self.latency_report()
+
+    def latency_report(self):
+        """Chunk-arrival-to-candidate latency (seconds) over the session."""
+        latencies = np.array([c["latency_seconds"] for c in self.candidates], dtype=np.float64)
+        chunk_latencies = np.array([s["latency_seconds"] for s in self.chunk_stats if s["chunk"] is not None])
+        return {
+            "chunks": len(chunk_latencies),
+            "candidates": len(latencies),
+            "chunk_latency_mean": float(chunk_latencies.mean()) if len(chunk_latencies) else 0.0,
+            "chunk_latency_max": float(chunk_latencies.max()) if len(chunk_latencies) else 0.0,
+            "candidate_latency_mean": float(latencies.mean()) if len(latencies) else 0.0,
+            "candidate_latency_p95": float(np.percentile(latencies, 95)) if len(latencies) else 0.0,
+            "candidate_latency_max": float(latencies.max()) if len(latencies) else 0.0
+        }
+
+
+if __name__ == "__main__":
+    session = LiveSession(
+        episode_id="live",
+        chunks_dir="backend/WhisperXModel/audio/live_chunks",
+        output_dir="backend/WhisperXModel/output/live",
+        audio_path="backend/WhisperXModel/audio/live_recording.wav"
+    )
+    report = session.run()
+    print(f"✅ {report['candidates']} candidates from {report['chunks']} chunks; latency mean "
+          f"{report['candidate_latency_mean']:.1f}s, max {report['candidate_latency_max']:.1f}s")
@@ -1,7 +1,6 @@
 import os
 import re
 import json
-from langchain_community.document_loaders.youtube import TranscriptFormat, YoutubeLoader
 
 def extract_youtube_transcript_chunks(
     video_url: str,
@@ -17,7 +16,9 @@ def extract_youtube_transcript_chunks(
         print(f"✅ File already exists: {output_file}")
         return output_file
 
-    # Otherwise, process and save transcript
+    # Otherwise, process and save transcript (langchain is only needed on a cache miss)
+    from langchain_community.document_loaders.youtube import TranscriptFormat, YoutubeLoader
+
     loader = YoutubeLoader.from_youtube_url(
         video_url,
         transcript_format=TranscriptFormat.CHUNKS,
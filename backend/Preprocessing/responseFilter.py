@@ -1,24 +1,46 @@
 import re
 import json
-from backend.Preprocessing.sceneDetection import analyze_podcast_segment
-from backend.Preprocessing.chunking import extract_youtube_transcript_chunks
 
-file = extract_youtube_transcript_chunks("https://www.youtube.com/watch?v=9EqrUK7ghho")
 
-# Replace this with your actual LLM response (as string)
-raw_response = analyze_podcast_segment(24, 36, file)
+def extract_first_json(raw_response: str):
+    """Return the first JSON object found in an LLM response, or None."""
+    match = re.search(r'\{[\s\S]*?\}', raw_response)
+    if not match:
+        return None
+    return json.loads(match.group(0))
 
-# Use regex to extract the first JSON object
-match = re.search(r'\{[\s\S]*?\}', raw_response)
 
-if match:
-    json_str = match.group(0)
+def filter_scene_response(video_url: str, start_index: int, end_index: int, output_path: str = "output.json") -> bool:
+    """
+    Fetches the transcript chunks for a video, asks the LLM for the best clip in
+    the given chunk range and saves the JSON part of the answer.
 
-    # Parse and save to a file
-    with open("output.json", "w", encoding="utf-8") as f:
-        json.dump(json.loads(json_str), f, indent=2, ensure_ascii=False)
+    Args:
+        video_url (str): YouTube URL of the episode.
+        start_index (int): First transcript chunk index sent to the LLM.
+        end_index (int): End (exclusive) transcript chunk index.
+        output_path (str): Where the extracted JSON is written.
+    Returns:
+        bool: True if a JSON object was found and saved, False otherwise.
+    """
+    # Imported here so that importing this module does not pull in langchain/Gemini
+    from backend.Preprocessing.sceneDetection import analyze_podcast_segment
+    from backend.Preprocessing.chunking import extract_youtube_transcript_chunks
 
-    print("✅ JSON extracted and saved to output.json")
-else:
-    print("❌ No valid JSON found in the response.")
+    file = extract_youtube_transcript_chunks(video_url)
+    raw_response = analyze_podcast_segment(start_index, end_index, file)
 
+    result = extract_first_json(raw_response)
+    if result is None:
+        print("❌ No valid JSON found in the response.")
+        return False
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+
+    print(f"✅ JSON extracted and saved to {output_path}")
+    return True
+
+
+if __name__ == "__main__":
+    filter_scene_response("https://www.youtube.com/watch?v=9EqrUK7ghho", 24, 36)
@@ -1,11 +1,15 @@
-from langchain_google_genai import GoogleGenerativeAI
-from langchain_core.prompts import PromptTemplate
-from dotenv import load_dotenv
 import json
+from bisect import bisect_left, bisect_right
 
-load_dotenv()  # Load GOOGLE_API_KEY from .env
 
 def analyze_podcast_segment(start_index: int, end_index: int, file_path: str = "youtube_chunks.json") -> dict:
+    # langchain/Gemini are heavy to import, so only load them when a prompt is actually sent
+    from langchain_google_genai import GoogleGenerativeAI
+    from langchain_core.prompts import PromptTemplate
+    from dotenv import load_dotenv
+
+    load_dotenv()  # Load GOOGLE_API_KEY from .env
+
     # Load specified chunk range from JSON
     with open(file_path, "r", encoding="utf-8") as f:
         chunks = json.load(f)[start_index:end_index]
@@ -55,3 +59,29 @@ def analyze_podcast_segment(start_index: int, end_index: int, file_path: str = "
     response = chain.invoke({"transcript": transcript_text})
     
     return response
+
+
+def chunk_range_for_time_range(chunks: list, start_seconds: float, end_seconds: float) -> tuple:
+    """Index range [first, last) of the transcript chunks overlapping [start_seconds, end_seconds)."""
+    chunk_starts = [chunk['metadata'].get('start_seconds', 0) for chunk in chunks]
+    first = max(bisect_right(chunk_starts, start_seconds) - 1, 0)
+    last = max(bisect_left(chunk_starts, end_seconds), first + 1)
+    return first, min(last, len(chunks))
+
+
+def analyze_podcast_topics(chapters: list, file_path: str = "youtube_chunks.json") -> list:
+    """
+    Sends one prompt per topic chapter (see RagPipeline/topicSegmentation.py) instead of
+    fixed chunk windows, so the LLM always sees a whole conversation.
+
+    Returns:
+        list: (chapter, raw LLM response) pairs.
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        chunks = json.load(f)
+
+    responses = []
+    for chapter in chapters:
+        first, last = chunk_range_for_time_range(chunks, chapter['start'], chapter['end'])
+        responses.append((chapter, analyze_podcast_segment(first, last, file_path)))
+    return responses
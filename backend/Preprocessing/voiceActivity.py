@@ -0,0 +1,204 @@
+import subprocess
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+class EnergyZcrDetector:
+    """
+    Frame-level speech detector based on short-time energy and zero-crossing rate.
+
+    Frames are speech when they are louder than energy_threshold_db (dBFS) and their
+    zero-crossing rate stays below max_zcr (broadband hiss and cymbals cross zero far
+    more often than voiced speech). Any callable taking a (n_frames, frame_len) float
+    array and returning a boolean array of length n_frames can be used instead.
+    """
+
+    def __init__(self, energy_threshold_db=-40.0, max_zcr=0.35):
+        self.energy_threshold_db = energy_threshold_db
+        self.max_zcr = max_zcr
+
+    def __call__(self, frames):
+        rms = np.sqrt(np.mean(frames ** 2, axis=1))
+        energy_db = 20.0 * np.log10(rms + 1e-10)
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+        return (energy_db > self.energy_threshold_db) & (zcr < self.max_zcr)
+
+
+def _runs(mask):
+    """Returns (starts, ends, values) of the runs of equal values in a boolean array."""
+    if len(mask) == 0:
+        return np.array([], dtype=int), np.array([], dtype=int), np.array([], dtype=bool)
+    change = np.flatnonzero(mask[1:] != mask[:-1]) + 1
+    starts = np.concatenate(([0], change))
+    ends = np.concatenate((change, [len(mask)]))
+    return starts, ends, mask[starts]
+
+
+class SpeechMask:
+    """Per-frame speech/non-speech decisions for a whole episode, in absolute time."""
+
+    def __init__(self, mask, frame_seconds):
+        self.mask = np.asarray(mask, dtype=bool)
+        self.frame_seconds = frame_seconds
+
+    @property
+    def total_seconds(self):
+        return len(self.mask) * self.frame_seconds
+
+    @property
+    def speech_seconds(self):
+        return float(self.mask.sum()) * self.frame_seconds
+
+    def _frame_range(self, start, end):
+        first = max(int(np.floor(start / self.frame_seconds)), 0)
+        last = min(int(np.ceil(end / self.frame_seconds)), len(self.mask))
+        return first, max(first, last)
+
+    def smoothed(self, min_speech=0.25, min_silence=0.5):
+        """
+        Returns a new mask with silence gaps shorter than min_silence filled in and
+        speech bursts shorter than min_speech removed (both in seconds).
+        """
+        mask = self.mask.copy()
+        starts, ends, values = _runs(mask)
+        lengths = (ends - starts) * self.frame_seconds
+        for s, e in zip(starts[~values & (lengths < min_silence)], ends[~values & (lengths < min_silence)]):
+            if s > 0 and e < len(mask):  # only gaps that sit between two speech runs
+                mask[s:e] = True
+        starts, ends, values = _runs(mask)
+        lengths = (ends - starts) * self.frame_seconds
+        for s, e in zip(starts[values & (lengths < min_speech)], ends[values & (lengths < min_speech)]):
+            mask[s:e] = False
+        return SpeechMask(mask, self.frame_seconds)
+
+    def speech_regions(self):
+        """Returns the (start, end) times in seconds of every speech run."""
+        starts, ends, values = _runs(self.mask)
+        return [(float(s * self.frame_seconds), float(e * self.frame_seconds)) for s, e in zip(starts[values], ends[values])]
+
+    def speech_fraction(self, start, end):
+        """Fraction of [start, end) that is speech (0.0 for an empty range)."""
+        first, last = self._frame_range(start, end)
+        if last <= first:
+            return 0.0
+        return float(self.mask[first:last].mean())
+
+    def trim(self, start, end):
+        """
+        Shrinks [start, end) to its first and last speech frame.
+
+        Returns:
+            tuple or None: The trimmed (start, end), or None if the range has no speech.
+        """
+        first, last = self._frame_range(start, end)
+        speech = np.flatnonzero(self.mask[first:last])
+        if len(speech) == 0:
+            return None
+        trimmed_start = max(start, (first + speech[0]) * self.frame_seconds)
+        trimmed_end = min(end, (first + speech[-1] + 1) * self.frame_seconds)
+        return float(trimmed_start), float(trimmed_end)
+
+    def save(self, path):
+        np.savez_compressed(path, mask=self.mask, frame_seconds=self.frame_seconds)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(data["mask"], float(data["frame_seconds"]))
+
+
+def iter_audio_blocks(audio_path, block_seconds=60.0):
+    """
+    Streams an audio file as 16 kHz mono float32 blocks of block_seconds through an
+    ffmpeg pipe, so a multi-hour episode never has to fit in memory.
+    """
+    cmd = [
+        "ffmpeg", "-v", "error", "-i", audio_path,
+        "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-"
+    ]
+    block_bytes = int(block_seconds * SAMPLE_RATE) * 2
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            data = process.stdout.read(block_bytes)
+            if not data:
+                break
+            yield np.frombuffer(data[:len(data) - len(data) % 2], dtype=np.int16).astype(np.float32) / 32768.0
+    finally:
+        process.stdout.close()
+        process.wait()
+
+
+def compute_speech_mask(blocks, detector=None, frame_seconds=0.03, sample_rate=SAMPLE_RATE):
+    """
+    Runs a frame-level detector over a stream of audio blocks.
+
+    Args:
+        blocks (iterable): 1-D float arrays of consecutive audio, e.g. from iter_audio_blocks.
+        detector (callable): Frame classifier; defaults to EnergyZcrDetector().
+        frame_seconds (float): Frame length in seconds.
+        sample_rate (int): Sample rate of the blocks.
+    Returns:
+        SpeechMask: The per-frame decisions for the whole stream.
+    """
+    if detector is None:
+        detector = EnergyZcrDetector()
+    frame_len = int(round(frame_seconds * sample_rate))
+    pieces = []
+    leftover = np.zeros(0, dtype=np.float32)
+
+    for block in blocks:
+        samples = np.concatenate((leftover, block))
+        n_frames = len(samples) // frame_len
+        if n_frames:
+            frames = samples[:n_frames * frame_len].reshape(n_frames, frame_len)
+            pieces.append(np.asarray(detector(frames), dtype=bool))
+        leftover = samples[n_frames * frame_len:]
+
+    if len(leftover):
+        padded = np.zeros(frame_len, dtype=np.float32)
+        padded[:len(leftover)] = leftover
+        pieces.append(np.asarray(detector(padded[None, :]), dtype=bool))
+
+    mask = np.concatenate(pieces) if pieces else np.zeros(0, dtype=bool)
+    return SpeechMask(mask, frame_len / sample_rate)
+
+
+def detect_speech(audio_path, detector=None, frame_seconds=0.03, block_seconds=60.0):
+    """Computes the smoothed speech mask of an audio file in one streaming pass."""
+    mask = compute_speech_mask(iter_audio_blocks(audio_path, block_seconds), detector, frame_seconds)
+    return mask.smoothed()
+
+
+def flag_silent_segments(segments, speech_mask, min_speech_fraction=0.2):
+    """
+    Marks transcript segments that fall mostly in non-speech audio, which are
+    usually ASR hallucinations over music or silence.
+
+    Sets segment['in_silence'] (bool) and segment['speech_fraction'] on every segment.
+
+    Returns:
+        int: Number of segments flagged.
+    """
+    flagged = 0
+    for segment in segments:
+        fraction = speech_mask.speech_fraction(segment['start'], segment['end'])
+        segment['speech_fraction'] = round(fraction, 3)
+        segment['in_silence'] = fraction < min_speech_fraction
+        flagged += segment['in_silence']
+    return flagged
+
+
+if __name__ == "__main__":
+    audio_path = "backend/WhisperXModel/audio/audio.wav"
+    mask_path = "backend/WhisperXModel/output/speech_mask.npz"
+
+    speech_mask = detect_speech(audio_path)
+    speech_mask.save(mask_path)
+
+    skipped = speech_mask.total_seconds - speech_mask.speech_seconds
+    print(f"✅ Speech mask saved to {mask_path}: {speech_mask.speech_seconds:.1f}s speech, "
+          f"{skipped:.1f}s non-speech of {speech_mask.total_seconds:.1f}s total")
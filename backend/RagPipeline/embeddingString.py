@@ -1,28 +1,37 @@
 import json
 import os
-def generate_embedding_strings_from_segments(json_path: str) -> list[str]:
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    segments = data.get("segments", [])
-    embedding_strings = []
 
+def select_embedding_segments(segments: list[dict], skip_silent: bool = True) -> list[dict]:
+    """Segments that get an embedding string, in order (row i of the embeddings is segment i)."""
+    selected = []
     for seg in segments:
-        speaker = seg.get("speaker", "SPEAKER_UNKNOWN")
-        emotion = seg.get("emotion", {}).get("label", "EMOTION_UNKNOWN")
-        text = seg.get("text", "").strip()
+        if not seg.get("text", "").strip():
+            continue
 
-        if not text:
+        # Segments the VAD flagged as silence/music, or that the emotion pass found no speech in
+        if skip_silent and (seg.get("in_silence") or seg.get("emotion", {}).get("label") == "no_speech"):
             continue
 
-        line = f"[{speaker}] [EMOTION_{emotion}] {text}"
-        embedding_strings.append(line)
+        selected.append(seg)
+    return selected
+
+def embedding_string(seg: dict) -> str:
+    """'[SPEAKER] [EMOTION_label] text' line embedded for one segment."""
+    speaker = seg.get("speaker", "SPEAKER_UNKNOWN")
+    emotion = seg.get("emotion", {}).get("label", "EMOTION_UNKNOWN")
+    text = seg.get("text", "").strip()
+    return f"[{speaker}] [EMOTION_{emotion}] {text}"
+
+def generate_embedding_strings_from_segments(json_path: str, skip_silent: bool = True) -> list[str]:
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
 
-    return embedding_strings
+    segments = select_embedding_segments(data.get("segments", []), skip_silent)
+    return [embedding_string(seg) for seg in segments]
 
-def save_embedding_strings_to_txt(strings: list[str], output_path: str):
+def save_embedding_strings_to_txt(strings: list[str], output_path: str, append: bool = False):
     os.makedirs(os.path.dirname(output_path), exist_ok=True)  # Create parent folders if needed
-    with open(output_path, "w", encoding="utf-8") as f:
+    with open(output_path, "a" if append else "w", encoding="utf-8") as f:
         for line in strings:
             f.write(line + "\n")
 
@@ -1,24 +1,37 @@
 import os
-from sentence_transformers import SentenceTransformer
 
 def load_texts(input_path):
     """Load each line as a separate input string."""
     with open(input_path, 'r', encoding='utf-8') as f:
         return [line.strip() for line in f if line.strip()]
 
-def embed_texts(texts, model_name="intfloat/e5-large"):
-    """Generate embeddings using local SentenceTransformer."""
-    print("📦 Loading model:", model_name)
-    model = SentenceTransformer(model_name)
-
+def load_text_embedder(model_name="intfloat/e5-large", backend="fp32"):
+    """
+    Loads the local SentenceTransformer once, for callers that embed repeatedly.
+
+    backend="int8" or "onnx" selects a quantized / ONNX Runtime model for CPU-only
+    nodes (see Optimization.quantizedInference); "fp32" is the stock model.
+    """
+    print("📦 Loading model:", model_name, f"({backend})")
+    if backend == "fp32":
+        from sentence_transformers import SentenceTransformer  # pulls in torch, so import lazily
+        return SentenceTransformer(model_name)
+    from backend.Optimization.quantizedInference import load_sentence_embedder
+    return load_sentence_embedder(model_name, backend)
+
+def encode_passages(model, texts):
+    """Embeds texts as E5 passages with an already loaded model."""
     # E5 models require "query:" or "passage:" prefix
     texts = [f"passage: {text}" for text in texts]
-    embeddings = model.encode(texts, convert_to_tensor=False)
-    return embeddings
+    return model.encode(texts, convert_to_tensor=False)
+
+def embed_texts(texts, model_name="intfloat/e5-large", backend="fp32"):
+    """Generate embeddings using local SentenceTransformer (see load_text_embedder for backend)."""
+    return encode_passages(load_text_embedder(model_name, backend), texts)
 
-def save_embeddings(embeddings, output_path):
-    """Save embeddings as a list of vectors."""
-    with open(output_path, 'w', encoding='utf-8') as f:
+def save_embeddings(embeddings, output_path, append=False):
+    """Save embeddings as a list of vectors (append=True adds them to an existing file)."""
+    with open(output_path, 'a' if append else 'w', encoding='utf-8') as f:
         for vec in embeddings:
             f.write(','.join(map(str, vec)) + '\n')
     print(f"✅ Saved {len(embeddings)} embeddings to {output_path}")
@@ -0,0 +1,333 @@
+import json
+import re
+from array import array
+
+import numpy as np
+
+from backend.RagPipeline.embeddingString import select_embedding_segments
+
+# Numbers keep their decimals and percent sign so "61%" or "2.5" match exactly
+TOKEN_PATTERN = re.compile(r"\d+(?:[.,]\d+)*%?|[a-z]+(?:'[a-z]+)?")
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def segment_record(seg, episode_id):
+    """
+    Search record for one emotion-processed segment. Which segments get indexed is
+    decided by embeddingString.select_embedding_segments, so records line up row for
+    row with the embeddings.
+    """
+    return {
+        "episode": episode_id,
+        "text": seg.get("text", "").strip(),
+        "speaker": seg.get("speaker", "SPEAKER_UNKNOWN"),
+        "emotion": seg.get("emotion", {}).get("label", "EMOTION_UNKNOWN"),
+        "start": seg["start"],
+        "end": seg["end"]
+    }
+
+
+def load_segment_records(json_path, episode_id):
+    """
+    Reads an emotion-processed segments file (e.g. complete.json) into search records,
+    one per embedding row written by generateTextEmbeddings (same segment selection).
+
+    Returns:
+        list: Dicts with 'episode', 'text', 'speaker', 'emotion', 'start' and 'end'.
+    """
+    with open(json_path, "r", encoding="utf-8") as f:
+        segments = json.load(f).get("segments", [])
+
+    return [segment_record(seg, episode_id) for seg in select_embedding_segments(segments)]
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """
+    Fuses several ranked lists of doc ids: score(d) = sum over lists of 1 / (k + rank).
+
+    Returns:
+        list: (doc_id, fused_score) pairs, best first.
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(fused.items(), key=lambda item: -item[1])
+
+
+def _top_k(scores, candidates, k):
+    """Indices into candidates of the k best scores, best first."""
+    if len(candidates) == 0 or k <= 0:
+        return candidates[:0]
+    if len(candidates) > k:
+        part = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(len(candidates))
+    return candidates[part[np.argsort(-scores[part], kind="stable")]]
+
+
+class _Column:
+    """Append-only NumPy column (or matrix of rows) whose capacity doubles as it grows."""
+
+    def __init__(self, dtype, width=None):
+        self.data = np.empty((16,) if width is None else (16, width), dtype=dtype)
+        self.size = 0
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self.data.dtype)
+        needed = self.size + len(values)
+        if needed > len(self.data):
+            grown = np.empty((max(needed, 2 * len(self.data)),) + self.data.shape[1:], dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:needed] = values
+        self.size = needed
+
+    @property
+    def values(self):
+        return self.data[:self.size]
+
+
+class HybridSearchIndex:
+    """
+    BM25 inverted index over segment texts, optionally fused with dense embeddings.
+
+    Postings are stored per term as two compact uint32 arrays (doc ids and term
+    frequencies) and the per-document metadata and embeddings as append-only NumPy
+    columns, so adding an episode only touches its own documents and the next query
+    pays nothing for it. Re-indexing or removing an episode tombstones its old
+    documents; call compact() once enough of them pile up.
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_ids = {}
+        self.postings = []          # term id -> (array('I') doc ids, array('I') term freqs)
+        self.records = []           # doc id -> record dict
+        self.episode_docs = {}      # episode id -> list of doc ids
+        self.columns = {
+            "start": _Column(np.float64),
+            "end": _Column(np.float64),
+            "length": _Column(np.float64),
+            "alive": _Column(bool),
+            "speaker": _Column(np.int32),
+            "emotion": _Column(np.int32),
+            "episode": _Column(np.int32)
+        }
+        self.codes = {"speaker": {}, "emotion": {}, "episode": {}}  # metadata value -> code, in order of appearance
+        self.embeddings = None      # _Column of normalised rows, created with the first embeddings
+        self.n_alive = 0
+        self.alive_length = 0.0     # total token count of live documents, for avgdl
+        self._postings_cache = {}   # term id -> (doc ids, term freqs) as NumPy arrays
+
+    def __len__(self):
+        return self.n_alive
+
+    def add_episode(self, episode_id, records, embeddings=None):
+        """
+        Indexes (or re-indexes) one episode.
+
+        Args:
+            episode_id (str): Episode the records belong to.
+            records (list): Dicts with 'text', 'speaker', 'emotion', 'start', 'end'.
+            embeddings (np.ndarray, optional): (len(records), dim) dense vectors,
+                                               e.g. from generateTextEmbeddings.embed_texts.
+        """
+        if episode_id in self.episode_docs:
+            self.remove_episode(episode_id)
+        self.episode_docs[episode_id] = []
+        self.extend_episode(episode_id, records, embeddings)
+
+    def _code(self, key, value):
+        codes = self.codes[key]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes)
+        return code
+
+    def extend_episode(self, episode_id, records, embeddings=None):
+        """
+        Appends records to an episode without re-indexing what is already there (live
+        mode adds each chunk's segments as they are processed). Embeddings must be given
+        for every batch or for none.
+        """
+        if embeddings is not None and len(embeddings) != len(records):
+            raise ValueError(f"Got {len(embeddings)} embeddings for {len(records)} records")
+        self.episode_docs.setdefault(episode_id, [])
+        if not records:
+            return
+
+        first_doc = len(self.records)
+        lengths = []
+        for offset, record in enumerate(records):
+            doc_id = first_doc + offset
+            tokens = tokenize(record["text"])
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                term_id = self.term_ids.get(token)
+                if term_id is None:
+                    term_id = self.term_ids[token] = len(self.postings)
+                    self.postings.append((array("I"), array("I")))
+                docs, tfs = self.postings[term_id]
+                docs.append(doc_id)
+                tfs.append(tf)
+                self._postings_cache.pop(term_id, None)
+            self.records.append(dict(record, episode=episode_id))
+            lengths.append(len(tokens))
+
+        columns = self.columns
+        columns["start"].extend([r["start"] for r in records])
+        columns["end"].extend([r["end"] for r in records])
+        columns["length"].extend(lengths)
+        columns["alive"].extend(np.ones(len(records), dtype=bool))
+        columns["speaker"].extend([self._code("speaker", r["speaker"]) for r in records])
+        columns["emotion"].extend([self._code("emotion", r["emotion"]) for r in records])
+        columns["episode"].extend(np.full(len(records), self._code("episode", episode_id)))
+        self.n_alive += len(records)
+        self.alive_length += float(sum(lengths))
+        self.episode_docs[episode_id].extend(range(first_doc, first_doc + len(records)))
+
+        if embeddings is not None:
+            vectors = np.asarray(embeddings, dtype=np.float32)
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            if self.embeddings is None:
+                self.embeddings = _Column(np.float32, vectors.shape[1])
+            self.embeddings.extend(vectors / np.maximum(norms, 1e-12))
+
+    def remove_episode(self, episode_id):
+        doc_ids = np.array(self.episode_docs.pop(episode_id, []), dtype=np.int64)
+        alive = self.columns["alive"].values
+        doc_ids = doc_ids[alive[doc_ids]]
+        alive[doc_ids] = False
+        self.n_alive -= len(doc_ids)
+        self.alive_length -= float(self.columns["length"].values[doc_ids].sum())
+
+    def compact(self):
+        """Rebuilds the index without tombstoned documents."""
+        episodes = list(self.episode_docs.items())
+        old_records = self.records
+        old_embeddings = self._arrays()["embeddings"]
+        self.__init__(self.k1, self.b)
+        for episode_id, doc_ids in episodes:
+            vectors = old_embeddings[doc_ids] if old_embeddings is not None else None
+            self.add_episode(episode_id, [old_records[d] for d in doc_ids], vectors)
+
+    def _arrays(self):
+        """NumPy views of the per-document metadata (no copies, so always current)."""
+        arrays = {key: column.values for key, column in self.columns.items()}
+        arrays["lengths"] = arrays.pop("length")
+        arrays["avgdl"] = self.alive_length / self.n_alive if self.n_alive else 0.0
+        for key, codes in self.codes.items():
+            arrays[f"{key}_codes"] = codes
+        # Dense search needs a vector for every document (every batch came with embeddings)
+        complete = self.embeddings is not None and self.embeddings.size == len(self.records)
+        arrays["embeddings"] = self.embeddings.values if complete else None
+        return arrays
+
+    def _term_postings(self, term_id):
+        cached = self._postings_cache.get(term_id)
+        if cached is None:
+            docs, tfs = self.postings[term_id]
+            cached = (np.array(docs, dtype=np.int64), np.array(tfs, dtype=np.float64))
+            self._postings_cache[term_id] = cached
+        return cached
+
+    def filter_mask(self, speakers=None, emotions=None, episodes=None, start=None, end=None):
+        """Boolean mask over all doc ids of live documents matching every given filter."""
+        arrays = self._arrays()
+        mask = arrays["alive"].copy()
+        for values, key in ((speakers, "speaker"), (emotions, "emotion"), (episodes, "episode")):
+            if values is not None:
+                lookup = np.zeros(len(arrays[f"{key}_codes"]), dtype=bool)
+                lookup[[arrays[f"{key}_codes"][v] for v in values if v in arrays[f"{key}_codes"]]] = True
+                mask &= lookup[arrays[key]]
+        if start is not None:
+            mask &= arrays["end"] > start
+        if end is not None:
+            mask &= arrays["start"] < end
+        return mask
+
+    def bm25_scores(self, query):
+        """Dense (n_docs,) BM25 score array for a query, ignoring filters."""
+        arrays = self._arrays()
+        n_docs = len(self.records)
+        scores = np.zeros(n_docs, dtype=np.float64)
+        n_alive = self.n_alive
+        if n_alive == 0:
+            return scores
+        for token in set(tokenize(query)):
+            term_id = self.term_ids.get(token)
+            if term_id is None:
+                continue
+            docs, tfs = self._term_postings(term_id)
+            df = np.count_nonzero(arrays["alive"][docs])
+            if df == 0:
+                continue
+            idf = np.log(1.0 + (n_alive - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * arrays["lengths"][docs] / arrays["avgdl"])
+            scores += np.bincount(docs, weights=idf * tfs * (self.k1 + 1.0) / (tfs + norm), minlength=n_docs)
+        return scores
+
+    def search(self, query, query_embedding=None, top_k=10, candidates=100, rrf_k=60,
+               speakers=None, emotions=None, episodes=None, start=None, end=None):
+        """
+        Hybrid search: BM25 and (if a query embedding is given) cosine similarity each
+        rank the filtered documents, and the two top-`candidates` lists are fused with
+        reciprocal rank fusion.
+
+        Args:
+            query (str): Free-text query.
+            query_embedding (np.ndarray, optional): Dense vector for the query (E5 models
+                                                    expect a "query: " prefix when encoding).
+            top_k (int): Number of results to return.
+            candidates (int): Depth of each ranked list before fusion.
+            rrf_k (int): RRF constant.
+            speakers, emotions, episodes (iterable, optional): Allowed metadata values.
+            start, end (float, optional): Only segments overlapping [start, end).
+        Returns:
+            list: Record dicts with 'doc_id', 'score', 'bm25' and (if used) 'dense' added.
+        """
+        mask = self.filter_mask(speakers, emotions, episodes, start, end)
+        allowed = np.flatnonzero(mask)
+
+        bm25 = self.bm25_scores(query)
+        matched = allowed[bm25[allowed] > 0]
+        lexical_ranking = _top_k(bm25[matched], matched, candidates)
+        rankings = [lexical_ranking.tolist()]
+
+        q = None
+        embeddings = self._arrays()["embeddings"]
+        if query_embedding is not None and embeddings is not None:
+            q = np.asarray(query_embedding, dtype=np.float32).ravel()
+            q = q / max(np.linalg.norm(q), 1e-12)
+            dense_scores = (embeddings @ q)[allowed]  # a full mat-vec beats gathering rows first
+            dense_ranking = _top_k(dense_scores, allowed, candidates)
+            rankings.append(dense_ranking.tolist())
+
+        results = []
+        for doc_id, fused in reciprocal_rank_fusion(rankings, rrf_k)[:top_k]:
+            result = dict(self.records[doc_id], doc_id=doc_id, score=fused, bm25=float(bm25[doc_id]))
+            if q is not None:
+                result["dense"] = float(embeddings[doc_id] @ q)
+            results.append(result)
+        return results
+
+
+if __name__ == "__main__":
+    import sys
+
+    index = HybridSearchIndex()
+    index.add_episode(
+        "9EqrUK7ghho",
+        load_segment_records("backend/WhisperXModel/output/EmotionProcessed/complete.json", "9EqrUK7ghho")
+    )
+    query = " ".join(sys.argv[1:]) or "61% of people"
+    for hit in index.search(query, top_k=5):
+        print(f"[{hit['speaker']}] [EMOTION_{hit['emotion']}] ({hit['start']:.1f}-{hit['end']:.1f}s) "
+              f"bm25={hit['bm25']:.2f}: {hit['text']}")
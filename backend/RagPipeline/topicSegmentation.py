@@ -0,0 +1,174 @@
+import json
+from bisect import bisect_left
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from backend.RagPipeline.embeddingString import select_embedding_segments
+
+
+def load_embeddings(csv_path):
+    """Reads the comma-separated vectors written by generateTextEmbeddings.save_embeddings."""
+    return np.loadtxt(csv_path, delimiter=",", dtype=np.float32, ndmin=2)
+
+
+def gap_similarities(embeddings, block_size=5):
+    """
+    TextTiling-style cohesion curve: for every gap g between segment g-1 and g, the
+    cosine similarity of the mean embedding of the block_size segments before the gap
+    and the block_size segments after it (blocks shrink at the episode edges).
+
+    Returns:
+        np.ndarray: (n - 1,) similarities; entry g - 1 is the gap before segment g.
+    """
+    vectors = np.asarray(embeddings, dtype=np.float64)
+    n = len(vectors)
+    if n < 2:
+        return np.zeros(0)
+    vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    cumulative = np.vstack([np.zeros(vectors.shape[1]), np.cumsum(vectors, axis=0)])
+
+    gaps = np.arange(1, n)
+    left = cumulative[gaps] - cumulative[np.maximum(gaps - block_size, 0)]
+    right = cumulative[np.minimum(gaps + block_size, n)] - cumulative[gaps]
+    norms = np.linalg.norm(left, axis=1) * np.linalg.norm(right, axis=1)
+    return np.sum(left * right, axis=1) / np.maximum(norms, 1e-12)
+
+
+def depth_scores(similarities, reach=5):
+    """
+    How far each gap dips below the highest similarity within `reach` gaps on either
+    side; deep dips are topic shifts.
+    """
+    n = len(similarities)
+    if n == 0:
+        return np.zeros(0)
+    padded = np.pad(similarities, reach, mode="constant", constant_values=-np.inf)
+    windows = sliding_window_view(padded, reach)
+    left_peak = np.maximum(windows[:n].max(axis=1), similarities)
+    right_peak = np.maximum(windows[reach + 1:reach + 1 + n].max(axis=1), similarities)
+    return (left_peak - similarities) + (right_peak - similarities)
+
+
+class TopicSegmenter:
+    def __init__(self, block_size=5, reach=5, min_topic_seconds=90.0, max_topic_seconds=600.0, cutoff=0.5):
+        """
+        Args:
+            block_size (int): Segments averaged on each side of a gap.
+            reach (int): Gaps searched on each side for the depth score peaks.
+            min_topic_seconds (float): Boundaries closer than this to another boundary or
+                                       to the episode edges are dropped.
+            max_topic_seconds (float): Longer chapters are split at their deepest gap.
+            cutoff (float): Boundaries need a depth above mean + cutoff * std of all valley
+                            depths. TextTiling's mean - std / 2 lets through far too many
+                            valleys on short, noisy podcast segments.
+        """
+        self.block_size = block_size
+        self.reach = reach
+        self.min_topic_seconds = min_topic_seconds
+        self.max_topic_seconds = max_topic_seconds
+        self.cutoff = cutoff
+
+    def boundaries(self, embeddings, starts, ends):
+        """
+        Indices of the segments that begin a new topic (excluding segment 0).
+
+        Args:
+            embeddings (np.ndarray): (n, d) segment embeddings.
+            starts, ends (np.ndarray): (n,) segment times in seconds.
+        """
+        starts = np.asarray(starts, dtype=np.float64)
+        ends = np.asarray(ends, dtype=np.float64)
+        similarities = gap_similarities(embeddings, self.block_size)
+        depth = depth_scores(similarities, self.reach)
+        if len(depth) == 0:
+            return []
+
+        inner = similarities[1:-1]
+        local_min = np.zeros(len(similarities), dtype=bool)
+        local_min[1:-1] = (inner <= similarities[:-2]) & (inner <= similarities[2:])
+        if not local_min.any():
+            return []
+        valleys = depth[local_min]
+        threshold = valleys.mean() + self.cutoff * valleys.std()
+        candidates = np.flatnonzero(local_min & (depth > threshold)) + 1
+
+        episode_start, episode_end = starts[0], ends[-1]
+        chosen, chosen_times = [], []  # chosen_times kept sorted for bisect
+        for segment in candidates[np.argsort(-depth[candidates - 1], kind="stable")]:
+            t = starts[segment]
+            if t - episode_start < self.min_topic_seconds or episode_end - t < self.min_topic_seconds:
+                continue
+            pos = bisect_left(chosen_times, t)
+            if pos > 0 and t - chosen_times[pos - 1] < self.min_topic_seconds:
+                continue
+            if pos < len(chosen_times) and chosen_times[pos] - t < self.min_topic_seconds:
+                continue
+            chosen_times.insert(pos, t)
+            chosen.append(int(segment))
+        chosen.sort()
+
+        # Split over-long chapters at their deepest remaining gap
+        edges = [0] + chosen + [len(starts)]
+        result = []
+        for first, last in zip(edges[:-1], edges[1:]):
+            result.extend(self._split_long(depth, starts, ends, first, last))
+        return [b for b in result if b != 0]
+
+    def _split_long(self, depth, starts, ends, first, last):
+        """Boundaries for the chapter [first, last), recursively splitting it if too long."""
+        if ends[last - 1] - starts[first] <= self.max_topic_seconds or last - first < 2:
+            return [first]
+        inner = np.arange(first + 1, last)
+        fits = (starts[inner] - starts[first] >= self.min_topic_seconds) & (ends[last - 1] - starts[inner] >= self.min_topic_seconds)
+        if not fits.any():
+            return [first]
+        inner = inner[fits]
+        split = int(inner[np.argmax(depth[inner - 1])])
+        return self._split_long(depth, starts, ends, first, split) + self._split_long(depth, starts, ends, split, last)
+
+    def chapters(self, segments, embeddings):
+        """
+        Splits an episode into topic chapters.
+
+        Args:
+            segments (list): Segments aligned row-for-row with embeddings (see
+                             embeddingString.select_embedding_segments).
+            embeddings (np.ndarray): (len(segments), d) vectors.
+        Returns:
+            list: Dicts with 'start', 'end', 'first_segment', 'last_segment', 'n_segments'.
+        """
+        if len(segments) != len(embeddings):
+            raise ValueError(f"Got {len(embeddings)} embeddings for {len(segments)} segments")
+        if not segments:
+            return []
+        starts = np.array([s["start"] for s in segments], dtype=np.float64)
+        ends = np.array([s["end"] for s in segments], dtype=np.float64)
+        edges = [0] + self.boundaries(embeddings, starts, ends) + [len(segments)]
+        return [
+            {
+                "start": float(starts[first]),
+                "end": float(ends[last - 1]),
+                "first_segment": first,
+                "last_segment": last - 1,
+                "n_segments": last - first
+            }
+            for first, last in zip(edges[:-1], edges[1:])
+        ]
+
+
+if __name__ == "__main__":
+    input_json = "backend/WhisperXModel/output/EmotionProcessed/complete.json"
+    embeddings_csv = "backend/RagPipeline/outputs/local_text_embeddings.csv"
+    output_json = "backend/RagPipeline/outputs/chapters.json"
+
+    with open(input_json, "r", encoding="utf-8") as f:
+        episode_segments = select_embedding_segments(json.load(f)["segments"])
+
+    topic_chapters = TopicSegmenter().chapters(episode_segments, load_embeddings(embeddings_csv))
+    with open(output_json, "w", encoding="utf-8") as f:
+        json.dump(topic_chapters, f, indent=2)
+
+    print(f"✅ Saved {len(topic_chapters)} chapters to {output_json}")
+    for chapter in topic_chapters:
+        print(f"{chapter['start']:8.1f} - {chapter['end']:8.1f}s ({chapter['n_segments']} segments)")
@@ -3,33 +3,65 @@
 import subprocess
 import os
 
-from dotenv import load_dotenv
 
-# Load environment variables from .env
-load_dotenv()
+def transcribe_chunk(input_path, output_dir, model="medium", chunk_size=4, language=None, diarize=True):
+    """
+    Runs the whisperx CLI (with diarization unless diarize=False) on one audio file.
 
-chunks_dir = "backend/WhisperXModel/audio"
-output_base = "output"  # base directory to store results
+    Args:
+        language (str, optional): Skips whisperx language detection when given.
+    Returns:
+        str: Path of the JSON transcript whisperx wrote into output_dir.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    command = [
+        "whisperx",
+        "--model", model,
+        "--chunk_size", str(chunk_size),
+        "--output_dir", output_dir
+    ]
+    if language:
+        command += ["--language", language]
+    if diarize:
+        from dotenv import load_dotenv
 
-# Ensure output base directory exists
-os.makedirs(output_base, exist_ok=True)
+        # Load environment variables from .env (the Hugging Face token for pyannote)
+        load_dotenv()
+        command += ["--diarize", "--hf_token", os.getenv("HUGGING_FACE_TOKEN")]
+    command.append(input_path)
 
-for file in sorted(os.listdir(chunks_dir)):
-    if file.endswith(".wav"):
-        input_path = os.path.join(chunks_dir, file)
-        filename_without_ext = os.path.splitext(file)[0]
-        output_dir = os.path.join(output_base, filename_without_ext)
+    subprocess.run(command, check=True)
+    return os.path.join(output_dir, os.path.splitext(os.path.basename(input_path))[0] + ".json")
 
-        os.makedirs(output_dir, exist_ok=True)
 
-        command = [
-            "whisperx",
-            "--model", "medium",
-            "--chunk_size", "4",
-            "--diarize",
-            "--hf_token", os.getenv("HUGGING_FACE_TOKEN"),
-            "--output_dir", output_dir,
-            input_path
-        ]
+def run_diarization(chunks_dir, output_base="output", model="medium", chunk_size=4):
+    """
+    Runs the whisperx CLI (with diarization) over every .wav file in chunks_dir,
+    writing each result to output_base/<file name without extension>/.
 
-        subprocess.run(command, check=True)
+    Args:
+        chunks_dir (str): Directory containing the audio chunks.
+        output_base (str): Base directory to store results.
+        model (str): Whisper model size passed to whisperx.
+        chunk_size (int): whisperx --chunk_size value.
+    Returns:
+        list: The output directories that were written.
+    """
+    # Ensure output base directory exists
+    os.makedirs(output_base, exist_ok=True)
+
+    output_dirs = []
+    for file in sorted(os.listdir(chunks_dir)):
+        if file.endswith(".wav"):
+            input_path = os.path.join(chunks_dir, file)
+            filename_without_ext = os.path.splitext(file)[0]
+            output_dir = os.path.join(output_base, filename_without_ext)
+
+            transcribe_chunk(input_path, output_dir, model, chunk_size)
+            output_dirs.append(output_dir)
+
+    return output_dirs
+
+
+if __name__ == "__main__":
+    run_diarization("backend/WhisperXModel/audio")
@@ -3,7 +3,7 @@ import os
 import re
 import time
 
-def merge_and_retimestamp_raw_jsons(base_input_raw_dir, intermediate_output_filename, chunk_duration_seconds=1200):
+def merge_and_retimestamp_raw_jsons(base_input_raw_dir, intermediate_output_filename, chunk_duration_seconds=1200, speech_mask=None):
     """
     Reads multiple raw WhisperX output JSON files (outputXXX.json) from subdirectories
     in base_input_raw_dir, adjusts their timestamps based on their order (assuming
@@ -16,6 +16,10 @@ def merge_and_retimestamp_raw_jsons(base_input_raw_dir, intermediate_output_file
                                             single merged JSON output.
         chunk_duration_seconds (int): The duration of each audio chunk in seconds
                                       (default is 1200 for 20 minutes).
+        speech_mask (SpeechMask, optional): Episode speech mask from
+                                            Preprocessing.voiceActivity. When given, segments
+                                            lying mostly in non-speech audio (likely ASR
+                                            hallucinations) get 'in_silence': True.
     Returns:
         bool: True if merging was successful and a file was created, False otherwise.
     """
@@ -97,6 +101,11 @@ def merge_and_retimestamp_raw_jsons(base_input_raw_dir, intermediate_output_file
         print("No segments were collected after processing all raw files. No merged output will be created.")
         return False
     else:
+        if speech_mask is not None:
+            from backend.Preprocessing.voiceActivity import flag_silent_segments
+            flagged = flag_silent_segments(all_raw_segments_merged, speech_mask)
+            print(f"Flagged {flagged} of {len(all_raw_segments_merged)} segments as lying in non-speech audio.")
+
         # Save the single merged raw data with adjusted timestamps
         try:
             merged_output_data = {"segments": all_raw_segments_merged}
@@ -110,6 +119,9 @@ def merge_and_retimestamp_raw_jsons(base_input_raw_dir, intermediate_output_file
 
 # --- How to use this function ---
 if __name__ == "__main__":
+    from backend.Preprocessing.voiceActivity import SpeechMask
+
+    mask_path = "backend/WhisperXModel/output/speech_mask.npz"
     base_raw_input_path = "backend/WhisperXModel/output/raw/"
     merged_raw_output_path = "backend/WhisperXModel/output/merged_raw/"
     merged_raw_output_filename = os.path.join(merged_raw_output_path, "full_audio_raw_transcription_with_absolute_timestamps.json")
@@ -118,7 +130,8 @@ if __name__ == "__main__":
     success = merge_and_retimestamp_raw_jsons(
         base_input_raw_dir=base_raw_input_path,
         intermediate_output_filename=merged_raw_output_filename,
-        chunk_duration_seconds=1200 # Set this to your chunk duration (e.g., 20 * 60 for 20 minutes)
+        chunk_duration_seconds=1200, # Set this to your chunk duration (e.g., 20 * 60 for 20 minutes)
+        speech_mask=SpeechMask.load(mask_path) if os.path.exists(mask_path) else None
     )
 
     if success:
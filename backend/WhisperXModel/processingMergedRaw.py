@@ -3,7 +3,22 @@ import os
 import re
 import time
 
-def merge_and_retimestamp_raw_jsons(base_input_raw_dir, intermediate_output_filename, chunk_duration_seconds=1200):
+def retimestamp_segments(segments, offset):
+    """
+    Shifts one chunk's segments (and their words) by offset seconds, in place.
+
+    Returns:
+        list: The same segments, now with absolute timestamps.
+    """
+    for segment in segments:
+        segment['start'] += offset
+        segment['end'] += offset
+        for word in segment.get('words', []):
+            word['start'] += offset
+            word['end'] += offset
+    return segments
+
+def merge_and_retimestamp_raw_jsons(base_input_raw_dir, intermediate_output_filename, chunk_duration_seconds=1200, speech_mask=None):
     """
     Reads multiple raw WhisperX output JSON files (outputXXX.json) from subdirectories
     in base_input_raw_dir, adjusts their timestamps based on their order (assuming
@@ -16,6 +31,10 @@ def merge_and_retimestamp_raw_jsons(base_input_raw_dir, intermediate_output_file
                                             single merged JSON output.
         chunk_duration_seconds (int): The duration of each audio chunk in seconds
                                       (default is 1200 for 20 minutes).
+        speech_mask (SpeechMask, optional): Episode speech mask from
+                                            Preprocessing.voiceActivity. When given, segments
+                                            lying mostly in non-speech audio (likely ASR
+                                            hallucinations) get 'in_silence': True.
     Returns:
         bool: True if merging was successful and a file was created, False otherwise.
     """
@@ -66,21 +85,8 @@ def merge_and_retimestamp_raw_jsons(base_input_raw_dir, intermediate_output_file
             with open(input_full_path, 'r', encoding='utf-8') as f:
                 chunk_data = json.load(f)
             
-            segments_in_chunk = chunk_data.get("segments", [])
-            
             # Apply offset to all timestamps in the current chunk's segments
-            for segment in segments_in_chunk:
-                # Adjust segment start/end
-                segment['start'] += current_offset
-                segment['end'] += current_offset
-                
-                # Adjust word start/end if words data exists
-                if 'words' in segment:
-                    for word in segment['words']:
-                        word['start'] += current_offset
-                        word['end'] += current_offset
-                
-                all_raw_segments_merged.append(segment)
+            all_raw_segments_merged.extend(retimestamp_segments(chunk_data.get("segments", []), current_offset))
             
             files_processed_count += 1
 
@@ -97,6 +103,11 @@ def merge_and_retimestamp_raw_jsons(base_input_raw_dir, intermediate_output_file
         print("No segments were collected after processing all raw files. No merged output will be created.")
         return False
     else:
+        if speech_mask is not None:
+            from backend.Preprocessing.voiceActivity import flag_silent_segments
+            flagged = flag_silent_segments(all_raw_segments_merged, speech_mask)
+            print(f"Flagged {flagged} of {len(all_raw_segments_merged)} segments as lying in non-speech audio.")
+
         # Save the single merged raw data with adjusted timestamps
         try:
             merged_output_data = {"segments": all_raw_segments_merged}
@@ -108,6 +119,58 @@ def merge_and_retimestamp_raw_jsons(base_input_raw_dir, intermediate_output_file
             print(f"Error saving merged raw transcription: {e}")
             return False
 
+class SpeakerTurnAggregator:
+    """
+    Incremental form of aggregate_speaker_turns: segments are fed in order, possibly
+    across several calls (e.g. one per live chunk), and a turn is only returned once
+    a different speaker starts, so a turn running over a chunk boundary stays open.
+    """
+
+    def __init__(self):
+        self.current_turn = None
+
+    def add(self, segments):
+        """
+        Feeds the next segments. Segments missing a 'speaker' key are dropped (ignored).
+
+        Returns:
+            list: The turns closed by these segments, each with 'speaker', 'text',
+                  'start' and 'end'.
+        """
+        closed_turns = []
+        for segment in segments:
+            # Fail check: Drop segment if 'speaker' key is missing
+            if "speaker" not in segment:
+                print(f"Warning: Dropping segment due to missing 'speaker' key during aggregation: {segment.get('text', 'No text')}")
+                continue # Skip to the next segment
+
+            segment_speaker = segment["speaker"]
+            segment_text = segment["text"].strip()
+
+            if self.current_turn is not None and segment_speaker == self.current_turn["speaker"]:
+                # If the same speaker, append text and update end time
+                self.current_turn["text"] += " " + segment_text
+                self.current_turn["end"] = segment["end"]
+                continue
+
+            # A different speaker (or the first valid segment): close the current turn and start a new one
+            if self.current_turn is not None:
+                closed_turns.append(self.current_turn)
+            self.current_turn = {
+                "speaker": segment_speaker,
+                "text": segment_text,
+                "start": segment["start"],
+                "end": segment["end"]
+            }
+        return closed_turns
+
+    def flush(self):
+        """Closes and returns the open turn (as a list, empty if there is none)."""
+        if self.current_turn is None:
+            return []
+        turn, self.current_turn = self.current_turn, None
+        return [turn]
+
 def aggregate_speaker_turns(segments_data):
     """
     Aggregates consecutive text segments by the same speaker into single turns.
@@ -127,50 +190,14 @@ def aggregate_speaker_turns(segments_data):
         print("No segments found in the input data for aggregation.")
         return []
 
-    aggregated_turns = []
-    current_turn = None # Initialize as None, will be set once the first valid segment is found
-
-    for segment in segments:
-        # Fail check: Drop segment if 'speaker' key is missing
-        if "speaker" not in segment:
-            print(f"Warning: Dropping segment due to missing 'speaker' key during aggregation: {segment.get('text', 'No text')}")
-            continue # Skip to the next segment
-
-        segment_speaker = segment["speaker"]
-        segment_text = segment["text"].strip()
-        segment_start = segment["start"]
-        segment_end = segment["end"]
-
-        if current_turn is None:
-            # This is the first valid segment found, initialize current_turn
-            current_turn = {
-                "speaker": segment_speaker,
-                "text": segment_text,
-                "start": segment_start,
-                "end": segment_end
-            }
-        elif segment_speaker == current_turn["speaker"]:
-            # If the same speaker, append text and update end time
-            current_turn["text"] += " " + segment_text
-            current_turn["end"] = segment_end
-        else:
-            # If a different speaker, save the current turn and start a new one
-            aggregated_turns.append(current_turn)
-            current_turn = {
-                "speaker": segment_speaker,
-                "text": segment_text,
-                "start": segment_start,
-                "end": segment_end
-            }
-    
-    # After the loop, if there's an active current_turn, add it
-    if current_turn is not None:
-        aggregated_turns.append(current_turn)
-        
-    return aggregated_turns
+    aggregator = SpeakerTurnAggregator()
+    # After the last segment, the still-open turn is added too
+    return aggregator.add(segments) + aggregator.flush()
 
 # --- Main Execution Flow ---
 if __name__ == "__main__":
+    from backend.Preprocessing.voiceActivity import SpeechMask
+
     total_pipeline_start_time = time.time()
 
     # --- Step 1: Merge and Re-timestamp Raw JSONs ---
@@ -181,12 +208,16 @@ if __name__ == "__main__":
     # Assuming 20-minute chunks
     CHUNK_DURATION_SECONDS = 20 * 60 
 
+    # Written by Preprocessing.voiceActivity; without it no segment is flagged as silent
+    mask_path = "backend/WhisperXModel/output/speech_mask.npz"
+
     print("\n--- Starting full transcription pipeline ---")
 
     merge_success = merge_and_retimestamp_raw_jsons(
         base_input_raw_dir=base_raw_input_path,
         intermediate_output_filename=intermediate_merged_raw_filename,
-        chunk_duration_seconds=CHUNK_DURATION_SECONDS
+        chunk_duration_seconds=CHUNK_DURATION_SECONDS,
+        speech_mask=SpeechMask.load(mask_path) if os.path.exists(mask_path) else None
     )
 
     if not merge_success:
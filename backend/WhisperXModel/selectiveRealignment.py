@@ -0,0 +1,222 @@
+import json
+import os
+import subprocess
+import tempfile
+
+import numpy as np
+
+
+def word_arrays(segments):
+    """
+    Flattens segment words into arrays. Words WhisperX could not align (no timing or
+    score) get NaN, and count as low confidence.
+
+    Returns:
+        tuple: (starts, ends, scores, segment_index) arrays, one entry per word.
+    """
+    starts, ends, scores, owners = [], [], [], []
+    for index, seg in enumerate(segments):
+        for w in seg.get("words", []):
+            starts.append(w.get("start", np.nan))
+            ends.append(w.get("end", np.nan))
+            scores.append(w.get("score", np.nan))
+            owners.append(index)
+    return (np.array(starts, dtype=np.float64), np.array(ends, dtype=np.float64),
+            np.array(scores, dtype=np.float64), np.array(owners, dtype=np.int64))
+
+
+def low_confidence_regions(segments, threshold=0.5, merge_gap=2.0, min_words=3):
+    """
+    Groups low-score words into regions worth re-transcribing.
+
+    Low words (score < threshold or unaligned) closer than merge_gap seconds are
+    clustered; clusters with fewer than min_words low words are ignored. Each region is
+    widened to whole segments, so it can be replaced cleanly.
+
+    Returns:
+        list: (first_segment, last_segment, n_low_words) tuples, in order.
+    """
+    starts, ends, scores, owners = word_arrays(segments)
+    low = ~(scores >= threshold)  # NaN scores count as low
+    if not low.any():
+        return []
+
+    # Unaligned words borrow their segment's timing so they can be clustered
+    seg_starts = np.array([seg["start"] for seg in segments], dtype=np.float64)
+    seg_ends = np.array([seg["end"] for seg in segments], dtype=np.float64)
+    starts = np.where(np.isnan(starts), seg_starts[owners], starts)
+    ends = np.where(np.isnan(ends), seg_ends[owners], ends)
+
+    low_idx = np.flatnonzero(low)
+    gaps = starts[low_idx[1:]] - ends[low_idx[:-1]]
+    breaks = np.flatnonzero(gaps > merge_gap) + 1
+    cluster_first = np.concatenate(([0], breaks))
+    cluster_last = np.concatenate((breaks, [len(low_idx)])) - 1
+    sizes = cluster_last - cluster_first + 1
+
+    regions = []
+    for first, last, size in zip(cluster_first, cluster_last, sizes):
+        if size < min_words:
+            continue
+        first_seg, last_seg = int(owners[low_idx[first]]), int(owners[low_idx[last]])
+        if regions and first_seg <= regions[-1][1] + 1:
+            prev_first, prev_last, prev_size = regions.pop()
+            regions.append((prev_first, max(prev_last, last_seg), prev_size + int(size)))
+        else:
+            regions.append((first_seg, last_seg, int(size)))
+    return regions
+
+
+class WhisperXTranscriber:
+    """
+    Re-transcribes one audio region with the whisperx CLI (bigger model than the first
+    pass). Returns WhisperX JSON with timestamps relative to the region start.
+    """
+
+    def __init__(self, audio_path, model="large-v3", language="en"):
+        self.audio_path = audio_path
+        self.model = model
+        self.language = language
+
+    def __call__(self, start, end):
+        from backend.WhisperXModel.diarization import transcribe_chunk
+
+        # Speakers are carried over from the old segments, so no diarization here
+        with tempfile.TemporaryDirectory(prefix="podclip_realign_") as work_dir:
+            region_path = os.path.join(work_dir, "region.wav")
+            subprocess.run([
+                "ffmpeg", "-y", "-v", "error", "-ss", f"{start:.3f}", "-i", self.audio_path,
+                "-t", f"{end - start:.3f}", "-ac", "1", "-ar", "16000", region_path
+            ], check=True)
+            json_path = transcribe_chunk(region_path, work_dir, model=self.model, language=self.language, diarize=False)
+            with open(json_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+
+def _mean_score(segments):
+    scores = word_arrays(segments)[2]
+    return float(np.nan_to_num(scores, nan=0.0).mean()) if len(scores) else 0.0
+
+
+def _dominant_speaker(old_segments, start, end):
+    """Speaker of the old segments overlapping [start, end) the most."""
+    overlap = {}
+    for seg in old_segments:
+        shared = min(seg["end"], end) - max(seg["start"], start)
+        if shared > 0 and "speaker" in seg:
+            overlap[seg["speaker"]] = overlap.get(seg["speaker"], 0.0) + shared
+    return max(overlap, key=overlap.get) if overlap else None
+
+
+def splice_region(old_segments, new_result, offset, core_start, core_end):
+    """
+    Shifts a region transcription to absolute time and keeps only words whose midpoint
+    falls inside [core_start, core_end], clamped to it; the padding on either side is
+    context only.
+
+    Returns:
+        list: Replacement segments with absolute timestamps, speakers carried over from
+              the overlapping old segments and 'realigned': True.
+    """
+    replacement = []
+    for seg in new_result.get("segments", []):
+        words = []
+        for w in seg.get("words", []):
+            if "start" not in w or "end" not in w:
+                continue
+            start, end = w["start"] + offset, w["end"] + offset
+            if core_start <= (start + end) / 2 <= core_end:
+                words.append(dict(w, start=round(max(start, core_start), 3), end=round(min(end, core_end), 3)))
+        if not words:
+            continue
+        start, end = words[0]["start"], words[-1]["end"]
+        speaker = seg.get("speaker") or _dominant_speaker(old_segments, start, end)
+        if speaker:
+            for w in words:
+                w.setdefault("speaker", speaker)
+        new_seg = {
+            "start": start,
+            "end": end,
+            "text": " " + " ".join(w["word"] for w in words),
+            "words": words,
+            "realigned": True
+        }
+        if speaker:
+            new_seg["speaker"] = speaker
+        replacement.append(new_seg)
+    return replacement
+
+
+def realign_low_confidence(segments, transcriber, threshold=0.5, merge_gap=2.0, min_words=3, pad=1.0,
+                           total_seconds=None):
+    """
+    Re-transcribes only the low-confidence regions of a merged transcript and splices
+    the results back in.
+
+    Args:
+        segments (list): Merged WhisperX segments with absolute timestamps.
+        transcriber (callable): (start, end) -> WhisperX-style JSON for that audio region,
+                                timestamps relative to start (e.g. WhisperXTranscriber).
+        threshold, merge_gap, min_words: See low_confidence_regions.
+        pad (float): Seconds of context added on each side of a region.
+        total_seconds (float): Episode length for the report (default: last segment end).
+    Returns:
+        tuple: (new_segments, report) where report has 'regions', 'replaced',
+               'seconds_reprocessed', 'seconds_total' and 'fraction_reprocessed'.
+    """
+    regions = low_confidence_regions(segments, threshold, merge_gap, min_words)
+    if total_seconds is None:
+        total_seconds = segments[-1]["end"] if segments else 0.0
+
+    output, cursor = [], 0
+    seconds_reprocessed, replaced = 0.0, 0
+    for first_seg, last_seg, _ in regions:
+        old = segments[first_seg:last_seg + 1]
+        # The core never reaches into time owned by the neighbouring segments, so
+        # words heard in the padding are not duplicated
+        core_start, core_end = old[0]["start"], old[-1]["end"]
+        if first_seg > 0:
+            core_start = max(core_start, min(segments[first_seg - 1]["end"], core_end))
+        if last_seg + 1 < len(segments):
+            core_end = min(core_end, max(segments[last_seg + 1]["start"], core_start))
+        start = max(core_start - pad, 0.0)
+        end = min(core_end + pad, total_seconds) if total_seconds else core_end + pad
+        seconds_reprocessed += end - start
+
+        new = splice_region(old, transcriber(start, end), start, core_start, core_end)
+        output.extend(segments[cursor:first_seg])
+        # Only accept the new transcription if it is actually more confident
+        if new and _mean_score(new) > _mean_score(old):
+            output.extend(new)
+            replaced += 1
+        else:
+            output.extend(old)
+        cursor = last_seg + 1
+    output.extend(segments[cursor:])
+
+    report = {
+        "regions": len(regions),
+        "replaced": replaced,
+        "seconds_reprocessed": seconds_reprocessed,
+        "seconds_total": total_seconds,
+        "fraction_reprocessed": seconds_reprocessed / total_seconds if total_seconds else 0.0
+    }
+    return output, report
+
+
+if __name__ == "__main__":
+    merged_path = "backend/WhisperXModel/output/merged_raw/full_audio_raw_transcription_with_absolute_timestamps.json"
+    output_path = "backend/WhisperXModel/output/merged_raw/full_audio_realigned.json"
+
+    with open(merged_path, "r", encoding="utf-8") as f:
+        merged_segments = json.load(f)["segments"]
+
+    realigned, stats = realign_low_confidence(
+        merged_segments, WhisperXTranscriber("backend/WhisperXModel/audio/audio.wav")
+    )
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump({"segments": realigned}, f, indent=4, ensure_ascii=False)
+
+    print(f"✅ Re-processed {stats['seconds_reprocessed']:.1f}s of {stats['seconds_total']:.1f}s audio "
+          f"({100 * stats['fraction_reprocessed']:.1f}%), replaced {stats['replaced']}/{stats['regions']} regions")
+    print(f"Saved to {output_path}")
@@ -0,0 +1,90 @@
+import sys
+import time
+
+import numpy as np
+
+from backend.Clipping.boundaryOptimizer import BoundaryOptimizer, WordTimeline
+from backend.benchmarks.checks import check
+
+MERGED_JSON = "backend/WhisperXModel/output/merged_raw/full_audio_raw_transcription_with_absolute_timestamps.json"
+
+
+def synthetic_timeline():
+    """
+    Words every 0.4 s from 0-30 s and 50-150 s (a 20 s silence in between), a sentence
+    ending every 10th word, SPEAKER_01 taking over after the silence.
+    """
+    segments = []
+    for first, last, speaker in ((0.0, 30.0, "SPEAKER_00"), (50.0, 150.0, "SPEAKER_01")):
+        words = []
+        for k, start in enumerate(np.arange(first, last, 0.4)):
+            text = "end." if k % 10 == 9 else "word"
+            words.append({"word": text, "start": round(float(start), 3), "end": round(float(start) + 0.3, 3),
+                          "speaker": speaker})
+        segments.append({"start": first, "end": last, "words": words})
+    return WordTimeline(segments)
+
+
+def run_correctness_checks():
+    optimizer = BoundaryOptimizer(synthetic_timeline())
+    ok = True
+
+    normal, = optimizer.optimize([{"start": 52.1, "end": 71.9}])
+    ok &= check("in-range request snaps to a nearby sentence end",
+                normal["end_reason"].startswith("sentence boundary") and abs(normal["end"] - 71.9) <= optimizer.tolerance + optimizer.pad)
+
+    too_long, = optimizer.optimize([{"start": 52.1, "end": 140.0}])
+    length = too_long["end"] - too_long["start"]
+    ok &= check("too-long request is cut just under max_duration",
+                optimizer.max_duration - optimizer.tolerance - 2 * optimizer.pad <= length <= optimizer.max_duration)
+
+    too_short, = optimizer.optimize([{"start": 60.1, "end": 62.6}])
+    length = too_short["end"] - too_short["start"]
+    ok &= check("2.5 s request is extended to min_duration, not stretched towards max_duration",
+                optimizer.min_duration <= length <= optimizer.min_duration + optimizer.tolerance + 2 * optimizer.pad)
+
+    # Ends in the silence: no word end within the tolerance, but 20-40 s is a legal length
+    silent_end, = optimizer.optimize([{"start": 0.0, "end": 40.0}])
+    ok &= check("request ending out of tolerance keeps its times",
+                silent_end["end_reason"] == "unchanged" and (silent_end["start"], silent_end["end"]) == (0.0, 40.0))
+
+    before_silence, = optimizer.optimize([{"start": 10.1, "end": 30.5}])
+    ok &= check("last word before the silence reports the speaker change and pause",
+                "speaker change" in before_silence["end_reason"] and "pause" in before_silence["end_reason"])
+
+    nowhere, = optimizer.optimize([{"start": 35.0, "end": 45.0}])
+    ok &= check("request inside the silence is unchanged", nowhere["start_reason"] == "unchanged")
+    return ok
+
+
+def run_boundary_benchmark(n_clips=5000, budget_ms=500.0):
+    timeline = WordTimeline.from_json(MERGED_JSON)
+    optimizer = BoundaryOptimizer(timeline)
+    rng = np.random.default_rng(0)
+    starts = rng.uniform(0, timeline.ends[-1] - 70, size=n_clips)
+    requests = [{"start_time": s, "end_time": s + rng.uniform(1, 70)} for s in starts]
+
+    started = time.perf_counter()
+    adjusted = optimizer.optimize(requests)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    moved = [c for c in adjusted if c["start_word_index"] is not None]
+    lengths = np.array([c["end"] - c["start"] for c in moved])
+    word_lengths = np.array([timeline.ends[c["end_word_index"]] - timeline.starts[c["start_word_index"]] for c in moved])
+    ok = check(f"{len(moved)}/{n_clips} snapped clips stay within max_duration", bool((lengths <= optimizer.max_duration).all()))
+    ok &= check("snapped clips are at least min_duration of speech", bool((word_lengths >= optimizer.min_duration).all()))
+    # A short request ends near its own end or, failing that, near start + min_duration
+    short = [(c, r) for c, r in zip(adjusted, requests) if r["end_time"] - r["start_time"] < optimizer.min_duration
+             and c["start_word_index"] is not None]
+    ok &= check(f"{len(short)} short requests are not stretched past min_duration + tolerance", all(
+        c["end"] <= max(r["end_time"], c["start"] + optimizer.pad + optimizer.min_duration) + optimizer.tolerance
+        + optimizer.pad + 1e-3 for c, r in short))
+    ok &= check("every clip has a start and end reason", all(c["start_reason"] and c["end_reason"] for c in adjusted))
+    ok &= check(f"{n_clips} clips over {len(timeline)} words in {elapsed_ms:.1f} ms (budget {budget_ms:.0f} ms)",
+                elapsed_ms <= budget_ms)
+    return ok
+
+
+if __name__ == "__main__":
+    ok = run_correctness_checks()
+    sys.exit(0 if run_boundary_benchmark() and ok else 1)
@@ -0,0 +1,4 @@
+def check(name, ok):
+    """Prints a pass/fail line for one benchmark assertion and returns ok, so results can be and-ed together."""
+    print(f"{'✅' if ok else '❌'} {name}")
+    return ok
@@ -0,0 +1,112 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+from backend.Clipping.clipRenderer import ClipRenderer, run_command
+
+
+class RecordingRunner:
+    """Stand-in for ffmpeg: records every command and creates empty output files."""
+
+    def __init__(self):
+        self.commands = []
+
+    def __call__(self, cmd):
+        self.commands.append(cmd)
+        if cmd[0] == "ffmpeg":
+            for arg in cmd[1:]:
+                if arg.endswith((".mp4", ".wav", ".mkv")) and not os.path.exists(arg):
+                    open(arg, "wb").close()
+        return SimpleNamespace(returncode=0, stdout="", stderr="")
+
+
+def make_synthetic_source(path, seconds=120):
+    """Generates a test-pattern video with a sine-tone soundtrack and a keyframe every 2 s."""
+    cmd = [
+        "ffmpeg", "-y", "-v", "error",
+        "-f", "lavfi", "-i", f"testsrc2=size=640x360:rate=25:duration={seconds}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+        "-c:v", "libx264", "-preset", "ultrafast", "-g", "50", "-c:a", "aac", "-shortest", path
+    ]
+    subprocess.run(cmd, check=True)
+
+
+def naive_render(source_path, clips, output_dir):
+    """The old pattern: output-side -ss, one clip at a time, so every cut decodes from 0."""
+    for clip in clips:
+        cmd = [
+            "ffmpeg", "-y", "-v", "error", "-i", source_path,
+            "-ss", f"{clip['start']:.3f}", "-t", f"{clip['end'] - clip['start']:.3f}",
+            "-c:v", "libx264", "-preset", "veryfast", "-c:a", "aac",
+            os.path.join(output_dir, f"naive_{clip['name']}.mp4")
+        ]
+        subprocess.run(cmd, check=True)
+
+
+def check_single_mode_threads(cpu_budget=8, n_clips=3):
+    """Every output of the single-process command gets its share of cpu_budget as -threads."""
+    runner = RecordingRunner()
+    work_dir = tempfile.mkdtemp(prefix="podclip_render_cmd_")
+    source_path = os.path.join(work_dir, "source.mp4")
+    open(source_path, "wb").close()
+    clips = [{"name": f"clip_{i}", "start": 10.0 * i, "end": 10.0 * i + 5} for i in range(n_clips)]
+    manifest = ClipRenderer(source_path, os.path.join(work_dir, "clips"), cpu_budget=cpu_budget,
+                            runner=runner).render(clips, "single")
+
+    cmd = runner.commands[-1]
+    outputs = {entry["output"] for entry in manifest["clips"]}
+    expected = str(max(1, cpu_budget // n_clips))
+    per_output = []
+    last_threads = None
+    for i, arg in enumerate(cmd):
+        if arg == "-threads":
+            last_threads = cmd[i + 1]
+        elif arg in outputs:
+            per_output.append(last_threads)
+            last_threads = None
+    ok = per_output == [expected] * n_clips
+    print(f"{'✅' if ok else '❌'} single mode: -threads {per_output} per output (expected {expected} each)")
+    return ok
+
+
+def run_render_benchmark(seconds=120, n_clips=6, clip_length=8.0):
+    clips = [
+        {"name": f"clip_{i:02d}", "start_time": seconds * (i + 0.5) / (n_clips + 1), "hook_line": f"hook {i}"}
+        for i in reversed(range(n_clips))
+    ]
+    for clip in clips:
+        clip["end_time"] = clip["start_time"] + clip_length
+
+    work_dir = tempfile.mkdtemp(prefix="podclip_render_")
+    source_path = os.path.join(work_dir, "source.mp4")
+    have_ffmpeg = shutil.which("ffmpeg") is not None
+
+    if not have_ffmpeg:
+        print("ffmpeg not found, using the recording stand-in runner (command generation only)")
+        runner = RecordingRunner()
+        open(source_path, "wb").close()
+        manifest = ClipRenderer(source_path, os.path.join(work_dir, "clips"), runner=runner).render(clips)
+        return all(entry["status"] == "ok" for entry in manifest["clips"])
+
+    make_synthetic_source(source_path, seconds)
+
+    started = time.perf_counter()
+    naive_render(source_path, [dict(c, start=c["start_time"], end=c["end_time"]) for c in clips], work_dir)
+    naive_s = time.perf_counter() - started
+    print(f"naive (decode from start, sequential): {naive_s:.2f}s")
+
+    ok = True
+    for mode in ("parallel", "single"):
+        manifest = ClipRenderer(source_path, os.path.join(work_dir, mode), runner=run_command).render(clips, mode)
+        ok = ok and all(entry["status"] == "ok" and os.path.getsize(entry["output"]) > 0
+                        for entry in manifest["clips"])
+        print(f"{mode}: {manifest['wall_seconds']:.2f}s ({naive_s / manifest['wall_seconds']:.1f}x vs naive)")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if check_single_mode_threads() and run_render_benchmark() else 1)
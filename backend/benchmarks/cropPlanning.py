@@ -0,0 +1,113 @@
+import sys
+import time
+
+import numpy as np
+
+from backend.Clipping.cropPlanner import CropPlanner, active_speaker_at, speaker_timeline
+
+WIDTH, HEIGHT = 320, 180
+FACES = {"SPEAKER_00": 240, "SPEAKER_01": 70}  # SPEAKER_00 sits on the right
+FACE_SIZE = 40
+
+
+def synthetic_segments(duration=120.0, seed=0):
+    """Alternating turns of 3-10 s with occasional sub-second interjections."""
+    rng = np.random.default_rng(seed)
+    segments, t, speaker = [], 0.0, 0
+    while t < duration:
+        length = rng.uniform(3, 10)
+        segments.append({"start": t, "end": min(t + length, duration), "speaker": f"SPEAKER_0{speaker}"})
+        t += length
+        if rng.random() < 0.4 and t < duration - 1:
+            segments.append({"start": t, "end": t + 0.4, "speaker": f"SPEAKER_0{1 - speaker}"})
+            t += 0.5
+        speaker = 1 - speaker
+    return segments
+
+
+class SyntheticFrames:
+    """Two bright 'faces' whose lower half flickers only while that speaker talks."""
+
+    def __init__(self, segments):
+        self.starts, self.ends, self.codes, self.speakers = speaker_timeline(segments)
+        self.calls = 0
+
+    def __call__(self, times):
+        frames = []
+        speaking = active_speaker_at(times, self.starts, self.ends, self.codes)
+        for t, code in zip(times, speaking):
+            self.calls += 1
+            frame = np.full((HEIGHT, WIDTH), 30, dtype=np.uint8)
+            rng = np.random.default_rng(int(t * 1000))
+            for name, center in FACES.items():
+                x, y = center - FACE_SIZE // 2, 60
+                frame[y:y + FACE_SIZE, x:x + FACE_SIZE] = 220
+                if code >= 0 and self.speakers[code] == name:
+                    mouth = frame[y + FACE_SIZE // 2:y + FACE_SIZE, x:x + FACE_SIZE]
+                    mouth[:] = rng.integers(200, 256, size=mouth.shape)
+            frames.append(frame)
+        return frames
+
+
+def bright_box_detector(frame):
+    """Finds the bright face squares: column runs where the frame is mostly > 180."""
+    columns = (frame > 180).mean(axis=0) > 0.1
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], columns.astype(int), [0]))))
+    boxes = []
+    for start, end in zip(edges[::2], edges[1::2]):
+        rows = np.flatnonzero((frame[:, start:end] > 180).mean(axis=1) > 0.5)
+        boxes.append((int(start), int(rows[0]), int(end - start), int(rows[-1] - rows[0] + 1)))
+    return boxes
+
+
+def crop_accuracy(plan, segments, min_hold):
+    """Fraction of frames whose crop contains the face of the speaker held for >= min_hold."""
+    starts, ends, codes, speakers = speaker_timeline([s for s in segments if s["end"] - s["start"] >= min_hold])
+    active = active_speaker_at(plan.times, starts, ends, codes, gap_fill=0.6)
+    known = active >= 0
+    centers = np.array([FACES[speakers[c]] for c in active[known]])
+    inside = (plan.x[known] <= centers) & (centers < plan.x[known] + plan.crop_width)
+    return float(inside.mean())
+
+
+def check_speaker_assignment():
+    """More speakers than faces: the speaker heard most must get the face that moves with them."""
+    planner = CropPlanner((WIDTH, HEIGHT), bright_box_detector, SyntheticFrames([]))
+    speaking = np.array([0] * 10 + [1] * 10 + [2] * 40)
+    activity = np.zeros((2, 60))
+    activity[0, 20:] = 1.0     # track 0 only moves while speaker 2 talks
+    activity[1, :20] = 0.6     # track 1 moves a bit for speakers 0 and 1
+    mapping = planner.assign_speakers(speaking, activity)
+    ok = mapping.get(2) == 0 and len(set(mapping.values())) == len(mapping) == 2
+
+    rng = np.random.default_rng(0)
+    speaking = rng.integers(-1, 12, size=2000)
+    activity = rng.random((8, 2000))
+    started = time.perf_counter()
+    mapping = planner.assign_speakers(speaking, activity)
+    elapsed = time.perf_counter() - started
+    ok = ok and len(mapping) == 8 and len(set(mapping.values())) == 8
+    print(f"{'✅' if ok else '❌'} speaker assignment: talkative third speaker gets its face, "
+          f"12 speakers x 8 tracks in {elapsed * 1000:.1f} ms")
+    return ok
+
+
+def run_crop_benchmark(sample_rates=(0.1, 0.25, 0.5, 2.0), duration=120.0):
+    segments = synthetic_segments(duration)
+    ok = True
+    for sample_fps in sample_rates:
+        frames = SyntheticFrames(segments)
+        planner = CropPlanner((WIDTH, HEIGHT), bright_box_detector, frames, sample_fps=sample_fps, output_fps=25)
+        started = time.perf_counter()
+        plan = planner.plan(segments, 0.0, duration)
+        elapsed = time.perf_counter() - started
+        accuracy = crop_accuracy(plan, segments, planner.min_hold)
+        ok = ok and plan.track_of_speaker == {"SPEAKER_00": 1, "SPEAKER_01": 0} and accuracy > 0.9
+        print(f"sample_fps={sample_fps:<5} frames decoded={frames.calls:4d} plan {elapsed * 1000:7.1f} ms | "
+              f"mapping {plan.track_of_speaker} | accuracy {accuracy:.3f} | {len(plan.keypoints())} keypoints")
+    return ok
+
+
+if __name__ == "__main__":
+    ok = check_speaker_assignment()
+    sys.exit(0 if run_crop_benchmark() and ok else 1)
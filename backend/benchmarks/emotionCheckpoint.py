@@ -0,0 +1,120 @@
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from backend.EmotionDetectionModel.combining import SAMPLE_RATE, EmotionProcessor
+from backend.Preprocessing.voiceActivity import SpeechMask
+from backend.benchmarks.checks import check
+from backend.benchmarks.emotionWindows import StubPipe, synthetic_segments
+
+
+class Crash(Exception):
+    pass
+
+
+class CrashingEmotionProcessor(EmotionProcessor):
+    """Synthetic audio, a stub classifier, and a simulated crash after `crash_after` groups."""
+
+    def __init__(self, *args, crash_after=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.crash_after = crash_after
+        self.classified = 0
+        self._pipe = StubPipe()
+
+    def load_audio(self, start, duration):
+        t = start + np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+        return (0.2 + 0.2 * np.sin(t / 40.0)).astype(np.float32)
+
+    def classify_group(self, group):
+        if self.crash_after is not None and self.classified >= self.crash_after:
+            raise Crash()
+        self.classified += 1
+        return super().classify_group(group)
+
+
+def write_segments(path, segments):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"segments": segments}, f)
+
+
+def run(json_path, results_path, crash_after=None, **kwargs):
+    """One process() call; returns the processor and whether it crashed."""
+    processor = CrashingEmotionProcessor(json_path, "synthetic", os.path.dirname(results_path),
+                                         results_path=results_path, checkpoint_every=5, crash_after=crash_after, **kwargs)
+    processor.load_segments()
+    try:
+        processor.process()
+    except Crash:
+        return processor, True
+    return processor, False
+
+
+def run_checkpoint_checks(n_segments=120):
+    work_dir = tempfile.mkdtemp()
+    json_path = os.path.join(work_dir, "merged.json")
+    segments = synthetic_segments(n_segments)
+    write_segments(json_path, segments)
+
+    reference, _ = run(json_path, os.path.join(work_dir, "reference.jsonl"))
+    expected = list(reference.iter_results())
+    n_groups = reference.classified
+
+    # Crash part-way, then resume: groups after the last checkpoint are classified again
+    results_path = os.path.join(work_dir, "resumed.jsonl")
+    crashed, did_crash = run(json_path, results_path, crash_after=23)
+    resumed, _ = run(json_path, results_path)
+    ok = check(f"crash after 23 of {n_groups} groups", did_crash and crashed.classified == 23)
+    ok &= check("resumed run only redoes the groups after the last checkpoint", resumed.classified == n_groups - 20)
+    ok &= check("resumed results equal an uninterrupted run", list(resumed.iter_results()) == expected)
+
+    # Crash, then the transcript changes before the retry: the checkpoint must be dropped
+    results_path = os.path.join(work_dir, "edited.jsonl")
+    run(json_path, results_path, crash_after=23)
+    edited = [dict(seg) for seg in segments]
+    edited[3]["text"] = " a different word"
+    write_segments(json_path, edited)
+    fresh, _ = run(json_path, results_path)
+    ok &= check("changed segments discard the checkpoint", fresh.classified == n_groups
+                and [r["text"] for r in fresh.iter_results()] != [r["text"] for r in expected])
+    write_segments(json_path, segments)
+
+    # Different grouping parameters: the checkpoint must be dropped too
+    results_path = os.path.join(work_dir, "regrouped.jsonl")
+    run(json_path, results_path, crash_after=23)
+    regrouped, _ = run(json_path, results_path, max_group_duration=30.0)
+    reference_30, _ = run(json_path, os.path.join(work_dir, "reference_30.jsonl"), max_group_duration=30.0)
+    ok &= check("changed max_group_duration discards the checkpoint",
+                list(regrouped.iter_results()) == list(reference_30.iter_results()))
+
+    # A different inference backend or speech mask changes the labels as well
+    mask = SpeechMask(np.ones(2000, dtype=bool), 0.5)
+    edited_mask = SpeechMask(np.concatenate((np.zeros(100, dtype=bool), np.ones(1900, dtype=bool))), 0.5)
+    for name, changed in (("backend", {"backend": "int8", "speech_mask": mask}),
+                          ("speech mask", {"speech_mask": edited_mask}),
+                          ("speech mask frame length", {"speech_mask": SpeechMask(mask.mask, 0.25)}),
+                          ("nothing", {"speech_mask": SpeechMask(mask.mask.copy(), 0.5)})):
+        results_path = os.path.join(work_dir, f"changed_{name.replace(' ', '_')}.jsonl")
+        run(json_path, results_path, crash_after=23, speech_mask=mask)
+        rerun, _ = run(json_path, results_path, **changed)
+        if name == "nothing":
+            ok &= check("an equal speech mask keeps the checkpoint", rerun.classified == n_groups - 20)
+        else:
+            ok &= check(f"changed {name} discards the checkpoint", rerun.classified == n_groups)
+
+    # Live mode appends segments between calls; the classified prefix still matches
+    live_path = os.path.join(work_dir, "live.jsonl")
+    live = CrashingEmotionProcessor(json_path, "synthetic", work_dir, results_path=live_path, checkpoint_every=5)
+    live.segments = segments[:n_segments // 2]
+    live.process(final=False)
+    live.segments = segments
+    live.process()
+    ok &= check("live mode keeps its checkpoint as segments are appended",
+                live.classified == n_groups and list(live.iter_results()) == expected)
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run_checkpoint_checks() else 1)
@@ -0,0 +1,137 @@
+import sys
+import tempfile
+
+import numpy as np
+
+from backend.EmotionDetectionModel.combining import (
+    SAMPLE_RATE, EmotionProcessor, aggregate_window_scores, window_offsets
+)
+from backend.benchmarks.checks import check
+
+
+class StubPipe:
+    """Audio classifier stand-in: the label follows the window's loudness; records every call."""
+
+    class model:
+        class config:
+            num_labels = 2
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, inputs, top_k=None, batch_size=None):
+        self.calls.append((len(inputs), top_k, batch_size))
+        predictions = []
+        for item in inputs:
+            loud = float(np.abs(item["raw"]).mean() > 0.3)
+            predictions.append([{"label": "happy", "score": 0.2 + 0.6 * loud},
+                                {"label": "neutral", "score": 0.8 - 0.6 * loud}])
+        return predictions
+
+
+def check_window_offsets():
+    ok = check("short group -> one window", window_offsets(12.0, 30.0, 15.0) == [0.0])
+    ok &= check("exact window -> one window", window_offsets(30.0, 30.0, 15.0) == [0.0])
+    ok &= check("75 s -> windows at 0/15/30/45", window_offsets(75.0, 30.0, 15.0) == [0.0, 15.0, 30.0, 45.0])
+    for duration in (31.0, 59.9, 61.0, 600.0):
+        offsets = window_offsets(duration, 30.0, 15.0)
+        covered = offsets[0] == 0.0 and offsets[-1] + 30.0 == duration
+        gaps = all(0 < b - a <= 15.0 for a, b in zip(offsets[:-1], offsets[1:]))
+        ok &= check(f"{duration:g} s windows cover the group without gaps", covered and gaps)
+    return ok
+
+
+def check_aggregate_window_scores():
+    combined = aggregate_window_scores(
+        [{"happy": 0.9, "neutral": 0.1}, {"happy": 0.1, "neutral": 0.9}], [30.0, 10.0]
+    )
+    ok = check("window scores weighted by length",
+               abs(combined["happy"] - 0.7) < 1e-9 and abs(combined["neutral"] - 0.3) < 1e-9)
+    partial = aggregate_window_scores([{"happy": 1.0}, {"sad": 1.0}], [10.0, 10.0])
+    ok &= check("labels missing from a window count as 0", partial == {"happy": 0.5, "sad": 0.5})
+    ok &= check("no windows -> empty distribution", aggregate_window_scores([], []) == {})
+    return ok
+
+
+def synthetic_segments(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    segments, t = [], 0.0
+    speaker = "SPEAKER_00"
+    for _ in range(n):
+        if rng.random() < 0.2:
+            speaker = "SPEAKER_01" if speaker == "SPEAKER_00" else "SPEAKER_00"
+        length = float(rng.choice([rng.uniform(1, 12), rng.uniform(70, 90)], p=[0.95, 0.05]))
+        segment = {"start": t, "end": t + length, "text": " word"}
+        if rng.random() > 0.03:
+            segment["speaker"] = speaker
+        segments.append(segment)
+        t += length + 0.2
+    return segments
+
+
+def check_build_groups(max_group_duration=60.0, max_segments=None):
+    processor = EmotionProcessor(None, None, tempfile.mkdtemp(), max_segments=max_segments,
+                                 max_group_duration=max_group_duration)
+    processor.segments = synthetic_segments()
+    groups = list(processor.build_groups())
+
+    grouped = [id(seg) for group, _ in groups for seg in group]
+    expected = [id(seg) for seg in processor.segments if "speaker" in seg]
+    label = f"max_group_duration={max_group_duration:g}" + (f", max_segments={max_segments}" if max_segments else "")
+    ok = check(f"[{label}] every speaker segment grouped once, in order", grouped == expected)
+    ok &= check(f"[{label}] groups have one speaker",
+                all(len({seg["speaker"] for seg in group}) == 1 for group, _ in groups))
+    ok &= check(f"[{label}] multi-segment groups fit the duration budget",
+                all(group[-1]["end"] - group[0]["start"] <= max_group_duration for group, _ in groups if len(group) > 1))
+    ok &= check(f"[{label}] over-long segments form their own group",
+                all(len(group) == 1 for group, _ in groups if group[0]["end"] - group[0]["start"] > max_group_duration))
+    if max_segments:
+        ok &= check(f"[{label}] groups respect max_segments", all(len(group) <= max_segments for group, _ in groups))
+
+    # A group ends because of the next segment: different speaker, no speaker, or budget
+    segments = processor.segments
+    stops_ok = True
+    for group, next_index in groups:
+        if next_index >= len(segments):
+            continue
+        nxt = segments[next_index]
+        stops_ok &= (nxt.get("speaker") != group[0]["speaker"]
+                     or nxt["end"] - group[0]["start"] > max_group_duration
+                     or (max_segments is not None and len(group) >= max_segments))
+    ok &= check(f"[{label}] groups only stop at a speaker change or the budget", stops_ok)
+
+    resumed = [g for g, _ in processor.build_groups(groups[len(groups) // 2][1])]
+    ok &= check(f"[{label}] resuming from a cursor yields the remaining groups",
+                [[id(s) for s in g] for g in resumed] == [[id(s) for s in g] for g, _ in groups[len(groups) // 2 + 1:]])
+    return ok
+
+
+def check_detect_emotion_windows():
+    processor = EmotionProcessor(None, None, tempfile.mkdtemp(), batch_size=3)
+    pipe = StubPipe()
+    processor._pipe = pipe
+    # 75 s group: loud for the first 30 s, quiet afterwards
+    audio = np.full(75 * SAMPLE_RATE, 0.05, dtype=np.float32)
+    audio[:30 * SAMPLE_RATE] = 0.5
+    distribution, timeline = processor.detect_emotion_windows(audio, group_start=100.0)
+
+    ok = check("one batched classifier call for all windows", pipe.calls == [(4, 2, 3)])
+    ok &= check("timeline windows use absolute times",
+                [(w["start"], w["end"]) for w in timeline] == [(100.0, 130.0), (115.0, 145.0), (130.0, 160.0), (145.0, 175.0)])
+    ok &= check("timeline labels follow the audio", [w["label"] for w in timeline] == ["happy", "neutral", "neutral", "neutral"])
+    ok &= check("group distribution sums to 1", abs(sum(distribution.values()) - 1.0) < 1e-9)
+    ok &= check("quiet majority wins the group", max(distribution, key=distribution.get) == "neutral")
+    return ok
+
+
+def run_emotion_window_checks():
+    ok = check_window_offsets()
+    ok &= check_aggregate_window_scores()
+    ok &= check_build_groups()
+    ok &= check_build_groups(max_group_duration=30.0, max_segments=4)
+    ok &= check_detect_emotion_windows()
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run_emotion_window_checks() else 1)
@@ -0,0 +1,167 @@
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from backend.RagPipeline.embeddingString import generate_embedding_strings_from_segments
+from backend.RagPipeline.hybridSearch import HybridSearchIndex, load_segment_records, reciprocal_rank_fusion
+from backend.benchmarks.checks import check
+
+SPEAKERS = ["SPEAKER_00", "SPEAKER_01", "SPEAKER_02"]
+EMOTIONS = ["neutral", "happy", "sad", "angry", "surprised", "fearful", "disgust"]
+
+
+def synthetic_episodes(n_segments, segments_per_episode=1000, vocab_size=20000, dim=64, seed=0):
+    """
+    Yields (episode_id, records, embeddings) with Zipf-distributed words, roughly
+    matching the length and vocabulary skew of real podcast segments.
+    """
+    rng = np.random.default_rng(seed)
+    vocab = np.array([f"w{i}" for i in range(vocab_size)] + [f"{i}%" for i in range(101)])
+    for first in range(0, n_segments, segments_per_episode):
+        n = min(segments_per_episode, n_segments - first)
+        lengths = rng.integers(8, 40, size=n)
+        word_ids = np.minimum(rng.zipf(1.3, size=lengths.sum()) - 1, len(vocab) - 1)
+        words = vocab[word_ids]
+        bounds = np.concatenate(([0], np.cumsum(lengths)))
+        starts = np.cumsum(rng.uniform(3, 15, size=n))
+        records = [
+            {
+                "text": " ".join(words[bounds[i]:bounds[i + 1]]),
+                "speaker": SPEAKERS[i % len(SPEAKERS)],
+                "emotion": EMOTIONS[rng.integers(len(EMOTIONS))],
+                "start": float(starts[i]),
+                "end": float(starts[i] + 3)
+            }
+            for i in range(n)
+        ]
+        yield f"episode{first // segments_per_episode:05d}", records, rng.standard_normal((n, dim)).astype(np.float32)
+
+
+def small_index():
+    """Hand-written episode where the right answer to each query is known."""
+    records = [
+        {"text": "About 61% of people never finish a podcast", "speaker": "SPEAKER_00", "emotion": "neutral", "start": 0.0, "end": 5.0},
+        {"text": "Sixty one percent sounds high, maybe 16% of people", "speaker": "SPEAKER_01", "emotion": "surprised", "start": 5.0, "end": 9.0},
+        {"text": "People love a good story about startups", "speaker": "SPEAKER_00", "emotion": "happy", "start": 9.0, "end": 14.0},
+        {"text": "Startups fail because founders quit", "speaker": "SPEAKER_01", "emotion": "sad", "start": 14.0, "end": 20.0},
+        {"text": "Founders who quit early regret it later", "speaker": "SPEAKER_00", "emotion": "sad", "start": 20.0, "end": 26.0},
+    ]
+    embeddings = np.eye(len(records), 8, dtype=np.float32)
+    index = HybridSearchIndex()
+    index.add_episode("ep1", records, embeddings)
+    return index, records, embeddings
+
+
+def run_correctness_checks():
+    index, records, embeddings = small_index()
+    ok = True
+
+    hits = index.search("61% of people")
+    ok &= check("BM25 matches the exact token '61%' first", hits[0]["text"] == records[0]["text"])
+    ok &= check("'61%' does not match '16%'", [h["doc_id"] for h in index.search("61%")] == [0])
+    only_16 = index.search("16%")
+    ok &= check("'16%' only finds its own segment", [h["doc_id"] for h in only_16] == [1])
+
+    fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1, 4]], k=60)
+    ok &= check("RRF: ids ranked high in both lists win",
+                [doc for doc, _ in fused] == [1, 3, 2, 4] and abs(fused[0][1] - (1 / 61 + 1 / 62)) < 1e-12)
+    # The dense vector points at doc 4; lexically "founders quit" ranks docs 3 and 4
+    hybrid = index.search("founders quit", query_embedding=embeddings[4])
+    ok &= check("hybrid search puts the doc both rankings agree on first", hybrid[0]["doc_id"] == 4)
+    ok &= check("hybrid results are sorted by fused score",
+                all(a["score"] >= b["score"] for a, b in zip(hybrid[:-1], hybrid[1:])))
+
+    ok &= check("speaker filter", {h["speaker"] for h in index.search("people startups founders", speakers=["SPEAKER_01"])} == {"SPEAKER_01"})
+    ok &= check("emotion filter", [h["doc_id"] for h in index.search("founders quit", emotions=["sad"])] in ([3, 4], [4, 3])
+                and not index.search("people", emotions=["sad"]))
+    ok &= check("time filter keeps overlapping segments",
+                sorted(h["doc_id"] for h in index.search("people startups founders quit", start=8.0, end=15.0)) == [1, 2, 3])
+    ok &= check("unknown filter value matches nothing", index.search("people", speakers=["SPEAKER_09"]) == [])
+
+    index.add_episode("ep2", [dict(records[0], text="61% again in another episode")], np.ones((1, 8), dtype=np.float32))
+    ok &= check("episode filter", [h["episode"] for h in index.search("61%", episodes=["ep2"])] == ["ep2"])
+    index.remove_episode("ep1")
+    ok &= check("remove_episode hides its documents", len(index) == 1
+                and [h["episode"] for h in index.search("61% people")] == ["ep2"])
+    index.compact()
+    ok &= check("compact drops tombstones and keeps search results", len(index.records) == 1 and len(index) == 1
+                and index.search("61%")[0]["text"] == "61% again in another episode"
+                and index.search("", query_embedding=np.ones(8))[0]["dense"] > 0.99)
+    index.add_episode("ep2", records[:2])
+    ok &= check("re-adding an episode replaces it", len(index) == 2)
+
+    # Records and embedding strings come from the same segment selection
+    segments = [
+        {"start": 0.0, "end": 4.0, "text": " hello there", "speaker": "SPEAKER_00", "emotion": {"label": "happy"}},
+        {"start": 4.0, "end": 8.0, "text": " ", "speaker": "SPEAKER_00", "emotion": {"label": "neutral"}},
+        {"start": 8.0, "end": 12.0, "text": " music", "speaker": "SPEAKER_01", "emotion": {"label": "no_speech"}},
+        {"start": 12.0, "end": 16.0, "text": " applause", "speaker": "SPEAKER_01", "in_silence": True, "emotion": {"label": "neutral"}},
+        {"start": 16.0, "end": 20.0, "text": " goodbye", "speaker": "SPEAKER_01", "emotion": {"label": "sad"}},
+    ]
+    path = os.path.join(tempfile.mkdtemp(), "complete.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"segments": segments}, f)
+    loaded = load_segment_records(path, "ep3")
+    strings = generate_embedding_strings_from_segments(path)
+    aligned = len(loaded) == len(strings) == 2 and all(r["text"] in s for r, s in zip(loaded, strings))
+    try:
+        HybridSearchIndex().add_episode("ep3", loaded, np.zeros((len(strings), 8), dtype=np.float32))
+    except ValueError:
+        aligned = False
+    ok &= check("records line up with embedding rows (empty, silent and no_speech skipped)", aligned)
+    return ok
+
+
+def _median_ms(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return 1000.0 * float(np.median(timings))
+
+
+def run_search_benchmark(sizes=(10_000, 100_000, 1_000_000), dim=64, repeats=20):
+    """Prints index build time and median query latency for BM25, dense, hybrid and filtered hybrid search."""
+    rng = np.random.default_rng(1)
+    queries = ["w3 w17 61%", "w120 w5", "w2 w9 w44 w800", "w1"]
+    for size in sizes:
+        index = HybridSearchIndex()
+        start = time.perf_counter()
+        for episode_id, records, embeddings in synthetic_episodes(size, dim=dim):
+            index.add_episode(episode_id, records, embeddings)
+        build_s = time.perf_counter() - start
+
+        query_vec = rng.standard_normal(dim).astype(np.float32)
+        query_cycle = iter(queries * repeats)
+        bm25_ms = _median_ms(lambda: index.search(next(query_cycle)), repeats)
+        dense_ms = _median_ms(lambda: index.search("", query_embedding=query_vec), repeats)
+        hybrid_ms = _median_ms(lambda: index.search(next(query_cycle), query_embedding=query_vec), repeats)
+        filtered_ms = _median_ms(lambda: index.search(
+            next(query_cycle), query_embedding=query_vec,
+            speakers=["SPEAKER_01"], emotions=["happy", "surprised"], start=0, end=3600
+        ), repeats)
+
+        # Live mode: a 20-segment batch lands, then the next query comes in
+        batches = synthetic_episodes(20 * repeats, segments_per_episode=20, dim=dim, seed=2)
+        after_update = []
+        for _, records, embeddings in batches:
+            index.extend_episode("live", records, embeddings)
+            started = time.perf_counter()
+            index.search(next(query_cycle), query_embedding=query_vec)
+            after_update.append(time.perf_counter() - started)
+        update_ms = 1000.0 * float(np.median(after_update))
+        print(f"{size:>9,} segments: build {build_s:6.1f}s | bm25 {bm25_ms:7.2f} ms | dense {dense_ms:7.2f} ms | "
+              f"hybrid {hybrid_ms:7.2f} ms | hybrid+filters {filtered_ms:7.2f} ms | "
+              f"first hybrid after a 20-segment extend {update_ms:7.2f} ms")
+
+
+if __name__ == "__main__":
+    sizes = tuple(int(s) for s in sys.argv[1:]) or (10_000, 100_000, 1_000_000)
+    if not run_correctness_checks():
+        sys.exit(1)
+    run_search_benchmark(sizes)
@@ -0,0 +1,107 @@
+import os
+import re
+import subprocess
+import sys
+
+# Modules used by the lightweight commands (merge, aggregate, search). Importing
+# any of them must not load a model framework or call out to the network.
+LIGHTWEIGHT_MODULES = [
+    "backend.WhisperXModel.mergingRaw",
+    "backend.WhisperXModel.processingMergedRaw",
+    "backend.WhisperXModel.combiningWordsToMergedRawProcessed",
+    "backend.WhisperXModel.diarization",
+    "backend.RagPipeline.embeddingString",
+    "backend.RagPipeline.generateTextEmbeddings",
+    "backend.Preprocessing.chunking",
+    "backend.Preprocessing.sceneDetection",
+    "backend.Preprocessing.responseFilter",
+    "backend.EmotionDetectionModel.chunking",
+    "backend.EmotionDetectionModel.combining",
+    "backend.EmotionDetectionModel.detection",
+    "backend.Preprocessing.voiceActivity",
+    "backend.Optimization.quantizedInference",
+    "backend.RagPipeline.hybridSearch",
+    "backend.RagPipeline.topicSegmentation",
+    "backend.WhisperXModel.selectiveRealignment",
+    "backend.Clipping.clipRenderer",
+    "backend.Clipping.cropPlanner",
+    "backend.Clipping.boundaryOptimizer",
+    "backend.Pipeline.jobQueue",
+    "backend.Pipeline.episodeStages",
+    "backend.Pipeline.liveSession",
+]
+
+HEAVY_PACKAGES = [
+    "torch",
+    "transformers",
+    "sentence_transformers",
+    "langchain_core",
+    "langchain_community",
+    "langchain_google_genai",
+    "whisperx",
+]
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def measure_import_time(module_name, repo_root):
+    """
+    Imports a module in a fresh interpreter with `python -X importtime` and
+    reports its cumulative import time and any heavy packages it pulled in.
+
+    Args:
+        module_name (str): Dotted module path, e.g. "backend.WhisperXModel.mergingRaw".
+        repo_root (str): Directory the interpreter is started from.
+    Returns:
+        dict: 'module', 'cumulative_ms' (float) and 'heavy_loaded' (list of str).
+              'error' is set instead if the import failed.
+    """
+    probe = (
+        f"import sys, {module_name}\n"
+        f"print(','.join(p for p in {HEAVY_PACKAGES!r} if p in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=repo_root, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return {"module": module_name, "error": result.stderr.strip().splitlines()[-1]}
+
+    cumulative_us = 0
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match and match.group(4) == module_name:
+            cumulative_us = int(match.group(2))
+
+    heavy = [p for p in result.stdout.strip().split(",") if p]
+    return {"module": module_name, "cumulative_ms": cumulative_us / 1000.0, "heavy_loaded": heavy}
+
+
+def run_import_benchmark(modules=LIGHTWEIGHT_MODULES, budget_ms=1000.0, repo_root=None):
+    """
+    Checks that every module imports within budget_ms and without loading heavy packages.
+
+    Returns:
+        bool: True if every module passed, False otherwise.
+    """
+    if repo_root is None:
+        repo_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    all_ok = True
+    for module_name in modules:
+        stats = measure_import_time(module_name, repo_root)
+        if "error" in stats:
+            print(f"❌ {module_name}: import failed ({stats['error']})")
+            all_ok = False
+            continue
+
+        ok = stats["cumulative_ms"] <= budget_ms and not stats["heavy_loaded"]
+        all_ok = all_ok and ok
+        heavy = f" (loaded {', '.join(stats['heavy_loaded'])})" if stats["heavy_loaded"] else ""
+        print(f"{'✅' if ok else '❌'} {module_name}: {stats['cumulative_ms']:.1f} ms{heavy}")
+
+    return all_ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run_import_benchmark() else 1)
@@ -0,0 +1,153 @@
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from backend.Pipeline.jobQueue import JobQueue, Stage, run_workers
+from backend.benchmarks.checks import check
+
+CHEAP_SECONDS = 0.02
+HEAVY_SECONDS = 0.05
+
+
+def stub_prepare(episode):
+    time.sleep(CHEAP_SECONDS)
+    with open(episode.path("output", "prepared.json"), "w", encoding="utf-8") as f:
+        json.dump({"episode": episode.episode_id}, f)
+
+
+def stub_flaky_transcribe(episode):
+    """Heavy stage failing on the first attempt for every third episode."""
+    time.sleep(HEAVY_SECONDS)
+    marker = episode.path("output", "transcribe_attempted")
+    suffix = episode.episode_id.rsplit("_", 1)[1]
+    if suffix.isdigit() and int(suffix) % 3 == 0 and not os.path.exists(marker):
+        open(marker, "w").close()
+        raise RuntimeError("simulated CUDA out of memory")
+    open(episode.path("output", "transcript.json"), "w").close()
+
+
+def stub_emotion(episode):
+    time.sleep(HEAVY_SECONDS)
+    if not os.path.exists(episode.path("output", "transcript.json")):
+        raise RuntimeError("transcript missing")
+
+
+def stub_broken(episode):
+    if episode.episode_id == "episode_broken":
+        raise ValueError("corrupt media")
+
+
+def stub_slow(episode):
+    """Runs several times longer than the lease used below."""
+    time.sleep(1.0)
+
+
+def stub_kill_worker(episode):
+    """Takes the whole worker process down, like a segfault or the OOM killer."""
+    os._exit(1)
+
+
+STUB_STAGES = [
+    Stage("prepare", stub_prepare),
+    Stage("transcribe", stub_flaky_transcribe, resource="gpu"),
+    Stage("emotion", stub_emotion, resource="gpu"),
+    Stage("finish", stub_broken),
+]
+
+
+def max_concurrent(intervals):
+    events = sorted([(s, 1) for s, _ in intervals] + [(e, -1) for _, e in intervals], key=lambda x: (x[0], x[1]))
+    current = peak = 0
+    for _, delta in events:
+        current += delta
+        peak = max(peak, current)
+    return peak
+
+
+def run_queue_benchmark(n_episodes=12, n_workers=4, gpu_slots=1):
+    work_root = tempfile.mkdtemp(prefix="podclip_queue_")
+    db_path = os.path.join(work_root, "jobs.sqlite3")
+    queue_kwargs = {"max_attempts": 3, "backoff_base": 0.05}
+
+    queue = JobQueue(db_path, **queue_kwargs)
+    for i in range(n_episodes):
+        queue.enqueue(f"episode_{i:03d}", f"/media/episode_{i:03d}.mp4", os.path.join(work_root, "episodes"))
+    queue.enqueue("episode_broken", "/media/broken.mp4", os.path.join(work_root, "episodes"))
+    queue.close()
+
+    started = time.perf_counter()
+    stats = run_workers(db_path, STUB_STAGES, n_workers=n_workers, resource_limits={"gpu": gpu_slots},
+                        queue_kwargs=queue_kwargs, poll_interval=0.01)
+    elapsed = time.perf_counter() - started
+
+    conn = sqlite3.connect(db_path)
+    gpu_runs = conn.execute(
+        "SELECT started_at, finished_at FROM stage_runs WHERE stage IN ('transcribe', 'emotion')"
+    ).fetchall()
+    conn.close()
+    peak_gpu = max_concurrent(gpu_runs)
+    isolated = all(
+        os.path.exists(os.path.join(work_root, "episodes", f"episode_{i:03d}", "output", "prepared.json"))
+        for i in range(n_episodes)
+    )
+
+    print(f"{n_episodes + 1} episodes, {n_workers} workers, {gpu_slots} gpu slot(s): {elapsed:.2f}s wall")
+    print(f"done {stats['done']}, failed {stats['failed']}, retries {stats['retries']}, "
+          f"peak concurrent gpu stages {peak_gpu}, per-episode workdirs {isolated}")
+    print(f"throughput {stats['episodes_per_hour']:.0f} episodes/hour; mean stage seconds: "
+          + ", ".join(f"{k} {v:.3f}" for k, v in stats["stage_seconds"].items()))
+    expected_retries = len(range(0, n_episodes, 3)) + queue_kwargs["max_attempts"] - 1
+    return (stats["done"] == n_episodes and stats["failed"] == 1 and stats["retries"] == expected_retries
+            and peak_gpu <= gpu_slots and isolated)
+
+
+def run_lease_checks(lease_seconds=0.3):
+    work_root = tempfile.mkdtemp(prefix="podclip_lease_")
+    queue_kwargs = {"max_attempts": 3, "backoff_base": 0.05}
+
+    # Stages outlasting the lease keep their job while the worker is alive
+    db_path = os.path.join(work_root, "slow.sqlite3")
+    queue = JobQueue(db_path, **queue_kwargs)
+    for i in range(3):
+        queue.enqueue(f"slow_{i}", f"/media/slow_{i}.mp4", os.path.join(work_root, "episodes"))
+    queue.close()
+    stats = run_workers(db_path, [Stage("prepare", stub_prepare), Stage("slow", stub_slow)], n_workers=2,
+                        queue_kwargs=queue_kwargs, poll_interval=0.01, lease_seconds=lease_seconds)
+    conn = sqlite3.connect(db_path)
+    runs = conn.execute("SELECT COUNT(*) FROM stage_runs WHERE stage = 'slow'").fetchone()[0]
+    attempts = [row[0] for row in conn.execute("SELECT attempts FROM jobs")]
+    conn.close()
+    ok = check(f"1 s stages with a {lease_seconds} s lease run once per episode",
+               stats["done"] == 3 and runs == 3 and attempts == [1, 1, 1])
+
+    # A stage that kills its worker uses up attempts and ends failed instead of looping
+    queue_kwargs = {"max_attempts": 3, "backoff_base": 0.3}
+    db_path = os.path.join(work_root, "killer.sqlite3")
+    queue = JobQueue(db_path, **queue_kwargs)
+    queue.enqueue("killer", "/media/killer.mp4", os.path.join(work_root, "episodes"))
+    queue.close()
+    stats = run_workers(db_path, [Stage("prepare", stub_prepare), Stage("crash", stub_kill_worker)],
+                        n_workers=queue_kwargs["max_attempts"] + 1, queue_kwargs=queue_kwargs,
+                        poll_interval=0.01, lease_seconds=lease_seconds)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    job = conn.execute("SELECT * FROM jobs").fetchone()
+    crash_runs = conn.execute("SELECT status, started_at FROM stage_runs WHERE stage = 'crash' ORDER BY id").fetchall()
+    conn.close()
+    gaps = [b["started_at"] - a["started_at"] for a, b in zip(crash_runs[:-1], crash_runs[1:])]
+    ok &= check("worker-killing episode fails after max_attempts expired leases",
+                stats["failed"] == 1 and job["attempts"] == queue_kwargs["max_attempts"]
+                and "lease expired" in job["last_error"] and [r["status"] for r in crash_runs] == ["failed"] * 3)
+    # The dead worker's lease ran out (minus the prepare stage it spent), then the backoff
+    backoff = [queue_kwargs["backoff_base"] * 2 ** k for k in range(len(gaps))]
+    ok &= check("expired leases back off before the retry",
+                all(gap >= lease_seconds - 2 * CHEAP_SECONDS + delay for gap, delay in zip(gaps, backoff)))
+    return ok
+
+
+if __name__ == "__main__":
+    ok = run_lease_checks()
+    sys.exit(0 if run_queue_benchmark() and ok else 1)
@@ -0,0 +1,172 @@
+import copy
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+import zlib
+
+import numpy as np
+
+from backend.EmotionDetectionModel.combining import SAMPLE_RATE, EmotionProcessor
+from backend.Pipeline.liveSession import DONE_MARKER, LiveSession
+from backend.WhisperXModel.processingMergedRaw import aggregate_speaker_turns
+
+RAW_DIR = "backend/WhisperXModel/output/raw"
+MERGED_JSON = "backend/WhisperXModel/output/merged_raw/full_audio_raw_transcription_with_absolute_timestamps.json"
+CHUNK_DURATION_SECONDS = 1200
+LABELS = ["angry", "disgust", "fearful", "happy", "neutral", "sad", "surprised"]
+
+
+class SimulatedClock:
+    """Seconds since the recording started: jumps over idle waits, but runs in real time while code executes."""
+
+    def __init__(self):
+        self.base = 0.0
+        self.anchor = time.perf_counter()
+
+    def __call__(self):
+        return self.base + time.perf_counter() - self.anchor
+
+    def advance_to(self, t):
+        now = self()
+        if t > now:
+            self.base += t - now
+
+
+class ReplayTranscriber:
+    """Returns the checked-in raw WhisperX JSON for each chunk instead of running whisperx."""
+
+    def __call__(self, index, chunk_path):
+        name = f"output{index:03d}"
+        with open(os.path.join(RAW_DIR, name, f"{name}.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+
+class FakeEmotionPipe:
+    """Stand-in audio classifier: the louder the window, the less neutral it sounds."""
+
+    class model:
+        class config:
+            num_labels = len(LABELS)
+
+    def __call__(self, inputs, top_k=None, batch_size=None):
+        predictions = []
+        for item in inputs:
+            loudness = float(np.sqrt(np.mean(np.square(item["raw"])))) if len(item["raw"]) else 0.0
+            excited = min(loudness * 2.0, 0.95)
+            scores = {label: (1.0 - excited) / 6 for label in LABELS if label != "neutral"}
+            scores["happy"] += excited
+            scores["neutral"] = 1.0 - sum(scores.values())
+            predictions.append([{"label": k, "score": v} for k, v in scores.items()])
+        return predictions
+
+
+class ReplayEmotionProcessor(EmotionProcessor):
+    """EmotionProcessor reading synthetic audio whose loudness swells every few minutes."""
+
+    def load_audio(self, start, duration):
+        t = start + np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+        envelope = 0.1 + 0.4 * np.maximum(np.sin(2 * math.pi * t / 420.0), 0.0) ** 4
+        return (envelope * np.sin(2 * math.pi * 220.0 * t)).astype(np.float32)
+
+
+def hashing_embedder(texts, dim=64):
+    """Deterministic bag-of-words vectors standing in for the E5 model."""
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for token in text.lower().split():
+            vectors[row, zlib.crc32(token.encode()) % dim] += 1.0
+    return vectors
+
+
+def chunk_arrivals():
+    """Simulated time each checked-in chunk is complete: the end of its 20 minutes (or of the episode)."""
+    arrivals = []
+    index = 0
+    while os.path.isdir(os.path.join(RAW_DIR, f"output{index:03d}")):
+        segments = ReplayTranscriber()(index, None)["segments"]
+        length = CHUNK_DURATION_SECONDS
+        if not os.path.isdir(os.path.join(RAW_DIR, f"output{index + 1:03d}")):
+            length = math.ceil(max(seg["end"] for seg in segments))
+        arrivals.append(index * CHUNK_DURATION_SECONDS + length)
+        index += 1
+    return arrivals
+
+
+def batch_emotion_results(segments, work_dir):
+    processor = ReplayEmotionProcessor(json_path=None, audio_path="replay", output_dir=os.path.join(work_dir, "batch"))
+    processor._pipe = FakeEmotionPipe()
+    processor.segments = segments
+    processor.process()
+    return list(processor.iter_results())
+
+
+def read_jsonl(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def run_live_replay(poll_interval=5.0, settle_seconds=2.0):
+    work_dir = tempfile.mkdtemp(prefix="podclip_live_")
+    chunks_dir = os.path.join(work_dir, "chunks")
+    os.makedirs(chunks_dir)
+    clock = SimulatedClock()
+
+    processor = ReplayEmotionProcessor(json_path=None, audio_path="replay",
+                                       output_dir=os.path.join(work_dir, "live", "EmotionProcessed", "chunks"),
+                                       results_path=os.path.join(work_dir, "live", "EmotionProcessed", "complete.jsonl"))
+    processor._pipe = FakeEmotionPipe()
+    session = LiveSession("replay", chunks_dir, os.path.join(work_dir, "live"), transcriber=ReplayTranscriber(),
+                          emotion_processor=processor, embedder=hashing_embedder,
+                          chunk_duration_seconds=CHUNK_DURATION_SECONDS, settle_seconds=settle_seconds, clock=clock)
+
+    arrivals = chunk_arrivals()
+    written = 0
+    t = 0.0
+    started = time.perf_counter()
+    while not session.finished:
+        clock.advance_to(t)
+        # The "recorder" finishes each chunk at its arrival time
+        while written < len(arrivals) and arrivals[written] <= clock():
+            path = os.path.join(chunks_dir, f"output{written:03d}.wav")
+            open(path, "w").close()
+            os.utime(path, (arrivals[written], arrivals[written]))
+            written += 1
+            if written == len(arrivals):
+                open(os.path.join(chunks_dir, DONE_MARKER), "w").close()
+        session.poll()
+        t += poll_interval
+    real_seconds = time.perf_counter() - started
+
+    # Append-only outputs must match what the batch pipeline produces from the finished episode
+    with open(MERGED_JSON, "r", encoding="utf-8") as f:
+        merged = json.load(f)
+    live_segments = read_jsonl(session.merged_path)
+    merge_ok = live_segments == merged["segments"]
+    turns_ok = read_jsonl(session.turns_path) == aggregate_speaker_turns(copy.deepcopy(merged))
+    batch_results = batch_emotion_results(copy.deepcopy(merged["segments"]), work_dir)
+    emotion_ok = read_jsonl(session.emotion_path) == batch_results
+    with open(session.embeddings_path, "r", encoding="utf-8") as f:
+        n_embeddings = sum(1 for line in f if line.strip())
+    index_ok = len(session.index) == n_embeddings
+
+    report = session.latency_report()
+    print(f"Replayed {len(arrivals)} chunks ({arrivals[-1]}s of audio, poll every {poll_interval}s) "
+          f"in {real_seconds:.2f}s real time")
+    for stats in session.chunk_stats:
+        label = f"chunk {stats['chunk']}" if stats["chunk"] is not None else "finish "
+        print(f"  {label}: +{stats['segments']:4d} segments, +{stats['turns']:3d} turns, "
+              f"+{stats['emotion_groups']:3d} emotion groups, +{stats['indexed']:3d} indexed, "
+              f"+{stats['candidates']:2d} candidates, {stats['latency_seconds']:.2f}s after arrival")
+    print(f"merge == batch: {merge_ok}, turns == batch: {turns_ok}, emotion == batch: {emotion_ok}, "
+          f"index {len(session.index)} / embeddings {n_embeddings}")
+    print(f"{report['candidates']} candidates; chunk-arrival-to-candidate latency mean "
+          f"{report['candidate_latency_mean']:.2f}s, p95 {report['candidate_latency_p95']:.2f}s, "
+          f"max {report['candidate_latency_max']:.2f}s")
+    return merge_ok and turns_ok and emotion_ok and index_ok and report["candidates"] > 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run_live_replay() else 1)
@@ -0,0 +1,82 @@
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from backend.Optimization.quantizedInference import (
+    BACKENDS, compare_classifier_backends, compare_embedder_backends, print_report
+)
+
+SAMPLE_RATE = 16000
+
+
+def tiny_audio_classifier(num_labels=7):
+    """Randomly initialised Whisper audio classifier with the emotion model's architecture, but tiny."""
+    from transformers import WhisperConfig, WhisperFeatureExtractor, WhisperForAudioClassification
+
+    config = WhisperConfig(
+        d_model=64, encoder_layers=2, encoder_attention_heads=4, encoder_ffn_dim=128,
+        decoder_layers=1, decoder_attention_heads=4, decoder_ffn_dim=128,
+        num_mel_bins=128, max_source_positions=1500, classifier_proj_size=32,
+        num_labels=num_labels,
+        id2label={i: f"LABEL_{i}" for i in range(num_labels)},
+        label2id={f"LABEL_{i}": i for i in range(num_labels)},
+    )
+    return WhisperForAudioClassification(config).eval(), WhisperFeatureExtractor(feature_size=128)
+
+
+def tiny_sentence_embedder():
+    """Randomly initialised BERT-style SentenceTransformer (e5-large is a BERT encoder + mean pooling)."""
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    path = tempfile.mkdtemp(prefix="podclip_tiny_e5_")
+    words = "passage query speaker emotion neutral happy sad the of people stress power through calm recharge"
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + sorted(set(words.split())) + [str(d) for d in range(10)]
+    with open(os.path.join(path, "vocab.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(vocab) + "\n")
+    BertTokenizerFast(os.path.join(path, "vocab.txt")).save_pretrained(path)
+    BertModel(BertConfig(
+        vocab_size=len(vocab), hidden_size=64, num_hidden_layers=2, num_attention_heads=4, intermediate_size=128
+    )).save_pretrained(path)
+
+    transformer = models.Transformer(path, max_seq_length=64)
+    pooling = models.Pooling(transformer.get_word_embedding_dimension(), pooling_mode="mean")
+    return SentenceTransformer(modules=[transformer, pooling], device="cpu")
+
+
+def run_quantization_benchmark(backends=BACKENDS, min_agreement=0.75, min_cosine=0.95):
+    """
+    Compares fp32 against the optimised backends on tiny random models, so no
+    download is needed. Fails if int8/ONNX drift too far from fp32.
+
+    Returns:
+        bool: True if every backend stayed within the drift thresholds.
+    """
+    import torch
+
+    torch.manual_seed(0)
+    rng = np.random.default_rng(0)
+
+    model, feature_extractor = tiny_audio_classifier()
+    audio_inputs = [
+        {"raw": rng.standard_normal(SAMPLE_RATE * 5).astype(np.float32) * 0.1, "sampling_rate": SAMPLE_RATE}
+        for _ in range(8)
+    ]
+    classifier_report = compare_classifier_backends(model, feature_extractor, audio_inputs, backends)
+    print_report("Tiny Whisper audio classifier", classifier_report)
+
+    texts = [f"passage: [SPEAKER_0{i % 2}] [EMOTION_neutral] {i} people stress power through calm" for i in range(32)]
+    embedder_report = compare_embedder_backends(tiny_sentence_embedder(), texts, backends)
+    print_report("Tiny BERT sentence embedder", embedder_report)
+
+    ok = all(stats["label_agreement"] >= min_agreement for stats in classifier_report.values())
+    ok = ok and all(stats["min_cosine"] >= min_cosine for stats in embedder_report.values())
+    print(f"\n{'✅' if ok else '❌'} Drift check (label agreement >= {min_agreement}, cosine >= {min_cosine})")
+    return ok
+
+
+if __name__ == "__main__":
+    selected = tuple(sys.argv[1:]) or BACKENDS
+    sys.exit(0 if run_quantization_benchmark(selected) else 1)
@@ -0,0 +1,52 @@
+import sys
+import time
+
+import numpy as np
+
+from backend.RagPipeline.topicSegmentation import TopicSegmenter
+
+
+def synthetic_episode(n_topics=12, dim=64, noise=1.0, seed=0):
+    """Segments of 5-15 s drawn around one random centroid per topic (topics last 2-8 min)."""
+    rng = np.random.default_rng(seed)
+    embeddings, segments, true_boundaries = [], [], []
+    t = 0.0
+    for topic in range(n_topics):
+        centroid = rng.standard_normal(dim)
+        topic_end = t + rng.uniform(120, 480)
+        if topic:
+            true_boundaries.append(len(segments))
+        while t < topic_end:
+            length = rng.uniform(5, 15)
+            segments.append({"start": t, "end": t + length})
+            embeddings.append(centroid + noise * rng.standard_normal(dim))
+            t += length
+    return segments, np.array(embeddings, dtype=np.float32), true_boundaries
+
+
+def boundary_f1(found, truth, tolerance=2):
+    """Precision/recall/F1 where a found boundary matches a true one within `tolerance` segments."""
+    matched = sum(any(abs(f - t) <= tolerance for f in found) for t in truth)
+    precision = sum(any(abs(f - t) <= tolerance for t in truth) for f in found) / max(len(found), 1)
+    recall = matched / max(len(truth), 1)
+    return precision, recall, 2 * precision * recall / max(precision + recall, 1e-12)
+
+
+def run_topic_benchmark():
+    segmenter = TopicSegmenter()
+    ok = True
+    for n_topics in (12, 100, 1000):
+        segments, embeddings, truth = synthetic_episode(n_topics)
+        started = time.perf_counter()
+        chapters = segmenter.chapters(segments, embeddings)
+        elapsed = time.perf_counter() - started
+        found = [c["first_segment"] for c in chapters[1:]]
+        precision, recall, f1 = boundary_f1(found, truth)
+        ok = ok and f1 >= 0.8
+        print(f"{len(segments):6d} segments, {n_topics:4d} topics: {len(chapters):4d} chapters in {elapsed * 1000:7.1f} ms | "
+              f"precision {precision:.2f} recall {recall:.2f} F1 {f1:.2f}")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run_topic_benchmark() else 1)
@@ -0,0 +1,171 @@
+import os
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+from backend.EmotionDetectionModel.combining import EmotionProcessor
+from backend.Preprocessing.voiceActivity import (
+    SAMPLE_RATE, SpeechMask, compute_speech_mask, detect_speech, flag_silent_segments
+)
+from backend.benchmarks.checks import check
+from backend.benchmarks.emotionWindows import StubPipe
+
+# (seconds, kind): a voiced tone stands in for speech, hiss for broadband noise
+LAYOUT = [(2.0, "silence"), (5.0, "tone"), (0.3, "silence"), (4.0, "tone"), (3.0, "noise"),
+          (0.1, "tone"), (3.0, "silence"), (6.0, "tone"), (1.6, "silence")]
+
+
+def synthetic_audio(layout=LAYOUT, seed=0):
+    """Float32 16 kHz audio following the layout."""
+    rng = np.random.default_rng(seed)
+    pieces, t = [], 0.0
+    for seconds, kind in layout:
+        n = int(seconds * SAMPLE_RATE)
+        if kind == "tone":
+            time_axis = (np.arange(n) + t * SAMPLE_RATE) / SAMPLE_RATE
+            piece = 0.3 * np.sin(2 * np.pi * 180.0 * time_axis) * (1.0 + 0.3 * np.sin(2 * np.pi * 3.0 * time_axis))
+        elif kind == "noise":
+            piece = 0.3 * rng.standard_normal(n)
+        else:
+            piece = 0.001 * rng.standard_normal(n)
+        pieces.append(piece.astype(np.float32))
+        t += seconds
+    return np.concatenate(pieces)
+
+
+def blocks_of(audio, sizes):
+    """Splits audio into consecutive blocks with the given sample counts (cycled), like an ffmpeg pipe would."""
+    position, k = 0, 0
+    while position < len(audio):
+        yield audio[position:position + sizes[k % len(sizes)]]
+        position += sizes[k % len(sizes)]
+        k += 1
+
+
+def write_wav(path, audio):
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes((np.clip(audio, -1, 1) * 32767).astype(np.int16).tobytes())
+
+
+def close(a, b, tolerance=0.07):
+    return len(a) == len(b) and all(abs(x - y) <= tolerance for pa, pb in zip(a, b) for x, y in zip(pa, pb))
+
+
+def check_compute_speech_mask(audio):
+    whole = compute_speech_mask([audio])
+    frame_len = int(round(0.03 * SAMPLE_RATE))
+    ok = check("one mask frame per 30 ms, the trailing partial frame included",
+               len(whole.mask) == -(-len(audio) // frame_len) and abs(whole.frame_seconds - 0.03) < 1e-12)
+    for sizes in ([SAMPLE_RATE], [1001, 37, 4799], [frame_len * 5]):
+        streamed = compute_speech_mask(blocks_of(audio, sizes))
+        ok &= check(f"blocks of {sizes} samples give the same mask as one block", np.array_equal(streamed.mask, whole.mask))
+    ok &= check("empty stream gives an empty mask", len(compute_speech_mask([]).mask) == 0)
+
+    raw = whole.speech_regions()
+    ok &= check("tone is speech, silence and hiss are not",
+                whole.speech_fraction(3.0, 7.0) > 0.95 and whole.speech_fraction(0.0, 1.9) == 0.0
+                and whole.speech_fraction(11.5, 14.0) < 0.05)
+    ok &= check("raw mask keeps the 0.3 s gap and the 0.1 s burst", len(raw) == 4)
+    return ok
+
+
+def check_smoothing():
+    frame = 0.03
+    # speech 1.5 s | gap 0.3 s | speech 1.5 s | gap 1.5 s | burst 0.15 s | gap 1.5 s | speech 1.5 s
+    runs = [(0.6, False), (1.5, True), (0.3, False), (1.5, True), (1.5, False), (0.15, True), (1.5, False), (1.5, True)]
+    mask = np.concatenate([np.full(int(round(seconds / frame)), value) for seconds, value in runs])
+    original = SpeechMask(mask.copy(), frame)
+    smoothed = original.smoothed(min_speech=0.25, min_silence=0.5)
+    regions = smoothed.speech_regions()
+    ok = check("gaps under min_silence are filled, longer ones kept", close(regions[:1], [(0.6, 3.9)], 1e-6))
+    ok &= check("bursts under min_speech are dropped", len(regions) == 2 and close(regions[1:], [(7.05, 8.55)], 1e-6))
+    ok &= check("leading silence is never filled", not smoothed.mask[0])
+    ok &= check("smoothing leaves the original mask untouched", np.array_equal(original.mask, mask))
+    return ok
+
+
+def check_trim_and_fraction():
+    mask = SpeechMask(np.array([0, 0, 1, 1, 1, 0, 0, 1, 0, 0], dtype=bool), 1.0)
+    ok = check("trim shrinks to the first and last speech frame", mask.trim(0.5, 9.5) == (2.0, 8.0))
+    ok &= check("trim keeps a range that starts and ends inside speech", mask.trim(2.5, 4.5) == (2.5, 4.5))
+    ok &= check("trim of a silent range is None", mask.trim(5.0, 7.0) is None)
+    ok &= check("speech_fraction counts whole frames", mask.speech_fraction(0.0, 10.0) == 0.4
+                and mask.speech_fraction(2.0, 4.0) == 1.0)
+    ok &= check("speech_fraction of an empty or out-of-range span is 0", mask.speech_fraction(3.0, 3.0) == 0.0
+                and mask.speech_fraction(20.0, 30.0) == 0.0)
+
+    path = os.path.join(tempfile.mkdtemp(), "speech_mask.npz")
+    mask.save(path)
+    loaded = SpeechMask.load(path)
+    ok &= check("save/load round-trip", np.array_equal(loaded.mask, mask.mask) and loaded.frame_seconds == 1.0)
+
+    segments = [{"start": 0.0, "end": 2.0}, {"start": 2.0, "end": 5.0}, {"start": 5.0, "end": 10.0}]
+    flagged = flag_silent_segments(segments, mask)
+    ok &= check("segments mostly in non-speech are flagged", flagged == 1
+                and [s["in_silence"] for s in segments] == [True, False, False] and segments[2]["speech_fraction"] == 0.2)
+    return ok
+
+
+class MaskedEmotionProcessor(EmotionProcessor):
+    """Counts the seconds of audio that actually reach the classifier."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pipe = StubPipe()
+        self.seconds_loaded = 0.0
+
+    def load_audio(self, start, duration):
+        self.seconds_loaded += duration
+        return np.full(int(duration * SAMPLE_RATE), 0.5, dtype=np.float32)
+
+
+def check_gating_report():
+    # Speech from 10-20 s and 40-50 s of a 60 s episode
+    mask = SpeechMask(np.repeat([0, 1, 0, 0, 1, 0], 10).astype(bool), 1.0)
+    segments = [
+        {"start": 5.0, "end": 25.0, "text": " mostly speech", "speaker": "SPEAKER_00"},
+        {"start": 25.0, "end": 38.0, "text": " music", "speaker": "SPEAKER_01"},
+        {"start": 38.0, "end": 52.0, "text": " more speech", "speaker": "SPEAKER_00"},
+    ]
+    flag_silent_segments(segments, mask)
+    processor = MaskedEmotionProcessor(None, None, tempfile.mkdtemp(), speech_mask=mask)
+    processor.segments = segments
+    processor.process()
+    results = list(processor.iter_results())
+    stats = processor.gating_stats()
+    ok = check("only speech is sent to the classifier", processor.seconds_loaded == 20.0)
+    ok &= check("skipped seconds and speedup", stats["seconds_total"] == 47.0 and stats["seconds_skipped"] == 27.0
+                and abs(stats["speedup"] - 47.0 / 20.0) < 1e-9)
+    ok &= check("group with no speech is labelled no_speech and flagged in_silence",
+                results[1]["emotion"]["label"] == "no_speech" and results[1]["in_silence"]
+                and not results[0]["in_silence"])
+    return ok
+
+
+def run_voice_activity_checks():
+    audio = synthetic_audio()
+    ok = check_compute_speech_mask(audio)
+    ok &= check_smoothing()
+    ok &= check_trim_and_fraction()
+    ok &= check_gating_report()
+
+    # Full path: ffmpeg pipe -> frame detector -> smoothing
+    path = os.path.join(tempfile.mkdtemp(), "audio.wav")
+    write_wav(path, audio)
+    started = time.perf_counter()
+    mask = detect_speech(path, block_seconds=1.7)
+    elapsed = time.perf_counter() - started
+    expected = [(2.0, 11.3), (17.4, 23.4)]  # the 0.3 s gap filled, the 0.1 s burst dropped
+    ok &= check(f"detect_speech on {len(audio) / SAMPLE_RATE:.0f} s of audio finds {mask.speech_regions()} "
+                f"in {elapsed * 1000:.0f} ms", close(mask.speech_regions(), expected))
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run_voice_activity_checks() else 1)